@@ -1,178 +1,394 @@
-import json
-import os
-import csv
-from horarios import cargar_feriados
-from validaciones import (
-    validar_anticipacion,
-    validar_capacidad_categoria,
-    validar_fecha,
-    validar_hora,
-    validar_dia_valido,
-    validar_limite_4_meses
-)
-from datetime import datetime, timedelta
-
-ARCHIVO_CLIENTES = "clientes.json"
-
-def cargar_clientes():
-    """Carga los turnos desde el archivo JSON."""
-    if os.path.exists(ARCHIVO_CLIENTES):
-        with open(ARCHIVO_CLIENTES, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def guardar_clientes(clientes):
-    """Guarda los turnos en el archivo JSON."""
-    with open(ARCHIVO_CLIENTES, "w", encoding="utf-8") as f:
-        json.dump(clientes, f, ensure_ascii=False, indent=4)
-
-def agregar_turno(turno):
-    """Agrega un nuevo turno, evitando conflictos, duplicados y otras restricciones."""
-    clientes = cargar_clientes()
-    feriados = cargar_feriados()
-
-    try:
-        fecha_turno = datetime.strptime(turno["fecha"], "%Y-%m-%d")
-        fecha_actual = datetime.now()
-        if fecha_turno.date() < fecha_actual.date():
-            return f"No puedes agendar turnos en fechas pasadas ({turno['fecha']})."
-    except ValueError:
-        return "Formato de fecha incorrecto. Use YYYY-MM-DD."
-
-    if turno["fecha"] in feriados:
-        return f"No se pueden agendar turnos en días feriados ({turno['fecha']})."
-
-    try:
-        fecha_hora_turno = datetime.strptime(f"{turno['fecha']} {turno['hora']}", "%Y-%m-%d %H:%M")
-        if fecha_hora_turno < datetime.now() + timedelta(hours=2):
-            return "Los turnos deben solicitarse con al menos 2 horas de anticipación."
-    except ValueError:
-        return "Hora inválida o formato incorrecto."
-
-    for t in clientes:
-        if (
-            t.get("nombre", "").strip().lower() == turno["nombre"].strip().lower()
-            and t.get("fecha") == turno["fecha"]
-            and t.get("hora") == turno["hora"]
-        ):
-            return f"{turno['nombre']} ya tiene un turno registrado el {turno['fecha']} a las {turno['hora']}."
-
-    mismos_turnos = [
-        t for t in clientes
-        if t.get("categoria") == turno["categoria"]
-        and t.get("fecha") == turno["fecha"]
-        and t.get("hora") == turno["hora"]
-    ]
-    if len(mismos_turnos) >= 2:
-        return "Ya hay 2 turnos registrados en esta categoría a esa hora."
-    
-    if not validar_limite_4_meses(turno["fecha"]):
-        return "No se pueden crear turnos con más de 4 meses de anticipación."
-    
-    # Generar nuevo ID único
-    nuevo_id = max([t.get("id", 0) for t in clientes], default=0) + 1
-    turno["id"] = nuevo_id
-
-    clientes.append(turno)
-    guardar_clientes(clientes)
-    return f"Turno de {turno['nombre']} (ID: {nuevo_id}) agendado correctamente."
-
-def cancelar_turno(nombre):
-    """Elimina un turno según el nombre del cliente."""
-    clientes = cargar_clientes()
-    clientes_filtrados = [t for t in clientes if t.get("nombre") != nombre]
-
-    if len(clientes_filtrados) == len(clientes):
-        return "Turno no encontrado."
-
-    guardar_clientes(clientes_filtrados)
-    return f"Turno de {nombre} cancelado."
-
-def modificar_turno(nombre, nueva_fecha, nueva_hora):
-    """Modifica la fecha y hora de un turno existente, con todas las validaciones necesarias."""
-    clientes = cargar_clientes()
-    feriados = cargar_feriados()
-
-    turno_actual = next((t for t in clientes if t.get("nombre") == nombre), None)
-    if not turno_actual:
-        return "Turno no encontrado."
-
-    if not validar_fecha(nueva_fecha):
-        return f"Fecha inválida. Use formato YYYY-MM-DD y una fecha no pasada."
-
-    if not validar_hora(nueva_hora):
-        return f"Hora inválida. Solo se permiten horas entre 10:00 y 18:00, en punto o y media."
-
-    if not validar_dia_valido(nueva_fecha):
-        return "No se pueden registrar turnos los domingos."
-
-    if nueva_fecha in feriados:
-        return f"No se pueden programar turnos en días feriados ({nueva_fecha})."
-
-    if not validar_anticipacion(nueva_fecha, nueva_hora):
-        return "Los turnos deben modificarse con al menos 2 horas de anticipación."
-    
-    if not validar_limite_4_meses(nueva_fecha):
-        return "No se pueden crear turnos con más de 4 meses de anticipación."
-    
-
-    clientes_sin_actual = [t for t in clientes if t != turno_actual]
-    ok, mensaje = validar_capacidad_categoria(
-        clientes_sin_actual,
-        turno_actual["categoria"],
-        nueva_fecha,
-        nueva_hora
-    )
-    if not ok:
-        return mensaje
-
-    turno_actual["fecha"] = nueva_fecha
-    turno_actual["hora"] = nueva_hora
-    guardar_clientes(clientes)
-
-    return f"Turno de {nombre} modificado a {nueva_fecha} a las {nueva_hora}."
-
-def buscar_turno(nombre):
-    """Busca turnos por nombre de cliente."""
-    clientes = cargar_clientes()
-    resultados = [t for t in clientes if nombre.lower() in t.get("nombre", "").lower()]
-
-    if not resultados:
-        return ["No se encontraron turnos para ese nombre."]
-
-    return [
-        f"{t.get('nombre')} - {t.get('categoria')} - {t.get('servicio')} - {t.get('fecha')} - {t.get('hora')}"
-        for t in resultados
-    ]
-
-def exportar_csv():
-    """Exporta los turnos a un archivo CSV."""
-    clientes = cargar_clientes()
-    with open("turnos.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["ID", "Nombre", "Categoría", "Servicio", "Fecha", "Hora"])
-        for turno in clientes:
-            writer.writerow([
-                turno.get("id", "Sin ID"),
-                turno.get("nombre", "Desconocido"),
-                turno.get("categoria", "Sin categoría"),
-                turno.get("servicio", "Sin servicio"),
-                turno.get("fecha", "Sin fecha"),
-                turno.get("hora", "Sin hora")
-            ])
-    return "Exportación completada"
-
-def obtener_estadisticas():
-    """Genera estadísticas sobre los turnos registrados."""
-    clientes = cargar_clientes()
-    total_turnos = len(clientes)
-    turnos_por_categoria = {}
-
-    for turno in clientes:
-        categoria = turno.get("categoria", "Sin categoría")
-        turnos_por_categoria[categoria] = turnos_por_categoria.get(categoria, 0) + 1
-
-    return {
-        "total_turnos": total_turnos,
-        "turnos_por_categoria": turnos_por_categoria
+import cliente_turnos
+import metricas
+from bloqueo_archivos import ArchivoOcupado
+from exportacion import exportar_turnos, guardar_marca, leer_marca
+from horarios import obtener_calendario
+from repositorio import ARCHIVO_CLIENTES, ConflictoDeVersion, obtener_repositorio, version_de
+from series_turnos import OMITIBLES, ResultadoSerie, desplazar_fecha, fechas_serie, nuevo_id_serie
+from validaciones import (
+    CONFLICTO,
+    ETAPAS_CAMBIO,
+    NO_ENCONTRADO,
+    ErrorValidacion,
+    Reloj,
+    Turno,
+    validar_serie,
+    validar_turno,
+)
+
+# En modo cliente (TURNOS_SERVIDOR, ver cliente_turnos) las operaciones las
+# resuelve servidor_turnos.py contra su índice en memoria; sin él, se trabaja
+# directamente sobre el almacenamiento configurado.
+
+def cargar_clientes():
+    """Carga los turnos desde el almacenamiento configurado."""
+    if cliente_turnos.activo():
+        return cliente_turnos.cargar_clientes()
+    return obtener_repositorio().todos()
+
+def guardar_clientes(clientes):
+    """Guarda la lista completa de turnos en el almacenamiento configurado."""
+    obtener_repositorio().guardar(clientes)
+
+def error_conflicto(actual):
+    """ErrorValidacion para un turno que otro puesto cambió (o canceló) después de leerlo."""
+    if actual is None:
+        return ErrorValidacion(NO_ENCONTRADO, "El turno ya no existe: fue cancelado desde otro puesto.")
+    return ErrorValidacion(
+        CONFLICTO,
+        f"El turno de {actual.get('nombre')} fue modificado desde otro puesto "
+        f"(ahora es el {actual.get('fecha')} a las {actual.get('hora')}). Revise los datos y vuelva a intentar."
+    )
+
+
+def agendar_turno(turno):
+    """
+    Valida y agenda un turno nuevo.
+
+    Devuelve (ID, None) si se agendó o (None, ErrorValidacion) con el código
+    del primer problema encontrado, para que la GUI y el menú puedan
+    reaccionar según el código.
+    """
+    if cliente_turnos.activo():
+        return cliente_turnos.agendar_turno(turno)
+    repositorio = obtener_repositorio()
+    calendario = obtener_calendario()
+
+    try:
+        with repositorio.transaccion():
+            # Se valida con el archivo bloqueado, contra lo último que guardaron los demás puestos.
+            error = validar_turno(Turno.desde_dict(turno), repositorio, calendario)
+            if error:
+                metricas.sumar("rechazos", motivo=error.codigo)
+                return None, error
+            nuevo_id = repositorio.insertar(turno)
+    except ArchivoOcupado as e:
+        metricas.sumar("rechazos", motivo=CONFLICTO)
+        return None, ErrorValidacion(CONFLICTO, str(e))
+    metricas.sumar("turnos_agendados")
+    return nuevo_id, None
+
+def agregar_turno(turno):
+    """Agrega un nuevo turno, evitando conflictos, duplicados y otras restricciones."""
+    nuevo_id, error = agendar_turno(turno)
+    if error:
+        return error.mensaje
+    return f"Turno de {turno['nombre']} (ID: {nuevo_id}) agendado correctamente."
+
+def agregar_turnos(turnos, todo_o_nada=False):
+    """
+    Agrega varios turnos con una sola carga y una sola escritura.
+
+    Cada turno se valida contra lo ya guardado y contra los turnos anteriores
+    del mismo lote. Devuelve un mensaje por turno, en el mismo formato que
+    `agregar_turno`. Con `todo_o_nada=True`, si alguno falla no se agenda ninguno.
+
+    Todo el lote se valida antes de agendar el primero (validar_serie), así
+    que un lote rechazado no deja nada que deshacer aunque la llamada esté
+    dentro de otra transacción (p. ej. en un lote del servicio de turnos).
+    """
+    if cliente_turnos.activo():
+        return cliente_turnos.agregar_turnos(turnos, todo_o_nada)
+    repositorio = obtener_repositorio()
+    calendario = obtener_calendario()
+    reloj = Reloj()
+
+    try:
+        with repositorio.transaccion():
+            errores = validar_serie(turnos, repositorio, calendario, reloj)
+            for error in filter(None, errores):
+                metricas.sumar("rechazos", motivo=error.codigo)
+            if todo_o_nada and any(errores):
+                return [
+                    error.mensaje if error else f"Turno de {turno['nombre']} no agendado: hay errores en otros turnos del lote."
+                    for turno, error in zip(turnos, errores)
+                ]
+            resultados = [
+                error.mensaje if error
+                else f"Turno de {turno['nombre']} (ID: {repositorio.insertar(turno)}) agendado correctamente."
+                for turno, error in zip(turnos, errores)
+            ]
+    except ArchivoOcupado as e:
+        return [f"Turno de {turno['nombre']} no agendado: {e}" for turno in turnos]
+    metricas.sumar("turnos_agendados", errores.count(None))
+    return resultados
+
+def agendar_serie(turno, cada_semanas=1, hasta=None, repeticiones=None):
+    """
+    Agenda una serie de turnos iguales cada `cada_semanas` semanas desde la fecha del turno.
+
+    Las fechas se expanden con series_turnos.fechas_serie (nunca más allá
+    del límite de reservas) y se validan todas juntas contra el índice con
+    una sola carga. Los domingos y feriados se saltean y se informan; si
+    otra fecha no pasa (capacidad, duplicado, ...) no se agenda ninguna.
+    Devuelve un ResultadoSerie.
+    """
+    if cliente_turnos.activo():
+        return cliente_turnos.agendar_serie(turno, cada_semanas, hasta, repeticiones)
+    repositorio = obtener_repositorio()
+    calendario = obtener_calendario()
+    reloj = Reloj()
+    fechas = fechas_serie(turno.get("fecha"), cada_semanas, hasta, repeticiones, reloj)
+    if not fechas:
+        error = validar_turno(Turno.desde_dict(turno), None, calendario, reloj=reloj)
+        return ResultadoSerie(None, [], [], [(turno.get("fecha"), error)] if error else [])
+
+    serie = nuevo_id_serie()
+    pedidos = [dict(turno, fecha=fecha, serie=serie) for fecha in fechas]
+    try:
+        with repositorio.transaccion():
+            errores = validar_serie(pedidos, repositorio, calendario, reloj)
+            omitidos = [(p["fecha"], e) for p, e in zip(pedidos, errores) if e and e.codigo in OMITIBLES]
+            rechazos = [(p["fecha"], e) for p, e in zip(pedidos, errores) if e and e.codigo not in OMITIBLES]
+            if rechazos or len(omitidos) == len(pedidos):
+                for _, error in rechazos:
+                    metricas.sumar("rechazos", motivo=error.codigo)
+                return ResultadoSerie(None, [], omitidos, rechazos)
+            # Todo validado: recién ahora se agenda, así la serie entra entera o no entra.
+            ids = [repositorio.insertar(p) for p, e in zip(pedidos, errores) if e is None]
+    except ArchivoOcupado as e:
+        metricas.sumar("rechazos", motivo=CONFLICTO)
+        return ResultadoSerie(None, [], [], [(turno.get("fecha"), ErrorValidacion(CONFLICTO, str(e)))])
+    metricas.sumar("turnos_agendados", len(ids))
+    return ResultadoSerie(serie, ids, omitidos, [])
+
+def _pendientes_de_serie(repositorio, serie, reloj):
+    """Turnos de la serie que todavía no empezaron (los ya pasados no se cancelan ni se mueven)."""
+    pendientes = []
+    for turno in repositorio.por_serie(serie):
+        inicio = Turno.desde_dict(turno).inicio
+        if inicio is None or inicio > reloj.ahora:
+            pendientes.append(turno)
+    return pendientes
+
+def cancelar_serie(serie):
+    """Cancela todos los turnos pendientes de la serie."""
+    if cliente_turnos.activo():
+        return cliente_turnos.cancelar_serie(serie)
+    repositorio = obtener_repositorio()
+    try:
+        with repositorio.transaccion():
+            cancelados = _pendientes_de_serie(repositorio, serie, Reloj())
+            if not cancelados:
+                return "Serie no encontrada."
+            for turno in cancelados:
+                repositorio.eliminar(turno)
+    except ArchivoOcupado as e:
+        return str(e)
+    metricas.sumar("turnos_cancelados", len(cancelados))
+    return f"Serie {serie} cancelada: {len(cancelados)} turno(s)."
+
+def mover_serie(serie, dias=0, nueva_hora=None):
+    """
+    Corre los turnos pendientes de la serie `dias` días y/o los pasa a `nueva_hora`.
+
+    Se validan todas las fechas nuevas juntas (cada turno deja libre su lugar
+    actual); si alguna no pasa no se mueve ninguno. Devuelve (cantidad de
+    turnos movidos, lista de (fecha nueva, ErrorValidacion)).
+    """
+    if cliente_turnos.activo():
+        return cliente_turnos.mover_serie(serie, dias, nueva_hora)
+    repositorio = obtener_repositorio()
+    calendario = obtener_calendario()
+    reloj = Reloj()
+    try:
+        with repositorio.transaccion():
+            actuales = _pendientes_de_serie(repositorio, serie, reloj)
+            if not actuales:
+                return 0, [(None, ErrorValidacion(NO_ENCONTRADO, "Serie no encontrada."))]
+            pedidos = [
+                dict(t, fecha=desplazar_fecha(t["fecha"], dias), hora=nueva_hora or t["hora"]) for t in actuales
+            ]
+            errores = validar_serie(
+                pedidos, repositorio, calendario, reloj, reemplaza=actuales, etapas=ETAPAS_CAMBIO
+            )
+            rechazos = [(p["fecha"], e) for p, e in zip(pedidos, errores) if e]
+            if rechazos:
+                for _, error in rechazos:
+                    metricas.sumar("rechazos", motivo=error.codigo)
+                return 0, rechazos
+            for turno, pedido in zip(actuales, pedidos):
+                repositorio.actualizar(turno, pedido["fecha"], pedido["hora"])
+    except ArchivoOcupado as e:
+        metricas.sumar("rechazos", motivo=CONFLICTO)
+        return 0, [(None, ErrorValidacion(CONFLICTO, str(e)))]
+    metricas.sumar("turnos_movidos", len(actuales))
+    return len(actuales), []
+
+def cancelar_turno(nombre):
+    """Elimina un turno según el nombre del cliente."""
+    if cliente_turnos.activo():
+        return cliente_turnos.cancelar_turno(nombre)
+    repositorio = obtener_repositorio()
+    try:
+        with repositorio.transaccion():
+            cancelados = repositorio.por_nombre(nombre)
+            if not cancelados:
+                return "Turno no encontrado."
+
+            for turno in cancelados:
+                repositorio.eliminar(turno)
+    except ArchivoOcupado as e:
+        return str(e)
+    metricas.sumar("turnos_cancelados", len(cancelados))
+    return f"Turno de {nombre} cancelado."
+
+def quitar_turno(id_turno, version=None):
+    """
+    Cancela el turno con ese ID.
+
+    Devuelve (turno, None) si se canceló o (turno o None, ErrorValidacion)
+    si no: NO_ENCONTRADO si ya no existe y CONFLICTO si con `version` (la
+    que tenía el turno cuando se mostró al usuario) otro puesto lo modificó
+    mientras tanto, o si tenía tomado el archivo.
+    """
+    if cliente_turnos.activo():
+        return cliente_turnos.quitar_turno(id_turno, version)
+    repositorio = obtener_repositorio()
+    try:
+        with repositorio.transaccion():
+            turno = repositorio.obtener(id_turno)
+            if turno is None:
+                return None, ErrorValidacion(NO_ENCONTRADO, "Turno no encontrado.")
+            repositorio.eliminar(turno, version=version)
+    except ConflictoDeVersion as conflicto:
+        return conflicto.actual, error_conflicto(conflicto.actual)
+    except ArchivoOcupado as e:
+        return None, ErrorValidacion(CONFLICTO, str(e))
+    metricas.sumar("turnos_cancelados")
+    return turno, None
+
+def cancelar_turno_por_id(id_turno, version=None):
+    """Cancela el turno con ese ID (ver quitar_turno) y devuelve el mensaje para el usuario."""
+    turno, error = quitar_turno(id_turno, version)
+    if error:
+        return error.mensaje
+    return f"Turno de {turno.get('nombre')} (ID: {id_turno}) cancelado."
+
+def turnos_por_nombre(nombre):
+    """Turnos cuyo nombre coincide exactamente, en orden de alta."""
+    if cliente_turnos.activo():
+        return cliente_turnos.turnos_por_nombre(nombre)
+    return obtener_repositorio().por_nombre(nombre)
+
+def modificar_turno(nombre, nueva_fecha, nueva_hora):
+    """Modifica la fecha y hora del primer turno registrado con ese nombre."""
+    encontrados = turnos_por_nombre(nombre)
+    if not encontrados:
+        return "Turno no encontrado."
+    return modificar_turno_por_id(encontrados[0]["id"], nueva_fecha, nueva_hora)
+
+def mover_turno(id_turno, nueva_fecha, nueva_hora, version=None):
+    """
+    Valida y cambia la fecha y hora de un turno existente.
+
+    Devuelve (turno, None) si se movió o (turno o None, ErrorValidacion).
+    Con `version`, si otro puesto modificó el turno desde que se leyó se
+    devuelve un error CONFLICTO en lugar de pisar ese cambio.
+    """
+    if cliente_turnos.activo():
+        return cliente_turnos.mover_turno(id_turno, nueva_fecha, nueva_hora, version)
+    repositorio = obtener_repositorio()
+    calendario = obtener_calendario()
+
+    try:
+        with repositorio.transaccion():
+            turno_actual = repositorio.obtener(id_turno)
+            if turno_actual is None:
+                return None, ErrorValidacion(NO_ENCONTRADO, "Turno no encontrado.")
+            if version is not None and version_de(turno_actual) != version:
+                return turno_actual, error_conflicto(turno_actual)
+
+            pedido = Turno.desde_dict(dict(turno_actual, fecha=nueva_fecha, hora=nueva_hora))
+            error = validar_turno(pedido, repositorio, calendario, excluir=turno_actual, etapas=ETAPAS_CAMBIO)
+            if error:
+                metricas.sumar("rechazos", motivo=error.codigo)
+                return turno_actual, error
+
+            repositorio.actualizar(turno_actual, pedido.fecha, pedido.hora)
+    except ArchivoOcupado as e:
+        metricas.sumar("rechazos", motivo=CONFLICTO)
+        return None, ErrorValidacion(CONFLICTO, str(e))
+    metricas.sumar("turnos_movidos")
+    return turno_actual, None
+
+def modificar_turno_por_id(id_turno, nueva_fecha, nueva_hora):
+    """Modifica la fecha y hora de un turno existente, con todas las validaciones necesarias."""
+    turno_actual, error = mover_turno(id_turno, nueva_fecha, nueva_hora)
+    if error:
+        return error.mensaje
+    return f"Turno de {turno_actual.get('nombre')} modificado a {turno_actual['fecha']} a las {turno_actual['hora']}."
+
+def obtener_turno(id_turno):
+    """Devuelve el turno con ese ID, o None si no existe."""
+    if cliente_turnos.activo():
+        return cliente_turnos.obtener_turno(id_turno)
+    return obtener_repositorio().obtener(id_turno)
+
+def listar_ids_turnos(desde=None, hasta=None, categoria=None, nombre=None):
+    """IDs de los turnos que pasan los filtros, ordenados por fecha y hora (para listas paginadas)."""
+    if cliente_turnos.activo():
+        return cliente_turnos.listar_ids_turnos(desde, hasta, categoria, nombre)
+    return obtener_repositorio().ids_por_fecha(desde, hasta, categoria, nombre)
+
+def obtener_turnos(ids):
+    """Turnos de esos IDs en el mismo orden (se omiten los que ya no existen)."""
+    if cliente_turnos.activo():
+        return cliente_turnos.obtener_turnos(ids)
+    return obtener_repositorio().obtener_varios(ids)
+
+def buscar_turno(nombre):
+    """Busca turnos por nombre de cliente."""
+    if cliente_turnos.activo():
+        return cliente_turnos.buscar_turno(nombre)
+    resultados = obtener_repositorio().buscar(nombre)
+
+    if not resultados:
+        return ["No se encontraron turnos para ese nombre."]
+
+    return [
+        f"{t.get('nombre')} - {t.get('categoria')} - {t.get('servicio')} - {t.get('fecha')} - {t.get('hora')}"
+        for t in resultados
+    ]
+
+def iterar_turnos(desde=None, hasta=None, categoria=None, servicio=None, modificado_desde=None):
+    """Turnos que pasan los filtros, incluidos los archivados (ver RepositorioArchivo.iterar)."""
+    if cliente_turnos.activo():
+        return cliente_turnos.iterar_turnos(desde, hasta, categoria, servicio, modificado_desde)
+    return obtener_repositorio().iterar(desde, hasta, categoria, servicio, modificado_desde)
+
+def exportar_csv(ruta="turnos.csv", desde=None, hasta=None, categoria=None, servicio=None,
+                 comprimir=None, incremental=False, cancelacion=None, progreso=None):
+    """
+    Exporta los turnos a un archivo CSV.
+
+    Se pueden filtrar por rango de fechas, categoría y servicio; si la ruta
+    termina en .gz (o `comprimir` es True) se escribe comprimido con gzip. En
+    modo incremental sólo se exportan los turnos dados de alta o modificados
+    desde la última exportación incremental a esa misma ruta. `cancelacion` y
+    `progreso` se pasan a exportar_turnos (una exportación cancelada lanza
+    ExportacionCancelada y no mueve la marca incremental).
+    """
+    marca_anterior = leer_marca(ruta) if incremental else None
+    turnos = iterar_turnos(desde, hasta, categoria, servicio, modificado_desde=marca_anterior)
+    cantidad, marca = exportar_turnos(turnos, ruta, comprimir, cancelacion, progreso)
+    if incremental and marca:
+        guardar_marca(ruta, marca)
+    return f"Exportación completada: {cantidad} turno(s) en {ruta}."
+
+def obtener_estadisticas(top=5):
+    """Genera estadísticas sobre los turnos registrados (sin recorrerlos: los contadores se mantienen con cada cambio)."""
+    if cliente_turnos.activo():
+        return cliente_turnos.obtener_estadisticas(top)
+    resumen = obtener_repositorio().estadisticas(top)
+    turnos_por_categoria = {
+        categoria or "Sin categoría": cantidad for categoria, cantidad in resumen["categorias"].items()
+    }
+
+    return {
+        "total_turnos": resumen["total"],
+        "turnos_por_categoria": turnos_por_categoria,
+        "turnos_por_banda": resumen["bandas"],
+        "top_clientes": resumen["clientes"],
+        "resumen": resumen,
     }
\ No newline at end of file
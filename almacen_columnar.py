@@ -0,0 +1,500 @@
+from array import array
+from collections import Counter
+from itertools import compress
+from collections.abc import MutableMapping
+from datetime import date, datetime
+
+from validaciones import HORARIOS_VALIDOS
+
+ORDEN_CAMPOS = ("nombre", "categoria", "servicio", "fecha", "hora", "id", "modificado", "version")
+POSICION_HORA = {hora: i for i, hora in enumerate(HORARIOS_VALIDOS)}
+COMPACTAR_DESDE = 1000  # Filas borradas a partir de las cuales se compacta el almacén...
+FRACCION_COMPACTAR = 0.25  # ...si además son más que esta fracción de todas las filas
+_EPOCA = datetime(1970, 1, 1)
+
+
+def _a_microsegundos(texto):
+    """Marca `modificado` ISO (como la de marca_modificacion) a microsegundos desde 1970, o None."""
+    if type(texto) is not str or len(texto) != 26 or texto[10] != "T" or texto[19] != ".":
+        return None  # Sólo se codifican las marcas que se pueden reconstruir idénticas
+    try:
+        momento = datetime.fromisoformat(texto)
+    except ValueError:
+        return None
+    delta = momento - _EPOCA
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def _desde_microsegundos(valor):
+    segundos, micro = divmod(valor, 1_000_000)
+    dias, segundos = divmod(segundos, 86400)
+    momento = datetime.fromordinal(_EPOCA.toordinal() + dias).replace(
+        hour=segundos // 3600, minute=segundos // 60 % 60, second=segundos % 60, microsecond=micro
+    )
+    return momento.isoformat(timespec="microseconds")
+
+def _a_ordinal(fecha):
+    """Fecha YYYY-MM-DD a número de día (None si no tiene ese formato exacto)."""
+    try:
+        dia = date.fromisoformat(fecha)
+    except (TypeError, ValueError):
+        return None
+    return dia.toordinal() if dia.isoformat() == fecha else None
+
+
+class Diccionario:
+    """Codifica textos repetidos como enteros chicos (0 queda reservado para "sin valor")."""
+
+    __slots__ = ("valores", "codigos")
+
+    def __init__(self):
+        self.valores = [None]
+        self.codigos = {}
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def buscar(self, valor):
+        """Código del valor, o None si nunca se guardó (no hay filas con ese valor)."""
+        return self.codigos.get(valor)
+
+
+class AlmacenColumnar:
+    """
+    Turnos guardados por columnas en lugar de un diccionario por turno.
+
+    Nombre, categoría y servicio se guardan como códigos de un Diccionario,
+    la fecha como número de día, la hora como posición en HORARIOS_VALIDOS,
+    el ID y la versión como enteros y `modificado` como microsegundos; todo
+    en `array`. Lo que no entra en ese formato (campos desconocidos, fechas
+    mal escritas, valores que no son texto) queda en `extras` para no perder
+    nada.
+
+    Cada fila tiene una única FilaTurno que se comporta como el diccionario
+    de antes. Las bajas sólo marcan la fila como borrada (la vista sigue
+    siendo legible); cuando las filas borradas pasan de COMPACTAR_DESDE y de
+    FRACCION_COMPACTAR del total se compacta el almacén (ver `compactar`),
+    así un proceso que corre mucho tiempo no crece con cada baja.
+    """
+
+    def __init__(self):
+        self.nombres = Diccionario()
+        self.categorias = Diccionario()
+        self.servicios = Diccionario()
+        self.col_nombre = array("I")
+        self.col_categoria = array("I")
+        self.col_servicio = array("I")
+        self.col_dia = array("i")
+        self.col_hora = array("b")
+        self.col_id = array("q")
+        self.col_modificado = array("q")
+        self.col_version = array("I")
+        self.vivas = bytearray()
+        self.borradas = 0
+        self.extras = {}
+        self.vistas = []
+        self._ordinales = {}
+        self._fechas = {}
+
+    def __len__(self):
+        return len(self.vistas)
+
+    def _columnas(self):
+        return (
+            self.col_nombre, self.col_categoria, self.col_servicio, self.col_dia,
+            self.col_hora, self.col_id, self.col_modificado, self.col_version,
+        )
+
+    def a_estado(self, filas):
+        """Las filas indicadas (en ese orden) como datos simples, para la imagen binaria (ver imagen_turnos)."""
+        posiciones = {fila: i for i, fila in enumerate(filas)} if self.extras else {}
+        return {
+            "textos": (self.nombres.valores, self.categorias.valores, self.servicios.valores),
+            "columnas": [
+                (columna.typecode, array(columna.typecode, map(columna.__getitem__, filas)).tobytes())
+                for columna in self._columnas()
+            ],
+            "extras": {posiciones[fila]: extras for fila, extras in self.extras.items() if fila in posiciones},
+        }
+
+    @classmethod
+    def desde_estado(cls, estado):
+        """Almacén armado a partir de `a_estado`, sin volver a codificar los turnos."""
+        almacen = cls()
+        for diccionario, valores in zip((almacen.nombres, almacen.categorias, almacen.servicios), estado["textos"]):
+            diccionario.valores = list(valores)
+            diccionario.codigos = {valor: codigo for codigo, valor in enumerate(valores) if codigo}
+        cantidades = set()
+        for columna, (tipo, datos) in zip(almacen._columnas(), estado["columnas"]):
+            if columna.typecode != tipo:
+                raise ValueError(f"Columna de tipo {tipo}, se esperaba {columna.typecode}.")
+            columna.frombytes(datos)
+            cantidades.add(len(columna))
+        if len(cantidades) != 1:
+            raise ValueError("Las columnas no tienen la misma cantidad de filas.")
+        cantidad = cantidades.pop()
+        almacen.vivas = bytearray(b"\x01") * cantidad
+        almacen.extras = dict(estado["extras"])
+        almacen.vistas = [FilaTurno(almacen, fila) for fila in range(cantidad)]
+        return almacen
+
+    def agregar(self, turno):
+        """Copia un turno (diccionario o vista de otro almacén) y devuelve su FilaTurno."""
+        fila = len(self.vistas)
+        nombre = categoria = servicio = dia = id_turno = modificado = version = 0
+        hora = -1
+        extras = {}
+        for clave, valor in turno.items():
+            if clave == "nombre" and type(valor) is str:
+                nombre = self.nombres.codificar(valor)
+            elif clave == "categoria" and type(valor) is str:
+                categoria = self.categorias.codificar(valor)
+            elif clave == "servicio" and type(valor) is str:
+                servicio = self.servicios.codificar(valor)
+            elif clave == "fecha" and self._ordinal(valor):
+                dia = self._ordinales[valor]
+            elif clave == "hora" and valor in POSICION_HORA:
+                hora = POSICION_HORA[valor]
+            elif clave == "id" and type(valor) is int and valor > 0:
+                id_turno = valor
+            elif clave == "version" and type(valor) is int and 0 < valor < 2 ** 32:
+                version = valor
+            elif clave == "modificado":
+                modificado = _a_microsegundos(valor) or 0
+                if not modificado:
+                    extras[clave] = valor
+            else:
+                extras[clave] = valor
+        if extras:
+            self.extras[fila] = extras
+        self.col_nombre.append(nombre)
+        self.col_categoria.append(categoria)
+        self.col_servicio.append(servicio)
+        self.col_dia.append(dia)
+        self.col_hora.append(hora)
+        self.col_id.append(id_turno)
+        self.col_modificado.append(modificado)
+        self.col_version.append(version)
+        self.vivas.append(1)
+        vista = FilaTurno(self, fila)
+        self.vistas.append(vista)
+        return vista
+
+    def _ordinal(self, fecha):
+        """Número de día de la fecha (0 si no está en formato YYYY-MM-DD); se recuerda por texto."""
+        dia = self._ordinales.get(fecha) if type(fecha) is str else 0
+        if dia is None:
+            dia = self._ordinales[fecha] = _a_ordinal(fecha) or 0
+            if dia:
+                self._fechas.setdefault(dia, fecha)
+        return dia
+
+    def _fecha(self, dia):
+        """Texto de la fecha; se comparte entre filas del mismo día."""
+        fecha = self._fechas.get(dia)
+        if fecha is None:
+            fecha = self._fechas[dia] = date.fromordinal(dia).isoformat()
+        return fecha
+
+    def quitar(self, fila):
+        if not self.vivas[fila]:
+            return
+        self.vivas[fila] = 0
+        self.borradas += 1
+        if self.borradas >= COMPACTAR_DESDE and self.borradas > len(self.vivas) * FRACCION_COMPACTAR:
+            self.compactar()
+
+    def compactar(self):
+        """
+        Descarta las filas borradas y los textos que ya no usa ninguna fila.
+
+        Las filas vivas quedan seguidas, en el mismo orden, y cada FilaTurno
+        viva pasa a apuntar a su nueva posición: las referencias que guardan
+        el índice (por_id, la lista) o quien llamó siguen valiendo. Las
+        vistas de filas borradas pasan a un almacén aparte con una copia de
+        su fila, así que siguen siendo legibles.
+        """
+        vivas = [fila for fila, viva in enumerate(self.vivas) if viva]
+        retiradas = AlmacenColumnar()
+        for vista, viva in zip(self.vistas, self.vivas):
+            if not viva:
+                copia = retiradas.agregar(vista)
+                vista.almacen, vista.fila = retiradas, copia.fila
+                retiradas.vistas[copia.fila] = vista
+
+        for atributo, columna in (("nombres", "col_nombre"), ("categorias", "col_categoria"), ("servicios", "col_servicio")):
+            anterior, nuevo = getattr(self, atributo), Diccionario()
+            codigos = {0: 0}
+            valores = array(getattr(self, columna).typecode)
+            for codigo in map(getattr(self, columna).__getitem__, vivas):
+                if codigo not in codigos:
+                    codigos[codigo] = nuevo.codificar(anterior.valores[codigo])
+                valores.append(codigos[codigo])
+            setattr(self, atributo, nuevo)
+            setattr(self, columna, valores)
+        for columna in ("col_dia", "col_hora", "col_id", "col_modificado", "col_version"):
+            anterior = getattr(self, columna)
+            setattr(self, columna, array(anterior.typecode, map(anterior.__getitem__, vivas)))
+
+        self.extras = {nueva: self.extras[fila] for nueva, fila in enumerate(vivas) if fila in self.extras}
+        self.vistas = [self.vistas[fila] for fila in vivas]
+        for nueva, vista in enumerate(self.vistas):
+            vista.fila = nueva
+        self.vivas = bytearray(b"\x01") * len(vivas)
+        self.borradas = 0
+        self._ordinales = {}
+        self._fechas = {}
+
+    def asignar(self, fila, clave, valor):
+        """Guarda un campo de la fila en su columna (o en `extras` si no se puede codificar)."""
+        extras = self.extras.get(fila)
+        if extras is not None:
+            extras.pop(clave, None)
+        self._vaciar(fila, clave)
+        guardado = True
+        if clave in ("nombre", "categoria", "servicio") and isinstance(valor, str):
+            diccionario, columna = self._columna_texto(clave)
+            columna[fila] = diccionario.codificar(valor)
+        elif clave == "fecha" and self._ordinal(valor):
+            self.col_dia[fila] = self._ordinal(valor)
+        elif clave == "hora" and valor in POSICION_HORA:
+            self.col_hora[fila] = POSICION_HORA[valor]
+        elif clave == "id" and type(valor) is int and valor > 0:
+            self.col_id[fila] = valor
+        elif clave == "modificado" and _a_microsegundos(valor) is not None:
+            self.col_modificado[fila] = _a_microsegundos(valor)
+        elif clave == "version" and type(valor) is int and 0 < valor < 2 ** 32:
+            self.col_version[fila] = valor
+        else:
+            guardado = False
+        if not guardado:
+            self.extras.setdefault(fila, {})[clave] = valor
+
+    def _columna_texto(self, clave):
+        if clave == "nombre":
+            return self.nombres, self.col_nombre
+        if clave == "categoria":
+            return self.categorias, self.col_categoria
+        return self.servicios, self.col_servicio
+
+    def _vaciar(self, fila, clave):
+        if clave == "nombre":
+            self.col_nombre[fila] = 0
+        elif clave == "categoria":
+            self.col_categoria[fila] = 0
+        elif clave == "servicio":
+            self.col_servicio[fila] = 0
+        elif clave == "fecha":
+            self.col_dia[fila] = 0
+        elif clave == "hora":
+            self.col_hora[fila] = -1
+        elif clave == "id":
+            self.col_id[fila] = 0
+        elif clave == "modificado":
+            self.col_modificado[fila] = 0
+        elif clave == "version":
+            self.col_version[fila] = 0
+
+    def borrar(self, fila, clave):
+        """Quita un campo de la fila. Devuelve False si no lo tenía."""
+        existia = self.leer(fila, clave, _FALTA) is not _FALTA
+        self._vaciar(fila, clave)
+        extras = self.extras.get(fila)
+        if extras is not None:
+            extras.pop(clave, None)
+        return existia
+
+    def leer(self, fila, clave, defecto=None):
+        """Valor de un campo de la fila, como estaba en el diccionario original."""
+        lector = _LECTORES.get(clave)
+        if lector is not None:
+            valor = lector(self, fila)
+            if valor is not None:
+                return valor
+        extras = self.extras.get(fila)
+        if extras is not None and clave in extras:
+            return extras[clave]
+        return defecto
+
+    def claves(self, fila):
+        """Campos presentes en la fila, en el orden habitual de un turno."""
+        resultado = [c for c in ORDEN_CAMPOS if self.leer(fila, c, _FALTA) is not _FALTA]
+        extras = self.extras.get(fila)
+        if extras:
+            resultado.extend(c for c in extras if c not in ORDEN_CAMPOS)
+        return resultado
+
+    # --- Consultas sobre columnas ------------------------------------------
+
+    def filtrar(self, desde=None, hasta=None, categoria=None, servicio=None, modificado_desde=None):
+        """
+        Filas vivas que pasan los filtros, recorriendo sólo las columnas de enteros.
+
+        Las fechas del rango son inclusive; las filas con fecha que no está en
+        formato YYYY-MM-DD no entran en un filtro por fecha. `modificado_desde`
+        deja las filas modificadas después de esa marca.
+        """
+        # Cada filtro achica las filas candidatas antes de mirar la columna
+        # siguiente; las bajas se descartan al final, sobre lo que quedó.
+        filas = range(len(self.vivas))
+        if categoria:
+            codigo = self.categorias.buscar(categoria)
+            columna = self.col_categoria
+            filas = [i for i in filas if columna[i] == codigo]
+        if servicio:
+            codigo = self.servicios.buscar(servicio)
+            columna = self.col_servicio
+            filas = [i for i in filas if columna[i] == codigo]
+        if desde or hasta:
+            minimo = _a_ordinal(desde) if desde else 1
+            maximo = _a_ordinal(hasta) if hasta else date.max.toordinal()
+            if minimo is None or maximo is None:
+                return []
+            columna = self.col_dia
+            filas = [i for i in filas if minimo <= columna[i] <= maximo]
+        vivas = self.vivas
+        filas = [i for i in filas if vivas[i]]
+        if modificado_desde:
+            marca = _a_microsegundos(modificado_desde)
+            filas = [i for i in filas if self._modificado_despues(i, marca, modificado_desde)]
+        return filas
+
+    def _modificado_despues(self, fila, marca, texto):
+        valor = self.col_modificado[fila]
+        if valor and marca is not None:
+            return valor > marca
+        return (self.leer(fila, "modificado") or "") > texto
+
+    def contar(self, campos, filas=None):
+        """
+        Cantidad de filas por combinación de valores de `campos` (p. ej. ("categoria", "hora")).
+
+        Se cuenta sobre los códigos de las columnas y sólo se decodifica una
+        vez cada combinación distinta.
+        """
+        columnas = [self._columna(campo) for campo in campos]
+        if filas is None:
+            codigos = Counter(zip(*(compress(columna, self.vivas) for columna in columnas)))
+        else:
+            codigos = Counter(zip(*(map(columna.__getitem__, filas) for columna in columnas)))
+        resultado = Counter()
+        for combinacion, cantidad in codigos.items():
+            clave = tuple(self._decodificar(campo, codigo) for campo, codigo in zip(campos, combinacion))
+            resultado[clave] += cantidad
+        return resultado
+
+    def _columna(self, campo):
+        return {
+            "nombre": self.col_nombre,
+            "categoria": self.col_categoria,
+            "servicio": self.col_servicio,
+            "fecha": self.col_dia,
+            "hora": self.col_hora,
+        }[campo]
+
+    def _decodificar(self, campo, codigo):
+        if campo == "fecha":
+            return self._fecha(codigo) if codigo else None
+        if campo == "hora":
+            return HORARIOS_VALIDOS[codigo] if codigo >= 0 else None
+        return self._columna_texto(campo)[0].valores[codigo]
+
+
+_FALTA = object()
+
+def _leer_nombre(almacen, fila):
+    return almacen.nombres.valores[almacen.col_nombre[fila]]
+
+def _leer_categoria(almacen, fila):
+    return almacen.categorias.valores[almacen.col_categoria[fila]]
+
+def _leer_servicio(almacen, fila):
+    return almacen.servicios.valores[almacen.col_servicio[fila]]
+
+def _leer_fecha(almacen, fila):
+    dia = almacen.col_dia[fila]
+    return almacen._fecha(dia) if dia else None
+
+def _leer_hora(almacen, fila):
+    posicion = almacen.col_hora[fila]
+    return HORARIOS_VALIDOS[posicion] if posicion >= 0 else None
+
+def _leer_id(almacen, fila):
+    return almacen.col_id[fila] or None
+
+def _leer_version(almacen, fila):
+    return almacen.col_version[fila] or None
+
+def _leer_modificado(almacen, fila):
+    valor = almacen.col_modificado[fila]
+    return _desde_microsegundos(valor) if valor else None
+
+# Lectores por campo: devuelven None si la columna no tiene valor para la fila.
+_LECTORES = {
+    "nombre": _leer_nombre,
+    "categoria": _leer_categoria,
+    "servicio": _leer_servicio,
+    "fecha": _leer_fecha,
+    "hora": _leer_hora,
+    "id": _leer_id,
+    "modificado": _leer_modificado,
+    "version": _leer_version,
+}
+
+
+class FilaTurno(MutableMapping):
+    """
+    Vista de una fila del almacén que se usa como el diccionario del turno.
+
+    Leer y asignar claves va directo a las columnas; `dict(fila)` devuelve
+    una copia común (por ejemplo, para guardarla en JSON).
+    """
+
+    __slots__ = ("almacen", "fila")
+
+    def __init__(self, almacen, fila):
+        self.almacen = almacen
+        self.fila = fila
+
+    def __getitem__(self, clave):
+        valor = self.almacen.leer(self.fila, clave, _FALTA)
+        if valor is _FALTA:
+            raise KeyError(clave)
+        return valor
+
+    def get(self, clave, defecto=None):
+        # Igual que almacen.leer, sin la llamada intermedia: es lo que más usa el índice.
+        lector = _LECTORES.get(clave)
+        if lector is not None:
+            valor = lector(self.almacen, self.fila)
+            if valor is not None:
+                return valor
+        extras = self.almacen.extras.get(self.fila)
+        if extras is not None and clave in extras:
+            return extras[clave]
+        return defecto
+
+    def __setitem__(self, clave, valor):
+        self.almacen.asignar(self.fila, clave, valor)
+
+    def __delitem__(self, clave):
+        if not self.almacen.borrar(self.fila, clave):
+            raise KeyError(clave)
+
+    def __contains__(self, clave):
+        return self.almacen.leer(self.fila, clave, _FALTA) is not _FALTA
+
+    def __iter__(self):
+        return iter(self.almacen.claves(self.fila))
+
+    def __len__(self):
+        return len(self.almacen.claves(self.fila))
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
@@ -0,0 +1,267 @@
+import csv
+import os
+from array import array
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se cuenta sobre `array`
+    np = None
+
+from archivo_historico import ANCHO, POSICION, ArchivoHistorico
+from horarios import obtener_calendario
+from repositorio import obtener_repositorio
+from servicios import CATEGORIAS
+from validaciones import HORARIOS_VALIDOS, MAX_TURNOS_POR_FRANJA
+
+DIAS_SEMANA = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+ENCABEZADOS = ["Categoría", "Día", "Hora", "Turnos", "Capacidad", "Utilización"]
+POSICION_HORA = {hora: i for i, hora in enumerate(HORARIOS_VALIDOS)}
+
+
+def _a_fecha(valor):
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class MatrizOcupacion:
+    """
+    Turnos por categoría × día de la semana × horario en un rango de fechas.
+
+    `conteos` es la matriz densa guardada plana (un ndarray de NumPy o un
+    array('I')): la celda (c, d, h) está en (c * 7 + d) * len(HORARIOS_VALIDOS) + h.
+    La capacidad de una celda es MAX_TURNOS_POR_FRANJA por cada día
+    reservable de ese día de la semana dentro del rango, así que la
+    utilización es turnos / capacidad.
+    """
+
+    def __init__(self, categorias, desde, hasta, conteos, dias_por_semana):
+        self.categorias = list(categorias)
+        self.desde = desde
+        self.hasta = hasta
+        self.conteos = conteos
+        self.dias_por_semana = list(dias_por_semana)
+
+    def _posicion(self, c, d, h):
+        return (c * 7 + d) * len(HORARIOS_VALIDOS) + h
+
+    def turnos(self, c, d, h):
+        """Turnos de la categoría `c` (posición en `categorias`) el día de la semana `d` a la hora `h` (posiciones)."""
+        return int(self.conteos[self._posicion(c, d, h)])
+
+    def capacidad(self, d):
+        """Lugares de una categoría en un horario de ese día de la semana, sumando todo el rango."""
+        return self.dias_por_semana[d] * MAX_TURNOS_POR_FRANJA
+
+    def utilizacion(self, c, d, h):
+        """Fracción ocupada de la celda (None si ese día de la semana no tiene días reservables en el rango)."""
+        capacidad = self.capacidad(d)
+        return self.turnos(c, d, h) / capacidad if capacidad else None
+
+    def total(self):
+        return int(sum(self.conteos))
+
+    def tabla(self, categoria=None):
+        """
+        Utilización por día de la semana (filas) y horario (columnas) de una categoría.
+
+        Sin categoría se suman todas contra la capacidad de todas juntas.
+        """
+        if categoria is not None:
+            c = self.categorias.index(categoria)
+            return [[self.utilizacion(c, d, h) for h in range(len(HORARIOS_VALIDOS))] for d in range(7)]
+        cantidad = len(self.categorias)
+        resultado = []
+        for d in range(7):
+            capacidad = self.capacidad(d) * cantidad
+            resultado.append([
+                sum(self.turnos(c, d, h) for c in range(cantidad)) / capacidad if capacidad else None
+                for h in range(len(HORARIOS_VALIDOS))
+            ])
+        return resultado
+
+    def filas(self):
+        """Filas (categoría, día, hora, turnos, capacidad, utilización) de las celdas con capacidad o con turnos."""
+        for c, categoria in enumerate(self.categorias):
+            for d, nombre_dia in enumerate(DIAS_SEMANA):
+                for h, hora in enumerate(HORARIOS_VALIDOS):
+                    turnos = self.turnos(c, d, h)
+                    capacidad = self.capacidad(d)
+                    if turnos or capacidad:
+                        utilizacion = round(turnos / capacidad, 4) if capacidad else ""
+                        yield [categoria, nombre_dia, hora, turnos, capacidad, utilizacion]
+
+
+def dias_por_semana(desde, hasta, calendario=None):
+    """Cantidad de días reservables de cada día de la semana (lunes = 0) entre dos fechas inclusive."""
+    calendario = calendario or obtener_calendario()
+    cantidades = [0] * 7
+    dia = desde
+    while dia <= hasta:
+        if calendario.es_reservable(dia):
+            cantidades[dia.weekday()] += 1
+        dia += timedelta(days=1)
+    return cantidades
+
+def _filas_categoria(valores, categorias):
+    """Para cada código del diccionario de categorías, su fila en la matriz (-1 si no es una de `categorias`)."""
+    posicion = {categoria: i for i, categoria in enumerate(categorias)}
+    return [posicion.get(valor, -1) for valor in valores]
+
+def _contar_columnas(almacen, categorias, minimo, maximo):
+    """
+    Cuenta las filas del almacén por celda en una sola pasada sobre las columnas de enteros.
+
+    Con NumPy las columnas se copian a arreglos (`tobytes` no deja al
+    almacén bloqueado para altas de otros hilos) y se cuenta con `bincount`;
+    sin NumPy se recorren las columnas una vez sumando en un array('I').
+    """
+    horas = len(HORARIOS_VALIDOS)
+    celdas = len(categorias) * 7 * horas
+    filas_categoria = _filas_categoria(almacen.categorias.valores, categorias)
+
+    if np is not None:
+        vivas = np.frombuffer(bytes(almacen.vivas), dtype=np.uint8)
+        n = len(vivas)
+        if not n:
+            return np.zeros(celdas, dtype=np.int64)
+        codigos = np.frombuffer(almacen.col_categoria.tobytes(), dtype=almacen.col_categoria.typecode)[:n]
+        dia = np.frombuffer(almacen.col_dia.tobytes(), dtype=almacen.col_dia.typecode)[:n].astype(np.int64)
+        hora = np.frombuffer(almacen.col_hora.tobytes(), dtype=almacen.col_hora.typecode)[:n].astype(np.int64)
+        fila = np.asarray(filas_categoria, dtype=np.int64)[codigos]
+        mascara = (vivas != 0) & (dia >= minimo) & (dia <= maximo) & (hora >= 0) & (fila >= 0)
+        celda = (fila * 7 + (dia - 1) % 7) * horas + hora  # El día 1 (1/1/1) fue lunes
+        return np.bincount(celda[mascara], minlength=celdas)
+
+    conteos = array("I", [0]) * celdas
+    columnas = zip(almacen.vivas, almacen.col_categoria, almacen.col_dia, almacen.col_hora)
+    for viva, codigo, dia, hora in columnas:
+        if viva and minimo <= dia <= maximo and hora >= 0:
+            fila = filas_categoria[codigo]
+            if fila >= 0:
+                conteos[(fila * 7 + (dia - 1) % 7) * horas + hora] += 1
+    return conteos
+
+def _contar_archivo(archivo, categorias, minimo, maximo):
+    """
+    Como _contar_columnas, sobre un mes del histórico: el rango de días se
+    busca por bisección y las columnas se leen directo del mapa.
+    """
+    horas = len(HORARIOS_VALIDOS)
+    celdas = len(categorias) * 7 * horas
+    filas = archivo.rango(date.fromordinal(minimo).isoformat(), date.fromordinal(maximo).isoformat())
+    posicion = {codigo: categorias.index(texto) for texto, codigo in archivo.codigos("categoria").items() if texto in categorias}
+
+    if np is not None:
+        if not len(filas):
+            return np.zeros(celdas, dtype=np.int64)
+        # Sin copiar: una matriz registros × campos sobre el mismo mapa.
+        tramo = np.frombuffer(archivo.registros, dtype=np.int64).reshape(-1, ANCHO)[filas.start:filas.stop]
+        codigos = tramo[:, POSICION["categoria"]]
+        traduccion = np.full(int(codigos.max()) + 1, -1, dtype=np.int64)
+        for codigo, fila in posicion.items():
+            if codigo < len(traduccion):
+                traduccion[codigo] = fila
+        fila = traduccion[codigos]
+        dia = tramo[:, POSICION["dia"]]
+        hora = tramo[:, POSICION["franja"]]
+        mascara = (hora >= 0) & (fila >= 0)
+        celda = (fila * 7 + (dia - 1) % 7) * horas + hora
+        return np.bincount(celda[mascara], minlength=celdas)
+
+    conteos = array("I", [0]) * celdas
+    columnas = (archivo.columna(campo)[filas.start:filas.stop] for campo in ("categoria", "dia", "franja"))
+    for codigo, dia, hora in zip(*columnas):
+        fila = posicion.get(codigo)
+        if fila is not None and hora >= 0:
+            conteos[(fila * 7 + (dia - 1) % 7) * horas + hora] += 1
+    return conteos
+
+def _sumar(conteos, otros):
+    """Suma dos matrices planas (del mismo tipo: ndarray o array('I'))."""
+    if np is not None:
+        return conteos + otros
+    return array("I", map(int.__add__, conteos, otros))
+
+def _contar_franjas(ocupacion, categorias):
+    """Cuenta a partir de pares ((categoria, fecha, hora), cantidad) ya agrupados (p. ej. por SQLite)."""
+    horas = len(HORARIOS_VALIDOS)
+    posicion = {categoria: i for i, categoria in enumerate(categorias)}
+    conteos = array("I", [0]) * (len(categorias) * 7 * horas)
+    for (categoria, fecha, hora), cantidad in ocupacion:
+        fila, h, dia = posicion.get(categoria), POSICION_HORA.get(hora), _a_fecha(fecha)
+        if fila is not None and h is not None and dia is not None:
+            conteos[(fila * 7 + dia.weekday()) * horas + h] += cantidad
+    return conteos
+
+def construir_matriz_ocupacion(desde, hasta, repositorio=None, categorias=None, calendario=None):
+    """
+    Arma la MatrizOcupacion de los turnos entre dos fechas (date o YYYY-MM-DD, inclusive).
+
+    Con el almacenamiento en archivo se cuenta directo sobre las columnas de
+    cada almacén (los meses del histórico que toca el rango y los turnos
+    actuales); con SQLite se parte de la ocupación ya agrupada por la base.
+    """
+    desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+    if desde is None or hasta is None or desde > hasta:
+        raise ValueError("Rango de fechas inválido (use YYYY-MM-DD y que 'desde' no sea posterior a 'hasta').")
+    categorias = list(categorias or CATEGORIAS)
+    repositorio = repositorio or obtener_repositorio()
+    if hasattr(repositorio, "almacenes"):
+        conteos = None
+        with repositorio.lectura():  # El análisis corre en segundo plano: que nadie cambie el almacén mientras se cuenta
+            for almacen in repositorio.almacenes(desde.isoformat(), hasta.isoformat()):
+                contar = _contar_archivo if isinstance(almacen, ArchivoHistorico) else _contar_columnas
+                parcial = contar(almacen, categorias, desde.toordinal(), hasta.toordinal())
+                conteos = parcial if conteos is None else _sumar(conteos, parcial)
+    else:
+        conteos = _contar_franjas(repositorio.ocupacion(desde.isoformat(), hasta.isoformat()), categorias)
+    return MatrizOcupacion(categorias, desde, hasta, conteos, dias_por_semana(desde, hasta, calendario))
+
+def rango_predeterminado(hoy=None):
+    """Último año hasta hoy, más los turnos ya agendados hacia adelante (hasta fin del año siguiente)."""
+    hoy = hoy or date.today()
+    return hoy - timedelta(days=365), date(hoy.year + 1, 12, 31)
+
+def exportar_matriz(matriz, ruta):
+    """
+    Guarda la matriz para analizarla por fuera.
+
+    En .npz (hace falta NumPy) se guardan los arreglos tal cual: `turnos` con
+    forma (categorías, 7, horarios), `capacidad` por día de la semana y las
+    etiquetas de cada eje. En cualquier otra ruta se escribe un CSV con una
+    fila por celda.
+    """
+    if ruta.endswith(".npz"):
+        if np is None:
+            raise RuntimeError("Para exportar en formato .npz hace falta NumPy; use un archivo .csv.")
+        np.savez_compressed(
+            ruta,
+            turnos=np.asarray(matriz.conteos, dtype=np.int64).reshape(len(matriz.categorias), 7, len(HORARIOS_VALIDOS)),
+            capacidad=np.asarray([matriz.capacidad(d) for d in range(7)], dtype=np.int64),
+            categorias=np.asarray(matriz.categorias),
+            dias=np.asarray(DIAS_SEMANA),
+            horas=np.asarray(HORARIOS_VALIDOS),
+            rango=np.asarray([matriz.desde.isoformat(), matriz.hasta.isoformat()]),
+        )
+        return f"Matriz de ocupación exportada a {ruta}."
+
+    temporal = ruta + ".tmp"
+    try:
+        with open(temporal, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(ENCABEZADOS)
+            cantidad = 0
+            for fila in matriz.filas():
+                writer.writerow(fila)
+                cantidad += 1
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return f"Matriz de ocupación exportada: {cantidad} celda(s) en {ruta}."
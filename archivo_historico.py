@@ -0,0 +1,217 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from datetime import date
+
+import metricas
+from almacen_columnar import ORDEN_CAMPOS, POSICION_HORA, _a_microsegundos, _a_ordinal, _desde_microsegundos
+from estadisticas import clasificar_banda
+from validaciones import HORARIOS_VALIDOS
+
+MAGICO = b"TURNOSH1"
+ENCABEZADO = struct.Struct("<8sII")  # Mágico, cantidad de registros, cantidad de textos
+CAMPOS = ("id", "dia", "franja", "nombre", "categoria", "servicio", "modificado", "version", "extras")
+ANCHO = len(CAMPOS)
+POSICION = {campo: i for i, campo in enumerate(CAMPOS)}
+TEXTOS = ("nombre", "categoria", "servicio")
+
+
+def escribir_archivo(ruta, turnos):
+    """
+    Escribe los turnos en el formato binario del histórico (reemplazando el archivo).
+
+    Los registros quedan ordenados por día, horario e ID. Lo que no entra en
+    las columnas (campos desconocidos, horas fuera de HORARIOS_VALIDOS,
+    marcas de modificación con otro formato) se guarda como JSON en la tabla
+    de textos, así que leer el archivo devuelve los mismos turnos.
+    """
+    textos = {"": 0}
+
+    def codificar(valor):
+        codigo = textos.get(valor)
+        if codigo is None:
+            codigo = textos[valor] = len(textos)
+        return codigo
+
+    filas = []
+    for turno in turnos:
+        fila = [0, 0, -1, 0, 0, 0, 0, 0, 0]
+        extras = {}
+        for clave, valor in turno.items():
+            if clave in TEXTOS and type(valor) is str:
+                fila[POSICION[clave]] = codificar(valor)
+            elif clave == "fecha" and _a_ordinal(valor):
+                fila[1] = _a_ordinal(valor)
+            elif clave == "hora" and valor in POSICION_HORA:
+                fila[2] = POSICION_HORA[valor]
+            elif clave in ("id", "version") and type(valor) is int and valor > 0:
+                fila[POSICION[clave]] = valor
+            elif clave == "modificado" and _a_microsegundos(valor):
+                fila[6] = _a_microsegundos(valor)
+            else:
+                extras[clave] = valor
+        if extras:
+            fila[8] = codificar(json.dumps(extras, ensure_ascii=False, default=dict))
+        filas.append(fila)
+    filas.sort(key=lambda fila: (fila[1], fila[2], fila[0]))
+
+    registros = array("q", (valor for fila in filas for valor in fila))
+    datos = [t.encode("utf-8") for t in textos]
+    desplazamientos = array("q", [0])
+    for texto in datos:
+        desplazamientos.append(desplazamientos[-1] + len(texto))
+    if sys.byteorder != "little":
+        registros.byteswap()
+        desplazamientos.byteswap()
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(ENCABEZADO.pack(MAGICO, len(filas), len(datos)))
+        f.write(registros.tobytes())
+        f.write(desplazamientos.tobytes())
+        f.write(b"".join(datos))
+        f.flush()
+        os.fsync(f.fileno())
+        metricas.sumar("bytes_escritos", f.tell(), archivo="historico")
+    os.replace(temporal, ruta)
+
+
+class ArchivoHistorico:
+    """
+    Archivo binario de turnos archivados, leído en su lugar con `mmap`.
+
+    Formato (little-endian): un encabezado (MAGICO, cantidad de registros,
+    cantidad de textos); los registros de ANCHO enteros de 8 bytes con los
+    campos de CAMPOS; los desplazamientos de cada texto y los textos en
+    UTF-8. Nombre, categoría y servicio son posiciones en la tabla de textos
+    (0 = sin valor), la fecha es número de día, la hora su posición en
+    HORARIOS_VALIDOS (-1 = sin valor) y `modificado` microsegundos desde 1970.
+
+    Las columnas son vistas escalonadas sobre el mapa, así que contar o
+    filtrar no arma un diccionario por turno, y como los registros están
+    ordenados por día los rangos de fechas se buscan por bisección. Sólo se
+    decodifican los turnos que se devuelven.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            self.mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, self.cantidad, cantidad_textos = ENCABEZADO.unpack_from(self.mapa)
+        if magico != MAGICO:
+            raise ValueError(f"{ruta} no es un archivo del histórico de turnos.")
+        inicio = ENCABEZADO.size
+        fin = inicio + self.cantidad * ANCHO * 8
+        self.registros = self._enteros(inicio, fin)
+        self.desplazamientos = self._enteros(fin, fin + (cantidad_textos + 1) * 8)
+        self.inicio_textos = fin + (cantidad_textos + 1) * 8
+        self._codigos = {}
+
+    def _enteros(self, inicio, fin):
+        if sys.byteorder == "little":
+            return memoryview(self.mapa)[inicio:fin].cast("q")
+        enteros = array("q", self.mapa[inicio:fin])  # En máquinas big-endian se copia
+        enteros.byteswap()
+        return enteros
+
+    def __len__(self):
+        return self.cantidad
+
+    def columna(self, campo):
+        """Valores de un campo de todos los registros (una vista sobre el mapa, sin copiar)."""
+        return self.registros[POSICION[campo]::ANCHO]
+
+    def texto(self, codigo):
+        if not codigo:
+            return None
+        inicio = self.inicio_textos + self.desplazamientos[codigo]
+        return self.mapa[inicio:self.inicio_textos + self.desplazamientos[codigo + 1]].decode("utf-8")
+
+    def codigos(self, campo):
+        """{texto: código} de los valores de un campo de texto (sólo se decodifican los distintos)."""
+        codigos = self._codigos.get(campo)
+        if codigos is None:
+            codigos = self._codigos[campo] = {self.texto(c): c for c in set(self.columna(campo)) if c}
+        return codigos
+
+    def rango(self, desde=None, hasta=None):
+        """
+        Registros con fecha entre `desde` y `hasta` (YYYY-MM-DD, inclusive), por bisección sobre los días.
+
+        Los registros sin fecha (día 0) quedan al principio y nunca entran.
+        """
+        dias = self.columna("dia")
+        inicio = bisect.bisect_left(dias, (_a_ordinal(desde) or 1) if desde else 1)
+        fin = bisect.bisect_right(dias, _a_ordinal(hasta) or 0) if hasta else self.cantidad
+        return range(inicio, max(inicio, fin))
+
+    def filtrar(self, desde=None, hasta=None, categoria=None, servicio=None, modificado_desde=None):
+        """Registros que pasan los filtros (mismo criterio que AlmacenColumnar.filtrar)."""
+        filas = self.rango(desde, hasta) if desde or hasta else range(self.cantidad)
+        for campo, valor in (("categoria", categoria), ("servicio", servicio)):
+            if valor:
+                codigo = self.codigos(campo).get(valor)
+                columna = self.columna(campo)
+                filas = [i for i in filas if columna[i] == codigo]
+        if modificado_desde:
+            marca = _a_microsegundos(modificado_desde)
+            filas = [i for i in filas if self._modificado_despues(i, marca, modificado_desde)]
+        return filas
+
+    def _modificado_despues(self, fila, marca, texto):
+        valor = self.registros[fila * ANCHO + POSICION["modificado"]]
+        if valor and marca is not None:
+            return valor > marca
+        return (self.turno(fila).get("modificado") or "") > texto
+
+    def con_nombres(self, codigos):
+        """Registros cuyo nombre es uno de esos códigos."""
+        columna = self.columna("nombre")
+        return [i for i, codigo in enumerate(columna) if codigo in codigos]
+
+    def id(self, fila):
+        return self.registros[fila * ANCHO]
+
+    def turno(self, fila):
+        """Decodifica un registro como el diccionario del turno."""
+        valores = self.registros[fila * ANCHO:(fila + 1) * ANCHO]
+        id_turno, dia, franja, nombre, categoria, servicio, modificado, version, extras = valores
+        campos = {
+            "nombre": self.texto(nombre),
+            "categoria": self.texto(categoria),
+            "servicio": self.texto(servicio),
+            "fecha": date.fromordinal(dia).isoformat() if dia else None,
+            "hora": HORARIOS_VALIDOS[franja] if franja >= 0 else None,
+            "id": id_turno or None,
+            "modificado": _desde_microsegundos(modificado) if modificado else None,
+            "version": version or None,
+        }
+        turno = {clave: campos[clave] for clave in ORDEN_CAMPOS if campos[clave] is not None}
+        if extras:
+            turno.update(json.loads(self.texto(extras)))
+        return turno
+
+    def turnos(self):
+        return [self.turno(i) for i in range(self.cantidad)]
+
+    def contadores(self):
+        """Cantidades por cliente, categoría y banda horaria, contando sobre las columnas."""
+        resultado = {"total": self.cantidad}
+        for tipo, campo in (("cliente", "nombre"), ("categoria", "categoria")):
+            resultado[tipo] = Counter({
+                self.texto(codigo) or "": cantidad for codigo, cantidad in Counter(self.columna(campo)).items()
+            })
+        bandas = Counter()
+        for franja, cantidad in Counter(self.columna("franja")).items():
+            if franja >= 0:
+                bandas[clasificar_banda(HORARIOS_VALIDOS[franja])] += cantidad
+        for fila, franja in enumerate(self.columna("franja")):
+            if franja < 0:  # Hora fuera de los horarios: está en los extras
+                bandas[clasificar_banda(self.turno(fila).get("hora"))] += 1
+        resultado["banda"] = bandas
+        return resultado
@@ -0,0 +1 @@
+"""Mediciones de rendimiento con datos sintéticos (ver benchmarks/ejecutar.py)."""
@@ -0,0 +1,263 @@
+"""
+Mide cuánto tardan las operaciones principales según la cantidad de turnos.
+
+Uso (desde la carpeta del proyecto):
+
+    python -m benchmarks.ejecutar [--tamanos 1000 10000 100000] [--modos json diario sqlite]
+                                  [--repeticiones 20] [--semilla 0] [--salida ruta.json]
+                                  [--comparar resultados_anteriores.json]
+
+Cada modo y tamaño corre en un proceso aparte, en una carpeta temporal con
+los datos del generador, así que no toca clientes.json y la memoria de un
+caso no se mezcla con la del siguiente. Los resultados se guardan en
+benchmarks/resultados/ con la versión del código, para comparar versiones.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: no hay pico de memoria del proceso
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+TAMANOS = (1000, 10000, 100000)
+MODOS = ("json", "diario", "sqlite")
+REPETICIONES = 20
+TOLERANCIA = 0.2  # Al comparar, más de un 20% más lento se marca como regresión
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por rango más cercano."""
+    ordenados = sorted(valores)
+    posicion = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[posicion]
+
+def nombre_prueba(numero):
+    """Nombre válido (sólo letras) distinto para cada número: los clientes nuevos de la medición."""
+    letras = ""
+    numero += 26 * 26
+    while numero:
+        numero, resto = divmod(numero, 26)
+        letras = "abcdefghijklmnopqrstuvwxyz"[resto] + letras
+    return f"Prueba {letras.capitalize()}"
+
+
+def _llamadas(semilla, repeticiones, generador):
+    """
+    Para cada operación, las llamadas a medir: `repeticiones` con tiempo y
+    una más con tracemalloc para el pico de memoria.
+
+    Las altas usan clientes nuevos en lugares libres; modificar y cancelar
+    trabajan sobre esos mismos clientes.
+    """
+    import agregar_turno
+    from analisis_ocupacion import construir_matriz_ocupacion, rango_predeterminado
+    from estadisticas import resumen_de
+    from servicios import CATEGORIAS
+
+    rng = random.Random(semilla)
+    veces = repeticiones + 1
+    libres = iter(generador.lugares_libres())
+    nuevos = [nombre_prueba(i) for i in range(veces)]
+    buscados = [rng.choice(generador.clientes).split()[rng.randint(0, 1)] for _ in range(veces)]
+    exportaciones = max(3, repeticiones // 5) + 1
+
+    def agregar(nombre):
+        categoria, fecha, hora = next(libres)
+        return agregar_turno.agregar_turno({
+            "nombre": nombre, "categoria": categoria, "servicio": rng.choice(CATEGORIAS[categoria]),
+            "fecha": fecha, "hora": hora,
+        })
+
+    def modificar(nombre):
+        categoria, fecha, hora = next(libres)
+        return agregar_turno.modificar_turno(nombre, fecha, hora)
+
+    def graficos():
+        resumen = resumen_de(agregar_turno.obtener_estadisticas()["resumen"])
+        return resumen, construir_matriz_ocupacion(*rango_predeterminado()).tabla()
+
+    return {
+        "agregar_turno": [lambda n=n: agregar(n) for n in nuevos],
+        "modificar_turno": [lambda n=n: modificar(n) for n in nuevos],
+        "cancelar_turno": [lambda n=n: agregar_turno.cancelar_turno(n) for n in nuevos],
+        "buscar_turno": [lambda b=b: agregar_turno.buscar_turno(b) for b in buscados],
+        "exportar_csv": [lambda: agregar_turno.exportar_csv("medicion.csv")] * exportaciones,
+        "obtener_estadisticas": [agregar_turno.obtener_estadisticas] * veces,
+        "graficos": [graficos] * veces,
+    }
+
+def medir_caso(modo, cantidad, semilla=0, repeticiones=REPETICIONES):
+    """
+    Genera los datos en una carpeta temporal y mide cada operación. Se
+    llama en un proceso nuevo (ver `correr_caso`): cambia de carpeta y fija
+    el modo de almacenamiento antes de importar el resto del proyecto.
+    """
+    directorio = tempfile.mkdtemp(prefix="turnos_medicion_")
+    shutil.copy(os.path.join(RAIZ, "feriados.json"), directorio)
+    os.chdir(directorio)
+    os.environ["TURNOS_ALMACENAMIENTO"] = modo
+    os.environ.pop("TURNOS_SERVIDOR", None)
+    sys.path.insert(0, RAIZ)
+    try:
+        from benchmarks.generador import Generador, escribir_datos
+
+        inicio = time.perf_counter()
+        generador = Generador(semilla)
+        escribir_datos(directorio, generador.turnos(cantidad), modo)
+        generacion = time.perf_counter() - inicio
+
+        import agregar_turno
+        inicio = time.perf_counter()
+        agregar_turno.obtener_estadisticas()  # Primera carga (y archivación de los turnos pasados)
+        primera_carga = time.perf_counter() - inicio
+
+        operaciones = {}
+        for nombre, llamadas in _llamadas(semilla, repeticiones, generador).items():
+            tiempos = []
+            for llamada in llamadas[:-1]:
+                inicio = time.perf_counter()
+                llamada()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            tracemalloc.start()
+            llamadas[-1]()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            operaciones[nombre] = {
+                "repeticiones": len(tiempos),
+                "p50_ms": round(percentil(tiempos, 50), 3),
+                "p90_ms": round(percentil(tiempos, 90), 3),
+                "p99_ms": round(percentil(tiempos, 99), 3),
+                "max_ms": round(max(tiempos), 3),
+                "memoria_pico_kb": round(pico / 1024, 1),
+            }
+        return {
+            "modo": modo,
+            "cantidad": cantidad,
+            "generacion_s": round(generacion, 3),
+            "primera_carga_ms": round(primera_carga * 1000, 3),
+            "memoria_proceso_kb": _memoria_proceso(),
+            "operaciones": operaciones,
+        }
+    finally:
+        os.chdir(RAIZ)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+def _memoria_proceso():
+    """Pico de memoria residente del proceso en KB (None si el sistema no lo informa)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico  # macOS lo informa en bytes
+
+def correr_caso(modo, cantidad, semilla, repeticiones):
+    """Corre medir_caso en un proceso aparte y devuelve su resultado."""
+    proceso = subprocess.run(
+        [sys.executable, "-m", "benchmarks.ejecutar", "--caso", modo, str(cantidad),
+         "--semilla", str(semilla), "--repeticiones", str(repeticiones)],
+        cwd=RAIZ, capture_output=True, text=True, encoding="utf-8",
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"Falló la medición {modo}/{cantidad}:\n{proceso.stderr}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+def version_codigo():
+    """Commit actual (con -dirty si hay cambios sin confirmar), o "desconocida" sin git."""
+    try:
+        salida = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+    return salida.stdout.strip()
+
+def comparar(anterior, actual):
+    """Líneas con la variación del p50 de cada operación medida en las dos corridas."""
+    previos = {(r["modo"], r["cantidad"]): r["operaciones"] for r in anterior["resultados"]}
+    lineas = []
+    for resultado in actual["resultados"]:
+        operaciones = previos.get((resultado["modo"], resultado["cantidad"]))
+        if operaciones is None:
+            continue
+        for nombre, medicion in resultado["operaciones"].items():
+            antes = operaciones.get(nombre, {}).get("p50_ms")
+            if not antes:
+                continue
+            cambio = medicion["p50_ms"] / antes - 1
+            marca = "  ⚠ regresión" if cambio > TOLERANCIA else ""
+            lineas.append(
+                f"{resultado['modo']:>7} {resultado['cantidad']:>7} {nombre:<21}"
+                f" {antes:>10.3f} → {medicion['p50_ms']:>10.3f} ms ({cambio:+.0%}){marca}"
+            )
+    return lineas
+
+def mostrar(resultado):
+    print(f"\n{resultado['modo']} · {resultado['cantidad']} turnos "
+          f"(primera carga {resultado['primera_carga_ms']:.1f} ms, memoria del proceso {resultado['memoria_proceso_kb']} KB)")
+    print(f"  {'operación':<21} {'p50':>9} {'p90':>9} {'p99':>9} {'máx':>9}  {'pico KB':>9}")
+    for nombre, m in resultado["operaciones"].items():
+        print(f"  {nombre:<21} {m['p50_ms']:>9.3f} {m['p90_ms']:>9.3f} {m['p99_ms']:>9.3f} {m['max_ms']:>9.3f}  "
+              f"{m['memoria_pico_kb']:>9.1f}")
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mediciones de rendimiento del sistema de turnos.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS)
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=MODOS)
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida")
+    parser.add_argument("--comparar")
+    parser.add_argument("--caso", nargs=2, metavar=("MODO", "CANTIDAD"), help=argparse.SUPPRESS)
+    opciones = parser.parse_args(argumentos)
+
+    if opciones.caso:
+        modo, cantidad = opciones.caso
+        print(json.dumps(medir_caso(modo, int(cantidad), opciones.semilla, opciones.repeticiones)))
+        return
+
+    version = version_codigo()
+    corrida = {
+        "version": version,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semilla": opciones.semilla,
+        "repeticiones": opciones.repeticiones,
+        "resultados": [],
+    }
+    for modo in opciones.modos:
+        for cantidad in opciones.tamanos:
+            resultado = correr_caso(modo, cantidad, opciones.semilla, opciones.repeticiones)
+            corrida["resultados"].append(resultado)
+            mostrar(resultado)
+
+    salida = opciones.salida or os.path.join(
+        DIRECTORIO_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{version}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(corrida, f, ensure_ascii=False, indent=4)
+    print(f"\nResultados guardados en {salida}.")
+
+    if opciones.comparar:
+        with open(opciones.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        print(f"\nComparación con {anterior.get('version')} ({anterior.get('fecha')}), p50:")
+        for linea in comparar(anterior, corrida) or ["Sin casos en común."]:
+            print(linea)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import shutil
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+
+from horarios import obtener_calendario
+from servicios import CATEGORIAS
+from validaciones import DIAS_LIMITE, HORARIOS_VALIDOS, MAX_TURNOS_POR_FRANJA
+
+NOMBRES = (
+    "Ana", "Belen", "Carla", "Daniela", "Elena", "Florencia", "Gabriela", "Julieta", "Laura", "Lucia",
+    "Macarena", "Marina", "Micaela", "Natalia", "Paula", "Rocio", "Sofia", "Valeria", "Victoria", "Camila",
+    "Agustina", "Martina", "Milagros", "Romina", "Lorena", "Silvia", "Patricia", "Mariano", "Pablo", "Diego",
+)
+APELLIDOS = (
+    "Gonzalez", "Rodriguez", "Gomez", "Fernandez", "Lopez", "Diaz", "Martinez", "Perez", "Garcia", "Sanchez",
+    "Romero", "Sosa", "Alvarez", "Torres", "Ruiz", "Ramirez", "Flores", "Acosta", "Benitez", "Medina",
+    "Herrera", "Suarez", "Aguirre", "Gimenez", "Gutierrez", "Pereyra", "Rojas", "Molina", "Castro", "Ortiz",
+)
+# Proporción de turnos de cada categoría y peso de cada día de la semana (lunes = 0).
+PESOS_CATEGORIAS = {"Cabello": 4, "Uñas": 3, "Facial": 1.5, "Depilación": 1.5}
+PESOS_DIAS = (0.7, 0.8, 0.9, 1.0, 1.2, 1.4, 0)
+OCUPACION_MEDIA = 0.55  # Fracción de los lugares de un día que se ocupan en promedio
+PROPORCION_FUTUROS = 0.1  # Turnos ya agendados hacia adelante (dentro de DIAS_LIMITE)
+TURNOS_POR_CLIENTE = 6
+ZIPF_EXPONENTE = 1.1
+ZIPF_CORRIMIENTO = 0.01  # Como fracción de los clientes: evita que unos pocos se lleven casi todos los turnos
+
+
+def peso_hora(hora):
+    """Los horarios del mediodía y de la tarde temprana se piden más que los extremos."""
+    h, m = map(int, hora.split(":"))
+    return 1.5 if 12 * 60 <= h * 60 + m <= 16 * 60 else 1.0
+
+def nombres_clientes(cantidad):
+    """`cantidad` nombres distintos (sólo letras y espacios, como pide la validación)."""
+    nombres = []
+    for segundo_apellido in ("",) + APELLIDOS:
+        for segundo_nombre in ("",) + NOMBRES:
+            for apellido in APELLIDOS:
+                for nombre in NOMBRES:
+                    if apellido == segundo_apellido or nombre == segundo_nombre:
+                        continue
+                    nombres.append(" ".join(filter(None, (nombre, segundo_nombre, apellido, segundo_apellido))))
+                    if len(nombres) == cantidad:
+                        return nombres
+    return nombres
+
+
+class Generador:
+    """
+    Datos sintéticos y reproducibles de un centro de estética.
+
+    Con la misma semilla y el mismo `hoy` se obtienen siempre los mismos
+    turnos: sólo en días reservables del calendario (sin domingos ni
+    feriados), en HORARIOS_VALIDOS, sin pasar MAX_TURNOS_POR_FRANJA por
+    categoría y franja, con más demanda los fines de semana y a media tarde,
+    y con clientes repartidos según una ley de Zipf-Mandelbrot (clientes
+    frecuentes y muchos ocasionales). Los turnos pasados se extienden hacia
+    atrás tantos días como haga falta para la cantidad pedida.
+    """
+
+    def __init__(self, semilla=0, hoy=None, calendario=None):
+        self.semilla = semilla
+        self.hoy = hoy or date.today()
+        self.calendario = calendario or obtener_calendario()
+        self.rng = random.Random(semilla)
+        self.ocupadas = {}  # (categoria, fecha, hora) -> turnos
+
+    def turnos(self, cantidad):
+        """Lista de `cantidad` turnos con ID, ordenados por fecha y hora."""
+        self.clientes = nombres_clientes(max(20, cantidad // TURNOS_POR_CLIENTE))
+        corrimiento = 1 + len(self.clientes) * ZIPF_CORRIMIENTO
+        self._pesos_clientes = list(accumulate(
+            1 / (i + corrimiento) ** ZIPF_EXPONENTE for i in range(len(self.clientes))
+        ))
+        futuros = self._llenar(self._dias(1, DIAS_LIMITE - 1), int(cantidad * PROPORCION_FUTUROS), lejanos=True)
+        pasados = self._llenar(self._dias(-1, None, paso=-1), cantidad - len(futuros))
+        turnos = sorted(pasados + futuros, key=lambda t: (t["fecha"], HORARIOS_VALIDOS.index(t["hora"]), t["categoria"]))
+        for numero, turno in enumerate(turnos, 1):
+            turno["id"] = numero
+        return turnos
+
+    def _dias(self, desde, hasta, paso=1):
+        """Días reservables a `desde`, `desde + paso`, ... días de hoy (hasta `hasta` o sin fin)."""
+        desplazamiento = desde
+        while hasta is None or desplazamiento <= hasta:
+            dia = self.hoy + timedelta(days=desplazamiento)
+            if self.calendario.es_reservable(dia):
+                yield dia
+            desplazamiento += paso
+
+    def _llenar(self, dias, cantidad, lejanos=False):
+        turnos = []
+        lugares = len(CATEGORIAS) * len(HORARIOS_VALIDOS) * MAX_TURNOS_POR_FRANJA
+        for posicion, dia in enumerate(dias):
+            if len(turnos) >= cantidad:
+                break
+            demanda = OCUPACION_MEDIA * PESOS_DIAS[dia.weekday()] * self.rng.uniform(0.7, 1.3)
+            if lejanos:
+                demanda *= max(0.1, 1 - posicion / 60)  # Cuanto más lejos, menos reservas hechas
+            turnos.extend(self._dia(dia, min(lugares, round(lugares * demanda), cantidad - len(turnos))))
+        return turnos
+
+    def _dia(self, dia, cantidad):
+        """`cantidad` turnos del día en lugares elegidos según los pesos (sin reemplazo)."""
+        lugares = [
+            (categoria, hora)
+            for categoria in CATEGORIAS for hora in HORARIOS_VALIDOS for _ in range(MAX_TURNOS_POR_FRANJA)
+        ]
+        # Muestreo ponderado sin reemplazo: clave aleatoria ** (1 / peso) y se toman las mayores.
+        claves = [
+            self.rng.random() ** (1 / (PESOS_CATEGORIAS.get(categoria, 1) * peso_hora(hora)))
+            for categoria, hora in lugares
+        ]
+        elegidos = sorted(range(len(lugares)), key=claves.__getitem__, reverse=True)[:cantidad]
+        fecha = dia.isoformat()
+        turnos = []
+        for posicion in elegidos:
+            categoria, hora = lugares[posicion]
+            anticipacion = timedelta(days=self.rng.randint(0, 30), seconds=self.rng.randint(0, 86399),
+                                     microseconds=self.rng.randint(0, 999999))
+            pedido = min(datetime.combine(dia, time(9)) - anticipacion, datetime.combine(self.hoy, time(8)))
+            turnos.append({
+                "nombre": self.rng.choices(self.clientes, cum_weights=self._pesos_clientes)[0],
+                "categoria": categoria,
+                "servicio": self.rng.choice(CATEGORIAS[categoria]),
+                "fecha": fecha,
+                "hora": hora,
+                "modificado": pedido.isoformat(timespec="microseconds"),
+                "version": 1,
+            })
+            clave = (categoria, fecha, hora)
+            self.ocupadas[clave] = self.ocupadas.get(clave, 0) + 1
+        return turnos
+
+    def lugares_libres(self, desde=1):
+        """Franjas (categoria, fecha, hora) futuras con lugar, en orden aleatorio reproducible."""
+        libres = [
+            (categoria, dia.isoformat(), hora)
+            for dia in self._dias(desde, DIAS_LIMITE - 1)
+            for categoria in CATEGORIAS for hora in HORARIOS_VALIDOS
+            if self.ocupadas.get((categoria, dia.isoformat(), hora), 0) < MAX_TURNOS_POR_FRANJA
+        ]
+        random.Random(self.semilla + 1).shuffle(libres)
+        return libres
+
+
+def generar_turnos(cantidad, semilla=0, hoy=None):
+    """Atajo: los turnos del Generador con esa semilla."""
+    return Generador(semilla, hoy).turnos(cantidad)
+
+def escribir_datos(directorio, turnos, modo="json", feriados="feriados.json"):
+    """Deja en `directorio` un clientes.json (o turnos.db, en modo sqlite) y los feriados, listos para usar."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta_json = os.path.join(directorio, "clientes.json")
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        json.dump(turnos, f, ensure_ascii=False, indent=4)
+    if os.path.exists(feriados) and not os.path.exists(os.path.join(directorio, "feriados.json")):
+        shutil.copy(feriados, os.path.join(directorio, "feriados.json"))
+    if modo == "sqlite":
+        from repositorio_sqlite import migrar_desde_json
+        migrar_desde_json(ruta_json, os.path.join(directorio, "turnos.db"))
@@ -0,0 +1,87 @@
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ESPERA_MAXIMA = 10  # Segundos que se espera a que otro proceso suelte el bloqueo
+
+_cerrojos = {}  # ruta -> threading.RLock de este proceso
+_profundidad = {}  # ruta -> veces que el hilo dueño tomó el bloqueo
+_cerrojo_global = threading.Lock()
+
+
+class ArchivoOcupado(Exception):
+    """Otro proceso tuvo tomado el bloqueo más tiempo del que se está dispuesto a esperar."""
+
+
+def ruta_bloqueo(ruta):
+    """Archivo auxiliar sobre el que se toma el bloqueo (nunca se borra)."""
+    return ruta + ".lock"
+
+def _cerrojo(ruta):
+    with _cerrojo_global:
+        if ruta not in _cerrojos:
+            _cerrojos[ruta] = threading.RLock()
+        return _cerrojos[ruta]
+
+def _intentar(archivo):
+    """Intenta tomar el bloqueo exclusivo del sistema operativo sin esperar."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _soltar(archivo):
+    if fcntl is not None:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+    else:
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def bloqueo(ruta, espera=ESPERA_MAXIMA):
+    """
+    Bloqueo exclusivo sobre `ruta` entre procesos (y entre hilos del mismo proceso).
+
+    Es reentrante para el hilo que ya lo tiene. Si otro proceso lo retiene,
+    se reintenta con pausas crecientes hasta `espera` segundos y después se
+    lanza ArchivoOcupado.
+    """
+    cerrojo = _cerrojo(ruta)
+    if not cerrojo.acquire(timeout=espera):
+        raise ArchivoOcupado(f"{ruta} está siendo usado por otra operación.")
+    try:
+        if _profundidad.get(ruta):
+            _profundidad[ruta] += 1
+            try:
+                yield
+            finally:
+                _profundidad[ruta] -= 1
+            return
+
+        with open(ruta_bloqueo(ruta), "a+b") as archivo:
+            limite = time.monotonic() + espera
+            pausa = 0.005
+            while not _intentar(archivo):
+                if time.monotonic() >= limite:
+                    raise ArchivoOcupado(f"{ruta} está siendo usado por otro puesto; intente de nuevo.")
+                time.sleep(pausa)
+                pausa = min(pausa * 2, 0.1)
+            _profundidad[ruta] = 1
+            try:
+                yield
+            finally:
+                _profundidad[ruta] = 0
+                _soltar(archivo)
+    finally:
+        cerrojo.release()
@@ -0,0 +1,142 @@
+import heapq
+import unicodedata
+from collections import Counter
+
+SIMILITUD_MINIMA = 0.5  # Fracción de trigramas en común para sugerir nombres parecidos
+
+
+def plegar(texto):
+    """Pasa a minúsculas, quita tildes y colapsa espacios ("  Pérez " -> "perez")."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_marcas = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_marcas.lower().split())
+
+def trigramas(texto, con_bordes=True):
+    """Conjunto de trigramas del texto; con bordes se agregan espacios para marcar inicio y fin."""
+    if con_bordes:
+        texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def bigramas(texto):
+    """Conjunto de pares de letras del texto (para consultas de dos letras)."""
+    return {texto[i:i + 2] for i in range(len(texto) - 1)}
+
+
+class IndiceNombres:
+    """
+    Índice invertido de trigramas sobre los nombres de los clientes.
+
+    Se indexan los nombres distintos (ya plegados), no cada turno: cada
+    nombre guarda los IDs de sus turnos y cada trigrama (y cada bigrama,
+    para consultas cortas) los nombres que lo contienen.
+    """
+
+    def __init__(self, clientes=()):
+        self.ids_por_nombre = {}
+        self.nombres_por_trigrama = {}
+        for turno in clientes:
+            self.agregar(turno)
+
+    def a_estado(self):
+        return (self.ids_por_nombre, self.nombres_por_trigrama)
+
+    @classmethod
+    def desde_estado(cls, estado):
+        indice = cls()
+        indice.ids_por_nombre, indice.nombres_por_trigrama = estado
+        return indice
+
+    def agregar(self, turno):
+        """Indexa el nombre de un turno."""
+        nombre = plegar(turno.get("nombre"))
+        ids = self.ids_por_nombre.get(nombre)
+        if ids is None:
+            ids = self.ids_por_nombre[nombre] = set()
+            for grama in trigramas(nombre) | bigramas(nombre):
+                self.nombres_por_trigrama.setdefault(grama, set()).add(nombre)
+        ids.add(turno.get("id"))
+
+    def quitar(self, turno):
+        """Quita un turno del índice (y su nombre si no le quedan turnos)."""
+        nombre = plegar(turno.get("nombre"))
+        ids = self.ids_por_nombre.get(nombre)
+        if ids is None:
+            return
+        ids.discard(turno.get("id"))
+        if not ids:
+            del self.ids_por_nombre[nombre]
+            for grama in trigramas(nombre) | bigramas(nombre):
+                nombres = self.nombres_por_trigrama.get(grama)
+                if nombres is not None:
+                    nombres.discard(nombre)
+                    if not nombres:
+                        del self.nombres_por_trigrama[grama]
+
+    def _contienen(self, consulta):
+        """Nombres que contienen la consulta."""
+        if len(consulta) == 1:
+            return [n for n in self.ids_por_nombre if consulta in n]
+        if len(consulta) == 2:
+            return list(self.nombres_por_trigrama.get(consulta, ()))
+        listas = sorted(
+            (self.nombres_por_trigrama.get(t, set()) for t in trigramas(consulta, con_bordes=False)),
+            key=len
+        )
+        if not listas[0]:
+            return []
+        return [n for n in set.intersection(*listas) if consulta in n]
+
+    def _parecidos(self, consulta):
+        """Nombres con suficientes trigramas en común, con su similitud."""
+        buscados = trigramas(consulta)
+        coincidencias = Counter()
+        for trigrama in buscados:
+            for nombre in self.nombres_por_trigrama.get(trigrama, ()):
+                coincidencias[nombre] += 1
+        return {
+            n: c / len(buscados) for n, c in coincidencias.items()
+            if c / len(buscados) >= SIMILITUD_MINIMA
+        }
+
+    def buscar(self, texto, limite=None):
+        """
+        IDs de turnos cuyo nombre coincide con el texto, ordenados por relevancia.
+
+        Primero los nombres iguales, luego los que empiezan con el texto, luego
+        los que tienen una palabra que empieza con él y luego el resto que lo
+        contiene. Si ninguno lo contiene se devuelven los nombres parecidos
+        (errores de tipeo), del más al menos similar.
+        """
+        consulta = plegar(texto)
+        if not consulta:
+            return []
+        exactos = self._contienen(consulta)
+        parecidos = {} if exactos else self._parecidos(consulta)
+
+        def rango(nombre):
+            if nombre == consulta:
+                return 0
+            if nombre.startswith(consulta):
+                return 1
+            if f" {consulta}" in f" {nombre}":
+                return 2
+            return 3
+
+        def clave(nombre):
+            if nombre in parecidos:
+                return (4, -parecidos[nombre], len(nombre), nombre)
+            return (rango(nombre), 0, len(nombre), nombre)
+
+        candidatos = exactos or list(parecidos)
+        if limite is not None:
+            # Cada nombre aporta al menos un turno: alcanza con los `limite` mejores.
+            ordenados = heapq.nsmallest(limite, candidatos, key=clave)
+        else:
+            ordenados = sorted(candidatos, key=clave)
+
+        resultado = []
+        for nombre in ordenados:
+            resultado.extend(sorted(self.ids_por_nombre[nombre], key=lambda i: (i is None, i or 0)))
+            if limite is not None and len(resultado) >= limite:
+                return resultado[:limite]
+        return resultado
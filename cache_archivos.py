@@ -0,0 +1,42 @@
+import os
+
+_entradas = {}
+
+
+def firma(rutas):
+    """Firma barata de los archivos: (mtime, tamaño, inodo) de cada uno, o None si no existe."""
+    resultado = []
+    for ruta in rutas:
+        try:
+            st = os.stat(ruta)
+            resultado.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except FileNotFoundError:
+            resultado.append(None)
+    return tuple(resultado)
+
+def cargar_cacheado(rutas, cargar):
+    """
+    Devuelve el resultado de `cargar()` guardado en memoria mientras los archivos no cambien.
+
+    Sólo se hace un `stat` por archivo; si otro proceso los modificó (cambia
+    mtime, tamaño o inodo) se vuelve a llamar a `cargar()`.
+    """
+    rutas = tuple(rutas)
+    actual = firma(rutas)
+    entrada = _entradas.get(rutas)
+    if entrada is not None and entrada[0] == actual:
+        return entrada[1]
+    datos = cargar()
+    # Se guarda la firma previa a la lectura: si el archivo cambió mientras se
+    # leía, la próxima consulta no coincide y se vuelve a cargar.
+    _entradas[rutas] = (actual, datos)
+    return datos
+
+def recordar(rutas, datos):
+    """Registra `datos` como contenido vigente después de que este proceso escribió los archivos."""
+    rutas = tuple(rutas)
+    _entradas[rutas] = (firma(rutas), datos)
+
+def olvidar(rutas):
+    """Descarta lo guardado para esos archivos; la próxima consulta los vuelve a leer."""
+    _entradas.pop(tuple(rutas), None)
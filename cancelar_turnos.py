@@ -1,74 +1,266 @@
-import tkinter as tk
-from tkinter import messagebox
-import json
-import os
-
-RUTA_CLIENTES = "clientes.json"
-
-def cargar_turnos():
-    if not os.path.exists(RUTA_CLIENTES):
-        return []
-    with open(RUTA_CLIENTES, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except Exception:
-            return []
-
-def guardar_turnos(turnos):
-    with open(RUTA_CLIENTES, "w", encoding="utf-8") as f:
-        json.dump(turnos, f, ensure_ascii=False, indent=2)
-
-def ventana_cancelar_turno():
-    turnos = cargar_turnos()
-    if not turnos:
-        messagebox.showinfo("Sin turnos", "No hay turnos para cancelar.")
-        return
-
-    ventana = tk.Toplevel()
-    ventana.title("Selecciona turno a cancelar")
-
-    lista = tk.Listbox(ventana, width=60)
-    lista.pack(padx=10, pady=10)
-
-    for turno in turnos:
-        # Si es diccionario
-        if isinstance(turno, dict):
-            cliente = turno.get('cliente', '') or turno.get('nombre', '')
-            fecha = turno.get('fecha', '')
-            hora = turno.get('hora', '')
-            servicio = turno.get('servicio', '')
-        elif isinstance(turno, (tuple, list)):
-            cliente = turno[0] if len(turno) > 0 else ''
-            fecha = turno[1] if len(turno) > 1 else ''
-            hora = turno[2] if len(turno) > 2 else ''
-            servicio = turno[3] if len(turno) > 3 else ''
-        else:
-            cliente = fecha = hora = servicio = ''
-        texto = f"{fecha} {hora} - {cliente} ({servicio})"
-        lista.insert(tk.END, texto)
-
-    def cancelar_turno():
-        seleccion = lista.curselection()
-        if seleccion:
-            idx = seleccion[0]
-            turno = turnos[idx]
-            respuesta = messagebox.askyesno(
-                "Confirmar",
-                f"¿Cancelar turno?"
-            )
-            if respuesta:
-                del turnos[idx]
-                guardar_turnos(turnos)
-                lista.delete(idx)
-                messagebox.showinfo("Cancelado", "Turno cancelado.")
-        else:
-            messagebox.showwarning("Atención", "Selecciona un turno para cancelar.")
-
-    btn_cancelar = tk.Button(ventana, text="Cancelar turno seleccionado", command=cancelar_turno)
-    btn_cancelar.pack(pady=5)
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()  # Oculta la ventana principal
-    ventana_cancelar_turno()
-    root.mainloop()
\ No newline at end of file
+import tkinter as tk
+from datetime import date
+from tkinter import messagebox
+from agregar_turno import (
+    ARCHIVO_CLIENTES, cargar_clientes, guardar_clientes, quitar_turno,
+    listar_ids_turnos, obtener_estadisticas, obtener_turnos,
+)
+import metricas
+from repositorio import version_de
+from segundo_plano import TrabajosEnSegundoPlano
+from servicios import CATEGORIAS
+from validaciones import validar_formato_fecha
+
+RUTA_CLIENTES = ARCHIVO_CLIENTES
+FILAS_VISIBLES = 15
+TODAS = "Todas"
+CAMBIO_TURNOS = "<<TurnosCambiados>>"  # Generado sobre la ventana, vuelve a consultar la lista
+
+def cargar_turnos():
+    try:
+        return cargar_clientes()
+    except Exception:
+        return []
+
+def guardar_turnos(turnos):
+    guardar_clientes(turnos)
+
+def texto_turno(turno):
+    texto = f"{turno.get('fecha', '')} {turno.get('hora', '')} - {turno.get('nombre', '')} ({turno.get('servicio', '')})"
+    return f"{texto} [serie {turno['serie']}]" if turno.get("serie") else texto
+
+
+class ListaVirtual:
+    """
+    Lista de turnos que sólo arma las filas visibles.
+
+    Guarda los IDs de la consulta (ya ordenados por el repositorio) y en cada
+    desplazamiento pide y formatea únicamente los turnos que entran en la
+    ventana. Los turnos se piden con `trabajos` (en otro hilo) y la página se
+    dibuja al llegar, salvo que ya se haya pedido otra. La barra de
+    desplazamiento se maneja a mano según la posición dentro de los IDs.
+    Cada fila queda asociada al ID y la versión de su turno, no a su
+    posición en la lista.
+    """
+
+    def __init__(self, padre, trabajos, filas=FILAS_VISIBLES, ancho=60):
+        self.trabajos = trabajos
+        self.filas = filas
+        self.ids = []
+        self.inicio = 0
+        self.pedido = 0  # Número de la última página pedida: las respuestas viejas se descartan
+        self.visibles = []  # (ID, versión) de cada fila mostrada
+        self.seleccionado = None  # (ID, versión) de la fila elegida, aunque ya no esté a la vista
+
+        self.marco = tk.Frame(padre)
+        contenedor = tk.Frame(self.marco)
+        contenedor.pack(fill=tk.BOTH, expand=True)
+        self.lista = tk.Listbox(contenedor, width=ancho, height=filas, exportselection=False)
+        self.barra = tk.Scrollbar(contenedor, orient=tk.VERTICAL, command=self._desplazar)
+        self.lista.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.estado = tk.Label(self.marco, anchor="w")
+        self.estado.pack(fill=tk.X)
+
+        self.lista.bind("<<ListboxSelect>>", self._al_seleccionar)
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.lista.bind(evento, self._rueda)
+        self.lista.bind("<Prior>", lambda evento: self._saltar(-1))
+        self.lista.bind("<Next>", lambda evento: self._saltar(1))
+
+    def mostrar(self, ids, conservar_posicion=False):
+        """Reemplaza los IDs de la lista y dibuja la primera página (o la misma, si se pide)."""
+        self.ids = ids
+        if self.seleccionado and self.seleccionado[0] not in ids:
+            self.seleccionado = None  # Se canceló o ya no pasa los filtros
+        if not conservar_posicion:
+            self.inicio = 0
+        self.ir_a(self.inicio, forzar=True)
+
+    def ir_a(self, inicio, forzar=False):
+        inicio = max(0, min(inicio, len(self.ids) - self.filas))
+        if inicio != self.inicio or forzar:
+            self.inicio = inicio
+            self._pedir_pagina()
+
+    def pagina_anterior(self):
+        self.ir_a(self.inicio - self.filas)
+
+    def pagina_siguiente(self):
+        self.ir_a(self.inicio + self.filas)
+
+    def seleccion(self):
+        """(ID, versión) del turno elegido, o None."""
+        return self.seleccionado
+
+    def _pedir_pagina(self):
+        self.pedido += 1
+        pedido = self.pedido
+        self.trabajos.ejecutar(
+            obtener_turnos, self.ids[self.inicio:self.inicio + self.filas],
+            al_terminar=lambda turnos: self._dibujar(pedido, turnos),
+        )
+
+    def _dibujar(self, pedido, turnos):
+        if pedido != self.pedido or not self.lista.winfo_exists():
+            return  # Ya se pidió otra página, o se cerró la ventana
+        with metricas.tramo("render"):
+            self._dibujar_filas(turnos)
+
+    def _dibujar_filas(self, turnos):
+        self.visibles = [(t.get("id"), version_de(t)) for t in turnos]
+        self.lista.delete(0, tk.END)
+        for posicion, turno in enumerate(turnos):
+            self.lista.insert(tk.END, texto_turno(turno))
+            if self.seleccionado and self.seleccionado[0] == turno.get("id"):
+                self.lista.selection_set(posicion)
+
+        total = len(self.ids)
+        if total:
+            self.barra.set(self.inicio / total, min(1.0, (self.inicio + self.filas) / total))
+            self.estado.config(text=f"Turnos {self.inicio + 1}–{self.inicio + len(turnos)} de {total}")
+        else:
+            self.barra.set(0.0, 1.0)
+            self.estado.config(text="No hay turnos que coincidan con los filtros.")
+
+    def _al_seleccionar(self, evento):
+        seleccion = self.lista.curselection()
+        if seleccion:
+            self.seleccionado = self.visibles[seleccion[0]]
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.ir_a(int(float(cantidad) * len(self.ids)))
+        elif accion == "scroll":
+            paso = self.filas if unidad == "pages" else 1
+            self.ir_a(self.inicio + int(cantidad) * paso)
+
+    def _rueda(self, evento):
+        arriba = evento.num == 4 or evento.delta > 0
+        self.ir_a(self.inicio + (-3 if arriba else 3))
+        return "break"
+
+    def _saltar(self, sentido):
+        self.ir_a(self.inicio + sentido * self.filas)
+        return "break"
+
+
+def ventana_cancelar_turno(padre, trabajos, al_cancelar=None):
+    """
+    Abre la ventana de cancelación y la devuelve.
+
+    Las consultas y la cancelación corren con `trabajos` (los de la ventana
+    principal), así que usan el mismo repositorio sin trabar la GUI. La
+    ventana aparece cuando se confirma que hay turnos; si no hay, se avisa y
+    se cierra. `al_cancelar(id_turno)` se llama después de cada cancelación.
+    """
+    ventana = tk.Toplevel(padre)
+    ventana.withdraw()
+    ventana.title("Selecciona turno a cancelar")
+
+    # Por defecto se ven los turnos de hoy en adelante; borrando "Desde" se ven todos.
+    filtros = tk.Frame(ventana)
+    filtros.pack(padx=10, pady=(10, 0), fill=tk.X)
+    tk.Label(filtros, text="Desde:").grid(row=0, column=0, sticky="w")
+    entry_desde = tk.Entry(filtros, width=11)
+    entry_desde.insert(0, date.today().isoformat())
+    entry_desde.grid(row=0, column=1, padx=(0, 8))
+    tk.Label(filtros, text="Hasta:").grid(row=0, column=2, sticky="w")
+    entry_hasta = tk.Entry(filtros, width=11)
+    entry_hasta.grid(row=0, column=3, padx=(0, 8))
+    tk.Label(filtros, text="Categoría:").grid(row=1, column=0, sticky="w")
+    categoria_var = tk.StringVar(value=TODAS)
+    tk.OptionMenu(filtros, categoria_var, TODAS, *CATEGORIAS).grid(row=1, column=1, sticky="we", padx=(0, 8))
+    tk.Label(filtros, text="Nombre:").grid(row=1, column=2, sticky="w")
+    entry_nombre = tk.Entry(filtros, width=18)
+    entry_nombre.grid(row=1, column=3, padx=(0, 8))
+
+    lista = ListaVirtual(ventana, trabajos)
+    consultas = 0  # Número de la última consulta: si se filtra de nuevo antes de que llegue, se descarta
+
+    def filtrar(conservar_posicion=False):
+        nonlocal consultas
+        desde = entry_desde.get().strip() or None
+        hasta = entry_hasta.get().strip() or None
+        if any(f and not validar_formato_fecha(f) for f in (desde, hasta)):
+            messagebox.showwarning("Atención", "Las fechas deben tener el formato YYYY-MM-DD.", parent=ventana)
+            return
+        categoria = categoria_var.get()
+        consultas += 1
+        consulta = consultas
+
+        def mostrar(ids):
+            if consulta == consultas and ventana.winfo_exists():
+                lista.mostrar(ids, conservar_posicion)
+
+        trabajos.ejecutar(
+            listar_ids_turnos,
+            desde, hasta, None if categoria == TODAS else categoria, entry_nombre.get().strip() or None,
+            al_terminar=mostrar,
+        )
+
+    tk.Button(filtros, text="Filtrar", command=filtrar).grid(row=0, column=4, rowspan=2)
+    for entrada in (entry_desde, entry_hasta, entry_nombre):
+        entrada.bind("<Return>", lambda evento: filtrar())
+
+    lista.marco.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    ventana.bind(CAMBIO_TURNOS, lambda evento: filtrar(conservar_posicion=True))
+
+    def abrir(total):
+        if not ventana.winfo_exists():
+            return
+        if not total:
+            messagebox.showinfo("Sin turnos", "No hay turnos para cancelar.", parent=padre)
+            ventana.destroy()
+            return
+        ventana.deiconify()
+        filtrar()
+
+    trabajos.ejecutar(lambda: obtener_estadisticas(top=0)["total_turnos"], al_terminar=abrir)
+
+    def cancelar_turno():
+        seleccion = lista.seleccion()
+        if seleccion:
+            id_turno, version = seleccion
+            respuesta = messagebox.askyesno(
+                "Confirmar",
+                f"¿Cancelar turno?",
+                parent=ventana,
+            )
+            if respuesta:
+                def mostrar(resultado):
+                    turno, error = resultado
+                    if ventana.winfo_exists():
+                        filtrar(conservar_posicion=True)  # Se relee: muestra también lo que cambiaron otros puestos
+                    dueña = ventana if ventana.winfo_exists() else padre
+                    if error:
+                        messagebox.showwarning("No se canceló", error.mensaje, parent=dueña)
+                        return
+                    if al_cancelar is not None:
+                        al_cancelar(id_turno)
+                    messagebox.showinfo(
+                        "Cancelado", f"Turno de {turno.get('nombre')} (ID: {id_turno}) cancelado.", parent=dueña
+                    )
+
+                # Sólo se cancela si nadie cambió el turno desde que se listó.
+                trabajos.ejecutar(quitar_turno, id_turno, version, al_terminar=mostrar, deshabilitar=[boton_cancelar])
+        else:
+            messagebox.showwarning("Atención", "Selecciona un turno para cancelar.", parent=ventana)
+
+    botones = tk.Frame(ventana)
+    botones.pack(pady=5)
+    tk.Button(botones, text="◀ Anterior", command=lista.pagina_anterior).pack(side=tk.LEFT, padx=3)
+    boton_cancelar = tk.Button(botones, text="Cancelar turno seleccionado", command=cancelar_turno)
+    boton_cancelar.pack(side=tk.LEFT, padx=3)
+    tk.Button(botones, text="Siguiente ▶", command=lista.pagina_siguiente).pack(side=tk.LEFT, padx=3)
+    return ventana
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.withdraw()  # Oculta la ventana principal
+    trabajos = TrabajosEnSegundoPlano(root)
+    ventana = ventana_cancelar_turno(root, trabajos)
+    # Cerrarla (o que se cierre sola porque no hay turnos) termina el programa.
+    ventana.bind("<Destroy>", lambda evento: root.destroy() if evento.widget is ventana else None)
+    root.mainloop()
+    trabajos.cerrar()
@@ -0,0 +1,136 @@
+import json
+import os
+import socket
+
+from series_turnos import ResultadoSerie
+from validaciones import ErrorValidacion
+
+# Dirección del servicio de turnos (servidor_turnos.py): "host:puerto" o
+# "unix:/ruta/al/socket". Si no está definida, cada programa trabaja
+# directamente sobre el almacenamiento, como siempre.
+DIRECCION = os.environ.get("TURNOS_SERVIDOR") or None
+ESPERA_RESPUESTA = 30  # Segundos
+
+
+class ServidorNoDisponible(ConnectionError):
+    """No se pudo hablar con el servicio de turnos."""
+
+
+def activo():
+    """True si este programa trabaja en modo cliente (los cambios los hace el servicio)."""
+    return DIRECCION is not None
+
+def interpretar_direccion(direccion):
+    """("unix", ruta) o ("tcp", host, puerto) a partir del texto de la dirección."""
+    if direccion.startswith("unix:"):
+        return ("unix", direccion[len("unix:"):])
+    host, _, puerto = direccion.rpartition(":")
+    return ("tcp", host or "127.0.0.1", int(puerto))
+
+def _conectar(direccion):
+    destino = interpretar_direccion(direccion)
+    if destino[0] == "unix":
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.settimeout(ESPERA_RESPUESTA)
+        conexion.connect(destino[1])
+        return conexion
+    return socket.create_connection(destino[1:], timeout=ESPERA_RESPUESTA)
+
+def pedir(operacion, **datos):
+    """
+    Envía un pedido al servicio y devuelve su respuesta (un diccionario).
+
+    Cada pedido usa su propia conexión (es local y barata): no quedan
+    conexiones viejas si el servicio se reinicia y se puede llamar desde
+    varios hilos. Los pedidos no se reintentan para no agendar dos veces.
+    """
+    pedido = dict(datos, op=operacion)
+    try:
+        with _conectar(DIRECCION) as conexion, conexion.makefile("rwb") as canal:
+            canal.write(json.dumps(pedido, ensure_ascii=False, default=dict).encode("utf-8") + b"\n")
+            canal.flush()
+            linea = canal.readline()
+    except OSError as e:
+        raise ServidorNoDisponible(
+            f"No se pudo comunicar con el servicio de turnos en {DIRECCION} ({e}). "
+            "Verifique que esté iniciado (python servidor_turnos.py)."
+        ) from e
+    if not linea:
+        raise ServidorNoDisponible(f"El servicio de turnos en {DIRECCION} cerró la conexión sin responder.")
+    respuesta = json.loads(linea)
+    if "error_interno" in respuesta:
+        raise RuntimeError(f"Error en el servicio de turnos: {respuesta['error_interno']}")
+    return respuesta
+
+def _error(datos):
+    return ErrorValidacion(*datos) if datos else None
+
+def _errores_por_fecha(pares):
+    return [(fecha, _error(error)) for fecha, error in pares]
+
+
+# --- Las mismas operaciones que agregar_turno, resueltas por el servicio ---
+
+def cargar_clientes():
+    return pedir("listar")["turnos"]
+
+def agendar_turno(turno):
+    respuesta = pedir("agendar", turno=turno)
+    if respuesta["turno"] is not None:
+        turno.update(respuesta["turno"])  # ID, versión y marca de modificación asignados por el servicio
+    return respuesta["id"], _error(respuesta["error"])
+
+def agregar_turnos(turnos, todo_o_nada=False):
+    respuesta = pedir("agregar_lote", turnos=turnos, todo_o_nada=todo_o_nada)
+    for turno, guardado in zip(turnos, respuesta["turnos"]):
+        turno.update(guardado)
+    return respuesta["resultados"]
+
+def mover_turno(id_turno, nueva_fecha, nueva_hora, version=None):
+    respuesta = pedir("mover", id=id_turno, fecha=nueva_fecha, hora=nueva_hora, version=version)
+    return respuesta["turno"], _error(respuesta["error"])
+
+def agendar_serie(turno, cada_semanas=1, hasta=None, repeticiones=None):
+    respuesta = pedir("agendar_serie", turno=turno, cada_semanas=cada_semanas, hasta=hasta, repeticiones=repeticiones)
+    serie, ids, omitidos, errores = respuesta["resultado"]
+    return ResultadoSerie(serie, ids, _errores_por_fecha(omitidos), _errores_por_fecha(errores))
+
+def mover_serie(serie, dias=0, nueva_hora=None):
+    respuesta = pedir("mover_serie", serie=serie, dias=dias, hora=nueva_hora)
+    return respuesta["movidos"], _errores_por_fecha(respuesta["errores"])
+
+def cancelar_serie(serie):
+    return pedir("cancelar_serie", serie=serie)["mensaje"]
+
+def cancelar_turno(nombre):
+    return pedir("cancelar", nombre=nombre)["mensaje"]
+
+def quitar_turno(id_turno, version=None):
+    respuesta = pedir("cancelar", id=id_turno, version=version)
+    return respuesta["turno"], _error(respuesta["error"])
+
+def obtener_turno(id_turno):
+    return pedir("obtener", id=id_turno)["turno"]
+
+def listar_ids_turnos(desde=None, hasta=None, categoria=None, nombre=None):
+    return pedir("ids", desde=desde, hasta=hasta, categoria=categoria, nombre=nombre)["ids"]
+
+def obtener_turnos(ids):
+    return pedir("turnos", ids=list(ids))["turnos"]
+
+def turnos_por_nombre(nombre):
+    return pedir("por_nombre", nombre=nombre)["turnos"]
+
+def iterar_turnos(desde=None, hasta=None, categoria=None, servicio=None, modificado_desde=None):
+    return pedir(
+        "iterar", desde=desde, hasta=hasta, categoria=categoria, servicio=servicio, modificado_desde=modificado_desde
+    )["turnos"]
+
+def ocupacion(desde, hasta):
+    return [(tuple(franja), cantidad) for franja, cantidad in pedir("ocupacion", desde=desde, hasta=hasta)["ocupacion"]]
+
+def buscar_turno(nombre):
+    return pedir("buscar", nombre=nombre)["resultados"]
+
+def obtener_estadisticas(top=5):
+    return pedir("estadisticas", top=top)["estadisticas"]
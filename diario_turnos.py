@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+
+import bloqueo_archivos
+import metricas
+
+UMBRAL_COMPACTACION = 1000  # Registros en el diario antes de compactar
+
+_estado = {"registros": 0, "compactacion": None}
+
+
+def ruta_diario(ruta_base):
+    """Archivo donde se agregan las operaciones (una por línea)."""
+    return ruta_base + ".diario"
+
+def ruta_diario_anterior(ruta_base):
+    """Diario que se está volcando a la instantánea durante una compactación."""
+    return ruta_base + ".diario.anterior"
+
+def escribir_atomico(ruta, datos, indent=4):
+    """Escribe el JSON en un archivo temporal y lo reemplaza con un rename atómico."""
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        # default=dict: los turnos en memoria son filas del almacén por columnas.
+        json.dump(datos, f, ensure_ascii=False, indent=indent, default=dict)
+        f.flush()
+        os.fsync(f.fileno())
+        metricas.sumar("bytes_escritos", f.tell(), archivo=os.path.basename(ruta))
+    os.replace(temporal, ruta)
+
+def asignar_ids_faltantes(clientes):
+    """Asigna IDs a los turnos sin ID (o con ID repetido), en orden y de forma determinística."""
+    siguiente = max((t["id"] for t in clientes if isinstance(t.get("id"), int)), default=0) + 1
+    vistos = set()
+    for turno in clientes:
+        if not isinstance(turno.get("id"), int) or turno["id"] in vistos:
+            turno["id"] = siguiente
+            siguiente += 1
+        vistos.add(turno["id"])
+
+def _aplicar_diario(ruta, aplicar, desde=0):
+    """Pasa a `aplicar` cada operación del diario (desde el byte `desde`) y devuelve cuántas fueron."""
+    if not os.path.exists(ruta):
+        return 0
+    aplicados = 0
+    with open(ruta, "r", encoding="utf-8") as f:
+        f.seek(desde)
+        for linea in f:
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                break  # Última línea cortada por una caída: se descarta
+            # Un lote es una sola línea: se aplica entero o, si quedó cortado, nada.
+            for operacion in registro["registros"] if registro["op"] == "lote" else [registro]:
+                aplicar(operacion)
+                aplicados += 1
+    return aplicados
+
+def _aplicar_en(turnos):
+    """Aplicador de operaciones sobre el diccionario id -> turno."""
+    def aplicar(operacion):
+        if operacion["op"] == "baja":
+            turnos.pop(operacion["id"], None)
+        else:
+            turnos[operacion["turno"]["id"]] = operacion["turno"]
+    return aplicar
+
+def cargar(ruta_base):
+    """
+    Reconstruye los turnos a partir de la instantánea y la cola del diario.
+
+    Las operaciones son idempotentes (alta/cambio reemplazan por ID y baja
+    borra si existe), por lo que volver a aplicar un diario que ya estaba
+    incluido en la instantánea no altera el resultado.
+    """
+    clientes = []
+    if os.path.exists(ruta_base):
+        with open(ruta_base, "r", encoding="utf-8") as f:
+            clientes = json.load(f)
+    asignar_ids_faltantes(clientes)
+
+    turnos = {t["id"]: t for t in clientes}
+    registros = 0
+    for ruta in (ruta_diario_anterior(ruta_base), ruta_diario(ruta_base)):
+        registros += _aplicar_diario(ruta, _aplicar_en(turnos))
+    _estado["registros"] = registros
+    return list(turnos.values())
+
+def aplicar_cola(ruta_base, desde, registros, aplicar):
+    """
+    Aplica con `aplicar(operacion)` lo agregado al diario a partir del byte `desde`.
+
+    Es la carga a partir de una imagen binaria que ya incluía el diario hasta
+    ahí (con `registros` operaciones). Devuelve False, sin aplicar nada, si
+    `desde` no cae al principio de una línea.
+    """
+    if desde:
+        with open(ruta_diario(ruta_base), "rb") as f:
+            f.seek(desde - 1)
+            if f.read(1) != b"\n":
+                return False
+    _estado["registros"] = registros + _aplicar_diario(ruta_diario(ruta_base), aplicar, desde)
+    return True
+
+def registros_pendientes():
+    """Operaciones en el diario desde la última compactación (según lo que vio este proceso)."""
+    return _estado["registros"]
+
+def _registro(operacion, turno):
+    if operacion == "baja":
+        return {"op": "baja", "id": turno["id"]}
+    return {"op": operacion, "turno": dict(turno)}
+
+def registrar(ruta_base, operacion, turno, obtener_clientes):
+    """
+    Agrega una operación ("alta", "cambio" o "baja") al final del diario.
+
+    `obtener_clientes` se llama sólo si hay que compactar, para no armar la
+    lista completa en cada operación.
+    """
+    registrar_lote(ruta_base, [(operacion, turno)], obtener_clientes)
+
+def registrar_lote(ruta_base, cambios, obtener_clientes):
+    """Agrega varias operaciones (operacion, turno) como un único registro atómico."""
+    if len(cambios) == 1:
+        registro = _registro(*cambios[0])
+    else:
+        registro = {"op": "lote", "registros": [_registro(op, t) for op, t in cambios]}
+
+    linea = json.dumps(registro, ensure_ascii=False) + "\n"
+    with open(ruta_diario(ruta_base), "a", encoding="utf-8") as f:
+        f.write(linea)
+        f.flush()
+        os.fsync(f.fileno())
+    metricas.sumar("bytes_escritos", len(linea.encode("utf-8")), archivo=os.path.basename(ruta_diario(ruta_base)))
+
+    _estado["registros"] += len(cambios)
+    if _estado["registros"] >= UMBRAL_COMPACTACION:
+        compactar(ruta_base, obtener_clientes(), en_segundo_plano=True)
+
+def _firma(ruta):
+    try:
+        st = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def compactar(ruta_base, clientes, en_segundo_plano=False):
+    """
+    Escribe una nueva instantánea con todos los turnos y descarta el diario.
+
+    Se llama con el bloqueo de `ruta_base` tomado (desde la transacción del
+    repositorio). En segundo plano se rota el diario actual a
+    `.diario.anterior` (las nuevas operaciones van a un diario vacío) y un
+    hilo vuelca la copia de los turnos cuando puede tomar el bloqueo.
+    """
+    hilo = _estado["compactacion"]
+    if en_segundo_plano and hilo is not None and hilo.is_alive():
+        return
+
+    copia = [dict(t) for t in clientes]
+    anterior = ruta_diario_anterior(ruta_base)
+    actual = ruta_diario(ruta_base)
+
+    if not en_segundo_plano or os.path.exists(anterior):
+        # Un volcado pendiente (de este u otro proceso) queda obsoleto: al
+        # tomar el bloqueo verá que `.diario.anterior` ya no es el que rotó.
+        escribir_atomico(ruta_base, copia)
+        for ruta in (anterior, actual):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        _estado["registros"] = 0
+        return
+
+    if os.path.exists(actual):
+        os.replace(actual, anterior)
+    rotado = _firma(anterior)
+    _estado["registros"] = 0
+
+    def volcar():
+        with bloqueo_archivos.bloqueo(ruta_base):
+            if rotado is None or _firma(anterior) != rotado:
+                return  # Otra compactación ya incluyó ese diario en la instantánea
+            escribir_atomico(ruta_base, copia)
+            os.remove(anterior)
+
+    hilo = threading.Thread(target=volcar, daemon=True)
+    _estado["compactacion"] = hilo
+    hilo.start()
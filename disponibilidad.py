@@ -0,0 +1,138 @@
+from datetime import date, datetime, timedelta
+
+import cliente_turnos
+from horarios import Calendario, obtener_calendario
+from repositorio import obtener_repositorio
+from servicios import CATEGORIAS
+from validaciones import (
+    ANTICIPACION_MINIMA_HORAS, DIAS_LIMITE, HORARIOS_VALIDOS, MAX_TURNOS_POR_FRANJA,
+)
+
+DIAS_HORIZONTE = DIAS_LIMITE
+ANTICIPACION_MINIMA = timedelta(hours=ANTICIPACION_MINIMA_HORAS)
+
+HORARIOS_POR_DIA = len(HORARIOS_VALIDOS)
+POSICION_HORA = {hora: i for i, hora in enumerate(HORARIOS_VALIDOS)}
+
+
+class MatrizDisponibilidad:
+    """
+    Lugares libres por categoría para cada horario válido de cada día del horizonte.
+
+    Cada categoría es un `bytearray` de (días x horarios) con la cantidad de
+    lugares libres; los domingos, feriados y horarios sin la anticipación
+    mínima quedan en 0. Se arma en una pasada sobre la ocupación y después
+    se consulta sin volver a recorrer los turnos.
+    """
+
+    def __init__(self, ocupacion, calendario, ahora=None, categorias=CATEGORIAS):
+        ahora = ahora or datetime.now()
+        self.desde = ahora.date()
+        self.dias = DIAS_HORIZONTE + 1
+        if not isinstance(calendario, Calendario):
+            calendario = Calendario(calendario, desde=self.desde)  # Lista de feriados, como antes
+        limite = ahora + ANTICIPACION_MINIMA
+
+        self.base = bytearray(self.dias * HORARIOS_POR_DIA)
+        for dia in calendario.dias_reservables(self.desde, self.desde + timedelta(days=self.dias - 1)):
+            d = (dia - self.desde).days
+            for s, hora in enumerate(HORARIOS_VALIDOS):
+                if d <= 1 and datetime.combine(dia, datetime.strptime(hora, "%H:%M").time()) < limite:
+                    continue
+                self.base[d * HORARIOS_POR_DIA + s] = MAX_TURNOS_POR_FRANJA
+
+        self.lugares = {categoria: bytearray(self.base) for categoria in categorias}
+        for (categoria, fecha, hora), cantidad in ocupacion:
+            self.ocupar(categoria, fecha, hora, cantidad)
+
+    def _posicion(self, fecha, hora):
+        try:
+            d = (date.fromisoformat(fecha) - self.desde).days
+        except (TypeError, ValueError):
+            return None
+        s = POSICION_HORA.get(hora)
+        if s is None or not 0 <= d < self.dias:
+            return None
+        return d * HORARIOS_POR_DIA + s
+
+    def _fila(self, categoria):
+        if categoria not in self.lugares:
+            self.lugares[categoria] = bytearray(self.base)
+        return self.lugares[categoria]
+
+    def ocupar(self, categoria, fecha, hora, cantidad=1):
+        """Descuenta lugares por turnos agendados."""
+        posicion = self._posicion(fecha, hora)
+        if posicion is not None:
+            fila = self._fila(categoria)
+            fila[posicion] = max(0, fila[posicion] - cantidad)
+
+    def liberar(self, categoria, fecha, hora, cantidad=1):
+        """Devuelve lugares por turnos cancelados o movidos."""
+        posicion = self._posicion(fecha, hora)
+        if posicion is not None and self.base[posicion]:
+            fila = self._fila(categoria)
+            fila[posicion] = min(self.base[posicion], fila[posicion] + cantidad)
+
+    def libres(self, categoria, fecha, hora):
+        """Lugares libres en esa categoría, fecha y hora (0 si no se puede reservar)."""
+        posicion = self._posicion(fecha, hora)
+        return 0 if posicion is None else self._fila(categoria)[posicion]
+
+    def libres_del_dia(self, fecha, categoria):
+        """Lista de (hora, lugares libres) con lugar en esa fecha."""
+        posicion = self._posicion(fecha, HORARIOS_VALIDOS[0])
+        if posicion is None:
+            return []
+        fila = self._fila(categoria)
+        return [
+            (hora, fila[posicion + s])
+            for s, hora in enumerate(HORARIOS_VALIDOS)
+            if fila[posicion + s]
+        ]
+
+    def proximos_libres(self, categoria, desde_fecha=None, desde_hora=None, cantidad=5):
+        """Los próximos `cantidad` horarios con lugar como (fecha, hora, lugares libres)."""
+        inicio = self._posicion(desde_fecha or self.desde.isoformat(), desde_hora or HORARIOS_VALIDOS[0])
+        if inicio is None:
+            if desde_fecha and desde_fecha > self.desde.isoformat():
+                return []
+            inicio = 0
+        fila = self._fila(categoria)
+        resultado = []
+        for posicion in range(inicio, len(fila)):
+            if fila[posicion]:
+                dia, s = divmod(posicion, HORARIOS_POR_DIA)
+                fecha = (self.desde + timedelta(days=dia)).isoformat()
+                resultado.append((fecha, HORARIOS_VALIDOS[s], fila[posicion]))
+                if len(resultado) >= cantidad:
+                    break
+        return resultado
+
+
+def construir_disponibilidad(repositorio=None, ahora=None):
+    """
+    Arma la matriz de disponibilidad con los turnos guardados y los feriados.
+
+    En modo cliente (ver cliente_turnos) la ocupación la informa el servicio de turnos.
+    """
+    ahora = ahora or datetime.now()
+    desde = ahora.date()
+    hasta = desde + timedelta(days=DIAS_HORIZONTE)
+    if repositorio is None and cliente_turnos.activo():
+        ocupacion = cliente_turnos.ocupacion(desde.isoformat(), hasta.isoformat())
+    else:
+        ocupacion = (repositorio or obtener_repositorio()).ocupacion(desde.isoformat(), hasta.isoformat())
+    return MatrizDisponibilidad(ocupacion, obtener_calendario(), ahora)
+
+def sugerir_horarios(categoria, fecha, hora, cantidad=5, repositorio=None):
+    """Próximos horarios libres de la categoría a partir de la fecha y hora pedidas."""
+    matriz = construir_disponibilidad(repositorio)
+    return matriz.proximos_libres(categoria, fecha, hora, cantidad)
+
+def describir_horarios(horarios):
+    """Texto con horarios libres (fecha, hora, lugares) para mostrar al usuario."""
+    return "\n".join(
+        f"{fecha} {hora} ({libres} lugar{'es' if libres > 1 else ''})"
+        for fecha, hora, libres in horarios
+    )
@@ -0,0 +1,167 @@
+import heapq
+from collections import Counter
+
+BANDAS = ("Mañana", "Tarde", "Desconocido")
+
+
+def clasificar_banda(hora):
+    """Banda horaria de un turno: Mañana (10:00-15:00), Tarde (15:30-18:00) o Desconocido."""
+    try:
+        h, m = hora.split(":")
+        minutos = int(h) * 60 + int(m)
+    except (AttributeError, ValueError):
+        return "Desconocido"
+    if 10 * 60 <= minutos <= 15 * 60:
+        return "Mañana"
+    if 15 * 60 + 30 <= minutos <= 18 * 60:
+        return "Tarde"
+    return "Desconocido"
+
+def claves_estadisticas(turno):
+    """Contadores (tipo, clave) a los que suma un turno."""
+    return (
+        ("cliente", turno.get("nombre")),
+        ("categoria", turno.get("categoria")),
+        ("banda", clasificar_banda(turno.get("hora"))),
+    )
+
+
+class EstadisticasTurnos:
+    """
+    Contadores de turnos por cliente, categoría y banda horaria.
+
+    Se actualizan con cada alta, baja o cambio, así que consultarlos no
+    recorre los turnos. Para el ranking de clientes se guarda además qué
+    clientes tienen cada cantidad de turnos: el top se arma bajando desde la
+    cantidad máxima sin ordenar a todos los clientes.
+    """
+
+    def __init__(self, clientes=()):
+        self.total = 0
+        self.contadores = {"cliente": Counter(), "categoria": Counter(), "banda": Counter()}
+        self._clientes_por_cantidad = {}
+        self._maximo = 0
+        for turno in clientes:
+            self.sumar(turno, 1)
+
+    def sumar(self, turno, delta):
+        """Suma (delta=1) o resta (delta=-1) un turno a los contadores."""
+        self.total += delta
+        for tipo, clave in claves_estadisticas(turno):
+            contador = self.contadores[tipo]
+            anterior = contador[clave]
+            contador[clave] = anterior + delta
+            if contador[clave] <= 0:
+                del contador[clave]
+            if tipo == "cliente":
+                self._mover_cliente(clave, anterior, anterior + delta)
+
+    def sumar_contadores(self, contadores, signo=1):
+        """
+        Suma (signo=1) o resta (signo=-1) contadores ya agrupados, como los
+        del resumen de un mes del histórico ({"total", "cliente", "categoria", "banda"}).
+        """
+        self.total += signo * contadores["total"]
+        for tipo, contador in self.contadores.items():
+            for clave, cantidad in contadores[tipo].items():
+                clave = clave or None  # En el resumen los nombres vacíos se guardan como ""
+                anterior = contador[clave]
+                contador[clave] = anterior + signo * cantidad
+                if contador[clave] <= 0:
+                    del contador[clave]
+                if tipo == "cliente":
+                    self._mover_cliente(clave, anterior, max(anterior + signo * cantidad, 0))
+
+    def a_estado(self):
+        """Los contadores como datos simples (para la imagen binaria)."""
+        return {
+            "total": self.total,
+            "contadores": {tipo: dict(contador) for tipo, contador in self.contadores.items()},
+            "clientes_por_cantidad": self._clientes_por_cantidad,
+            "maximo": self._maximo,
+        }
+
+    @classmethod
+    def desde_estado(cls, estado):
+        estadisticas = cls()
+        estadisticas.total = estado["total"]
+        estadisticas.contadores = {tipo: Counter(contador) for tipo, contador in estado["contadores"].items()}
+        estadisticas._clientes_por_cantidad = estado["clientes_por_cantidad"]
+        estadisticas._maximo = estado["maximo"]
+        return estadisticas
+
+    def _mover_cliente(self, nombre, anterior, nueva):
+        if anterior > 0:
+            grupo = self._clientes_por_cantidad[anterior]
+            del grupo[nombre]
+            if not grupo:
+                del self._clientes_por_cantidad[anterior]
+                if anterior == self._maximo and nueva < anterior:
+                    self._maximo = nueva
+        if nueva > 0:
+            self._clientes_por_cantidad.setdefault(nueva, {})[nombre] = None
+            self._maximo = max(self._maximo, nueva)
+
+    def grupos_de_clientes(self):
+        """Pares (turnos, nombres) de la cantidad más alta a la más baja."""
+        turnos = self._maximo
+        while turnos > 0:
+            nombres = self._clientes_por_cantidad.get(turnos)
+            if nombres:
+                yield turnos, nombres
+            turnos -= 1
+
+    def top_clientes(self, cantidad=5):
+        """Los `cantidad` clientes con más turnos, como (nombre, turnos)."""
+        resultado = []
+        turnos = self._maximo
+        while turnos > 0 and len(resultado) < cantidad:
+            for nombre in self._clientes_por_cantidad.get(turnos, ()):
+                resultado.append((nombre, turnos))
+                if len(resultado) == cantidad:
+                    break
+            turnos -= 1
+        return resultado
+
+    def resumen(self, top=5):
+        """Total, ranking de clientes y cantidades por categoría y por banda horaria."""
+        return {
+            "total": self.total,
+            "clientes": self.top_clientes(top),
+            "categorias": dict(self.contadores["categoria"]),
+            "bandas": dict(self.contadores["banda"]),
+        }
+
+
+def top_combinado(una, otra, cantidad=5):
+    """
+    Los `cantidad` clientes con más turnos sumando dos EstadisticasTurnos, como (nombre, turnos).
+
+    Se baja a la vez por los grupos de cantidades de las dos y se suman sólo
+    los clientes vistos: se corta cuando el último del ranking ya tiene al
+    menos la suma de las cantidades por las que va cada lado, porque ningún
+    cliente no visto puede superarla.
+    """
+    if cantidad <= 0:
+        return []
+    de_una, de_otra = una.contadores["cliente"], otra.contadores["cliente"]
+    grupos = [una.grupos_de_clientes(), otra.grupos_de_clientes()]
+    niveles = [0, 0]
+    vistos = {}
+    while True:
+        for lado, iterador in enumerate(grupos):
+            turnos, nombres = next(iterador, (0, ()))
+            niveles[lado] = turnos
+            for nombre in nombres:
+                if nombre not in vistos:
+                    vistos[nombre] = de_una.get(nombre, 0) + de_otra.get(nombre, 0)
+        ranking = heapq.nlargest(cantidad, vistos.items(), key=lambda par: par[1])
+        umbral = sum(niveles)
+        if not umbral or (len(ranking) == cantidad and ranking[-1][1] >= umbral):
+            return ranking
+
+def resumen_de(clientes_o_resumen, top=5):
+    """Acepta un resumen ya armado o una lista de turnos (como antes) y devuelve el resumen."""
+    if isinstance(clientes_o_resumen, dict):
+        return clientes_o_resumen
+    return EstadisticasTurnos(clientes_o_resumen).resumen(top)
@@ -0,0 +1,83 @@
+import csv
+import gzip
+import os
+
+ENCABEZADOS = ["ID", "Nombre", "Categoría", "Servicio", "Fecha", "Hora"]
+AVISO_CADA = 1000  # Cada cuántos turnos se informa el progreso y se revisa si se canceló
+
+
+class ExportacionCancelada(Exception):
+    """Se pidió cancelar la exportación; el archivo de destino queda como estaba."""
+
+
+def filas_csv(turnos):
+    """Genera las filas del CSV a partir de los turnos, de a uno."""
+    for turno in turnos:
+        yield [
+            turno.get("id", "Sin ID"),
+            turno.get("nombre", "Desconocido"),
+            turno.get("categoria", "Sin categoría"),
+            turno.get("servicio", "Sin servicio"),
+            turno.get("fecha", "Sin fecha"),
+            turno.get("hora", "Sin hora")
+        ]
+
+def ruta_marca(ruta):
+    """Archivo donde se guarda hasta qué modificación se exportó a `ruta`."""
+    return ruta + ".marca"
+
+def leer_marca(ruta):
+    """Última marca de modificación exportada a `ruta`, o None si nunca se exportó."""
+    try:
+        with open(ruta_marca(ruta), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def guardar_marca(ruta, marca):
+    with open(ruta_marca(ruta), "w", encoding="utf-8") as f:
+        f.write(marca)
+
+def exportar_turnos(turnos, ruta, comprimir=None, cancelacion=None, progreso=None):
+    """
+    Escribe los turnos en un CSV (o CSV.gz) recorriéndolos una sola vez.
+
+    Se escribe fila por fila a un archivo temporal que reemplaza al destino
+    recién al terminar, así una exportación cortada no deja el CSV a medias.
+    Cada AVISO_CADA turnos se llama a `progreso(cantidad)` y, si
+    `cancelacion` (un threading.Event) está marcada, se corta con
+    ExportacionCancelada. Devuelve (cantidad de turnos, marca de
+    modificación más reciente).
+    """
+    if comprimir is None:
+        comprimir = ruta.endswith(".gz")
+    temporal = ruta + ".tmp"
+    abrir = gzip.open if comprimir else open
+    cantidad = 0
+    marca = None
+
+    def contar(turnos):
+        nonlocal cantidad, marca
+        for turno in turnos:
+            cantidad += 1
+            modificado = turno.get("modificado")
+            if modificado and (marca is None or modificado > marca):
+                marca = modificado
+            if cantidad % AVISO_CADA == 0:
+                if cancelacion is not None and cancelacion.is_set():
+                    raise ExportacionCancelada(f"Exportación cancelada después de {cantidad} turno(s).")
+                if progreso is not None:
+                    progreso(cantidad)
+            yield turno
+
+    try:
+        with abrir(temporal, "wt", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(ENCABEZADOS)
+            writer.writerows(filas_csv(contar(turnos)))
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return cantidad, marca
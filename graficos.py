@@ -1,140 +1,246 @@
-import tkinter as tk
-from collections import Counter
-import math
-from tkinter import messagebox
-import tkinter.font as tkFont
-
-COLORES = ["#66b3ff", "#99ff99", "#ffcc99", "#ff9999", "#c2c2f0", "#ffb3e6", "#d9f2d9"]
-
-def mostrar_estadisticas_completas(clientes):
-    if not clientes:
-        messagebox.showinfo("Información", "No hay datos para mostrar.")
-        return
-
-    nombres = [c.get("nombre", "Desconocido") for c in clientes]
-    contador_nombres = Counter(nombres)
-    ranking_5 = contador_nombres.most_common(5)
-
-    franjas = {
-        "Mañana (10:00-15:00)": 0,
-        "Tarde (15:30-18:00)": 0,
-        "Otro horario": 0
-    }
-    for c in clientes:
-        hora = c.get("hora", "")
-        try:
-            h, m = map(int, hora.split(":"))
-            total_min = h * 60 + m
-            if 10*60 <= total_min <= 15*60:
-                franjas["Mañana (10:00-15:00)"] += 1
-            elif 15*60 + 30 <= total_min <= 18*60:
-                franjas["Tarde (15:30-18:00)"] += 1
-            else:
-                franjas["Otro horario"] += 1
-        except:
-            franjas["Otro horario"] += 1
-
-    categorias = [c.get("categoria", "Desconocido") for c in clientes]
-    contador_cat = Counter(categorias)
-
-    # Ventana principal con scroll
-    ventana = tk.Toplevel()
-    ventana.title("Estadísticas de Turnos")
-    ventana.geometry("800x800")
-    ventana.configure(bg="white")
-
-    canvas = tk.Canvas(ventana, bg="white", highlightthickness=0)
-    scrollbar = tk.Scrollbar(ventana, orient="vertical", command=canvas.yview)
-    frame_scroll = tk.Frame(canvas, bg="white")
-
-    frame_scroll.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-    canvas.create_window((0, 0), window=frame_scroll, anchor="nw")
-    canvas.configure(yscrollcommand=scrollbar.set)
-
-    canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    # Ranking de usuarios
-    tk.Label(frame_scroll, text="Ranking: Top 5 Usuarios con más turnos", font=("Arial", 14, "bold"), bg="white").pack(pady=(10, 5), anchor="w", padx=10)
-    for i, (nombre, cant) in enumerate(ranking_5, 1):
-        tk.Label(frame_scroll, text=f"{i}. {nombre} - {cant} turno{'s' if cant > 1 else ''}", font=("Arial", 12), bg="white").pack(anchor="w", padx=30)
-
-    tk.Label(frame_scroll, text="", bg="white").pack(pady=10)
-
-    # Categorías
-    tk.Label(frame_scroll, text="Cantidad de turnos por categoría", font=("Arial", 14, "bold"), bg="white").pack(anchor="w", padx=10)
-    max_cant = max(contador_cat.values()) if contador_cat else 1
-    barra_max = 30
-
-    for i, (cat, cant) in enumerate(contador_cat.items()):
-        barra = "█" * int((cant / max_cant) * barra_max)
-        color = COLORES[i % len(COLORES)]
-
-        frame = tk.Frame(frame_scroll, bg="white")
-        frame.pack(anchor="w", padx=30, pady=2)
-
-        tk.Label(frame, text=f"{cat:<15}", font=("Courier", 12), bg="white").pack(side="left")
-        tk.Label(frame, text=barra, font=("Courier", 12), fg=color, bg="white").pack(side="left")
-        tk.Label(frame, text=f" ({cant})", font=("Courier", 12), bg="white").pack(side="left")
-
-    tk.Label(frame_scroll, text="", bg="white").pack(pady=10)
-
-    # Gráfico de torta
-    tk.Label(frame_scroll, text="Distribución de franjas horarias", font=("Arial", 14, "bold"), bg="white").pack(anchor="w", padx=10)
-
-    canvas_torta = tk.Canvas(frame_scroll, width=800, height=600, bg="white", highlightthickness=1, highlightbackground="gray")
-    canvas_torta.pack(pady=10, padx=10)
-
-    franjas_filtradas = {k: v for k, v in franjas.items() if v > 0}
-    total_franjas = sum(franjas_filtradas.values())
-    if total_franjas == 0:
-        total_franjas = 1
-
-    inicio = 0
-    cx, cy, r = 350, 250, 180
-    colores_torta = ["#ff9999", "#66b3ff", "#99ff99"]
-    font_etiqueta = tkFont.Font(family="Arial", size=9, weight="bold")
-
-    for i, (franja, valor) in enumerate(franjas_filtradas.items()):
-        angulo = (valor / total_franjas) * 360
-        fin = inicio + angulo
-
-        canvas_torta.create_arc(cx - r, cy - r, cx + r, cy + r,
-                                start=inicio, extent=angulo,
-                                fill=colores_torta[i % len(colores_torta)], outline="black")
-
-        porcentaje = f"{(valor / total_franjas) * 100:.1f}%"
-        texto_etiqueta = f"{franja}\n{porcentaje}"
-
-        if franja == "Mañana (10:00-15:00)":
-            angulo_salida = math.radians(fin)
-            x_line = cx + r * math.cos(angulo_salida)
-            y_line = cy - r * math.sin(angulo_salida)
-
-            x_text = cx + r + 100
-            y_text = cy - r
-            anchor = "w"
-        else:
-            angulo_med = math.radians(inicio + angulo / 2)
-            x_line = cx + r * math.cos(angulo_med)
-            y_line = cy - r * math.sin(angulo_med)
-
-            x_text = cx + (r + 80) * math.cos(angulo_med)
-            y_text = cy - (r + 80) * math.sin(angulo_med)
-            anchor = "w" if x_text >= cx else "e"
-
-        canvas_torta.create_line(x_line, y_line, x_text, y_text, width=2)
-
-        temp_text = canvas_torta.create_text(x_text, y_text, text=texto_etiqueta, font=font_etiqueta, fill="black", anchor=anchor)
-        bbox_coords = canvas_torta.bbox(temp_text)
-        canvas_torta.delete(temp_text)
-
-        pad = 4
-        canvas_torta.create_rectangle(
-            bbox_coords[0] - pad, bbox_coords[1] - pad,
-            bbox_coords[2] + pad, bbox_coords[3] + pad,
-            fill="white", outline=""
-        )
-        canvas_torta.create_text(x_text, y_text, text=texto_etiqueta, font=font_etiqueta, fill="black", anchor=anchor)
-
-        inicio = fin
+import tkinter as tk
+from collections import Counter
+import math
+from tkinter import filedialog, messagebox
+import tkinter.font as tkFont
+from analisis_ocupacion import DIAS_SEMANA, exportar_matriz
+from estadisticas import BANDAS, resumen_de
+from validaciones import HORARIOS_VALIDOS, MAX_TURNOS_POR_FRANJA, validar_formato_fecha
+
+COLORES = ["#66b3ff", "#99ff99", "#ffcc99", "#ff9999", "#c2c2f0", "#ffb3e6", "#d9f2d9"]
+
+ETIQUETAS_BANDAS = {
+    "Mañana": "Mañana (10:00-15:00)",
+    "Tarde": "Tarde (15:30-18:00)",
+    "Desconocido": "Otro horario",
+}
+
+TODAS = "Todas"
+CELDA_ANCHO, CELDA_ALTO = 38, 26
+MARGEN_IZQUIERDO, MARGEN_SUPERIOR = 80, 46
+
+def color_utilizacion(utilizacion):
+    """Color de la celda: de blanco (libre) a rojo (llena); gris si ese día no se atiende."""
+    if utilizacion is None:
+        return "#e6e6e6"
+    u = max(0.0, min(utilizacion, 1.0))
+    rojo, verde, azul = (int(255 - u * (255 - destino)) for destino in (215, 48, 31))
+    return f"#{rojo:02x}{verde:02x}{azul:02x}"
+
+def dibujar_mapa_ocupacion(canvas, matriz, categoria=None):
+    """Dibuja la utilización (día de la semana × horario) de la matriz en el canvas."""
+    canvas.delete("all")
+    tabla = matriz.tabla(categoria)
+    for h, hora in enumerate(HORARIOS_VALIDOS):
+        x = MARGEN_IZQUIERDO + h * CELDA_ANCHO + CELDA_ANCHO / 2
+        canvas.create_text(x, MARGEN_SUPERIOR - 4, text=hora, angle=90, anchor="w", font=("Arial", 8))
+    fila = 0
+    for d, nombre_dia in enumerate(DIAS_SEMANA):
+        if tabla[d][0] is None and not any(matriz.turnos(c, d, h) for c in range(len(matriz.categorias))
+                                           for h in range(len(HORARIOS_VALIDOS))):
+            continue  # Día que no se atiende y sin turnos (los domingos)
+        y = MARGEN_SUPERIOR + fila * CELDA_ALTO
+        canvas.create_text(MARGEN_IZQUIERDO - 6, y + CELDA_ALTO / 2, text=nombre_dia, anchor="e", font=("Arial", 9))
+        for h, utilizacion in enumerate(tabla[d]):
+            x = MARGEN_IZQUIERDO + h * CELDA_ANCHO
+            canvas.create_rectangle(x, y, x + CELDA_ANCHO, y + CELDA_ALTO,
+                                    fill=color_utilizacion(utilizacion), outline="white")
+            if utilizacion is not None:
+                texto = f"{utilizacion * 100:.0f}%"
+                canvas.create_text(x + CELDA_ANCHO / 2, y + CELDA_ALTO / 2, text=texto, font=("Arial", 7),
+                                   fill="white" if utilizacion > 0.6 else "black")
+        fila += 1
+    canvas.configure(height=MARGEN_SUPERIOR + fila * CELDA_ALTO + 10)
+
+def seccion_mapa_ocupacion(padre, matriz, recalcular=None):
+    """
+    Mapa de calor de la ocupación con selector de categoría, rango de fechas y exportación.
+
+    `recalcular(desde, hasta, listo)` arma otra matriz (en segundo plano) y
+    llama a `listo(matriz)`; sin él no se puede cambiar el rango.
+    """
+    estado = {"matriz": matriz}
+    tk.Label(padre, text=f"Utilización por día y horario (capacidad: {MAX_TURNOS_POR_FRANJA} por categoría)",
+             font=("Arial", 14, "bold"), bg="white").pack(anchor="w", padx=10)
+
+    controles = tk.Frame(padre, bg="white")
+    controles.pack(anchor="w", padx=30, pady=4)
+    categoria_var = tk.StringVar(value=TODAS)
+    tk.Label(controles, text="Categoría:", bg="white").pack(side="left")
+    tk.OptionMenu(controles, categoria_var, TODAS, *matriz.categorias).pack(side="left", padx=(0, 8))
+    tk.Label(controles, text="Desde:", bg="white").pack(side="left")
+    entry_desde = tk.Entry(controles, width=11)
+    entry_desde.insert(0, matriz.desde.isoformat())
+    entry_desde.pack(side="left")
+    tk.Label(controles, text="Hasta:", bg="white").pack(side="left")
+    entry_hasta = tk.Entry(controles, width=11)
+    entry_hasta.insert(0, matriz.hasta.isoformat())
+    entry_hasta.pack(side="left", padx=(0, 8))
+
+    total = tk.Label(padre, bg="white", font=("Arial", 10))
+    total.pack(anchor="w", padx=30)
+    canvas_mapa = tk.Canvas(padre, width=MARGEN_IZQUIERDO + len(HORARIOS_VALIDOS) * CELDA_ANCHO + 10,
+                            bg="white", highlightthickness=0)
+    canvas_mapa.pack(anchor="w", padx=10, pady=5)
+
+    def redibujar(*args):
+        actual = estado["matriz"]
+        total.configure(text=f"{actual.total()} turno(s) entre {actual.desde} y {actual.hasta}")
+        categoria = categoria_var.get()
+        dibujar_mapa_ocupacion(canvas_mapa, actual, None if categoria == TODAS else categoria)
+
+    def actualizar():
+        desde, hasta = entry_desde.get().strip(), entry_hasta.get().strip()
+        if not (validar_formato_fecha(desde) and validar_formato_fecha(hasta)):
+            messagebox.showwarning("Fecha inválida", "Use el formato YYYY-MM-DD.")
+            return
+
+        def listo(nueva):
+            if canvas_mapa.winfo_exists():
+                estado["matriz"] = nueva
+                redibujar()
+
+        recalcular(desde, hasta, listo)
+
+    def exportar():
+        ruta = filedialog.asksaveasfilename(
+            title="Exportar matriz de ocupación", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("NumPy", "*.npz")],
+        )
+        if not ruta:
+            return
+        try:
+            messagebox.showinfo("Exportación", exportar_matriz(estado["matriz"], ruta))
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Exportación", f"No se pudo exportar: {e}")
+
+    if recalcular is not None:
+        tk.Button(controles, text="Actualizar", command=actualizar).pack(side="left")
+    tk.Button(controles, text="Exportar...", command=exportar).pack(side="left", padx=4)
+    categoria_var.trace_add("write", redibujar)
+    redibujar()
+
+def mostrar_estadisticas_completas(clientes, ocupacion=None, recalcular=None):
+    """
+    Muestra las estadísticas; recibe el resumen del repositorio (o, como antes, la lista de turnos).
+
+    Con `ocupacion` (una MatrizOcupacion) se agrega el mapa de calor de utilización.
+    """
+    resumen = resumen_de(clientes)
+    if not resumen["total"]:
+        messagebox.showinfo("Información", "No hay datos para mostrar.")
+        return
+
+    ranking_5 = [(nombre or "Desconocido", cant) for nombre, cant in resumen["clientes"]]
+
+    franjas = {ETIQUETAS_BANDAS[banda]: resumen["bandas"].get(banda, 0) for banda in BANDAS}
+
+    contador_cat = Counter()
+    for cat, cant in resumen["categorias"].items():
+        contador_cat[cat or "Desconocido"] += cant
+
+    # Ventana principal con scroll
+    ventana = tk.Toplevel()
+    ventana.title("Estadísticas de Turnos")
+    ventana.geometry("800x800")
+    ventana.configure(bg="white")
+
+    canvas = tk.Canvas(ventana, bg="white", highlightthickness=0)
+    scrollbar = tk.Scrollbar(ventana, orient="vertical", command=canvas.yview)
+    frame_scroll = tk.Frame(canvas, bg="white")
+
+    frame_scroll.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+    canvas.create_window((0, 0), window=frame_scroll, anchor="nw")
+    canvas.configure(yscrollcommand=scrollbar.set)
+
+    canvas.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+
+    # Ranking de usuarios
+    tk.Label(frame_scroll, text="Ranking: Top 5 Usuarios con más turnos", font=("Arial", 14, "bold"), bg="white").pack(pady=(10, 5), anchor="w", padx=10)
+    for i, (nombre, cant) in enumerate(ranking_5, 1):
+        tk.Label(frame_scroll, text=f"{i}. {nombre} - {cant} turno{'s' if cant > 1 else ''}", font=("Arial", 12), bg="white").pack(anchor="w", padx=30)
+
+    tk.Label(frame_scroll, text="", bg="white").pack(pady=10)
+
+    # Categorías
+    tk.Label(frame_scroll, text="Cantidad de turnos por categoría", font=("Arial", 14, "bold"), bg="white").pack(anchor="w", padx=10)
+    max_cant = max(contador_cat.values()) if contador_cat else 1
+    barra_max = 30
+
+    for i, (cat, cant) in enumerate(contador_cat.items()):
+        barra = "█" * int((cant / max_cant) * barra_max)
+        color = COLORES[i % len(COLORES)]
+
+        frame = tk.Frame(frame_scroll, bg="white")
+        frame.pack(anchor="w", padx=30, pady=2)
+
+        tk.Label(frame, text=f"{cat:<15}", font=("Courier", 12), bg="white").pack(side="left")
+        tk.Label(frame, text=barra, font=("Courier", 12), fg=color, bg="white").pack(side="left")
+        tk.Label(frame, text=f" ({cant})", font=("Courier", 12), bg="white").pack(side="left")
+
+    tk.Label(frame_scroll, text="", bg="white").pack(pady=10)
+
+    # Gráfico de torta
+    tk.Label(frame_scroll, text="Distribución de franjas horarias", font=("Arial", 14, "bold"), bg="white").pack(anchor="w", padx=10)
+
+    canvas_torta = tk.Canvas(frame_scroll, width=800, height=600, bg="white", highlightthickness=1, highlightbackground="gray")
+    canvas_torta.pack(pady=10, padx=10)
+
+    franjas_filtradas = {k: v for k, v in franjas.items() if v > 0}
+    total_franjas = sum(franjas_filtradas.values())
+    if total_franjas == 0:
+        total_franjas = 1
+
+    inicio = 0
+    cx, cy, r = 350, 250, 180
+    colores_torta = ["#ff9999", "#66b3ff", "#99ff99"]
+    font_etiqueta = tkFont.Font(family="Arial", size=9, weight="bold")
+
+    for i, (franja, valor) in enumerate(franjas_filtradas.items()):
+        angulo = (valor / total_franjas) * 360
+        fin = inicio + angulo
+
+        canvas_torta.create_arc(cx - r, cy - r, cx + r, cy + r,
+                                start=inicio, extent=angulo,
+                                fill=colores_torta[i % len(colores_torta)], outline="black")
+
+        porcentaje = f"{(valor / total_franjas) * 100:.1f}%"
+        texto_etiqueta = f"{franja}\n{porcentaje}"
+
+        if franja == "Mañana (10:00-15:00)":
+            angulo_salida = math.radians(fin)
+            x_line = cx + r * math.cos(angulo_salida)
+            y_line = cy - r * math.sin(angulo_salida)
+
+            x_text = cx + r + 100
+            y_text = cy - r
+            anchor = "w"
+        else:
+            angulo_med = math.radians(inicio + angulo / 2)
+            x_line = cx + r * math.cos(angulo_med)
+            y_line = cy - r * math.sin(angulo_med)
+
+            x_text = cx + (r + 80) * math.cos(angulo_med)
+            y_text = cy - (r + 80) * math.sin(angulo_med)
+            anchor = "w" if x_text >= cx else "e"
+
+        canvas_torta.create_line(x_line, y_line, x_text, y_text, width=2)
+
+        temp_text = canvas_torta.create_text(x_text, y_text, text=texto_etiqueta, font=font_etiqueta, fill="black", anchor=anchor)
+        bbox_coords = canvas_torta.bbox(temp_text)
+        canvas_torta.delete(temp_text)
+
+        pad = 4
+        canvas_torta.create_rectangle(
+            bbox_coords[0] - pad, bbox_coords[1] - pad,
+            bbox_coords[2] + pad, bbox_coords[3] + pad,
+            fill="white", outline=""
+        )
+        canvas_torta.create_text(x_text, y_text, text=texto_etiqueta, font=font_etiqueta, fill="black", anchor=anchor)
+
+        inicio = fin
+
+    if ocupacion is not None:
+        tk.Label(frame_scroll, text="", bg="white").pack(pady=10)
+        seccion_mapa_ocupacion(frame_scroll, ocupacion, recalcular)
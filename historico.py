@@ -0,0 +1,226 @@
+import json
+import marshal
+import os
+import re
+from collections import Counter
+
+import cache_archivos
+import diario_turnos
+from archivo_historico import ArchivoHistorico, escribir_archivo
+from busqueda_nombres import IndiceNombres
+from estadisticas import EstadisticasTurnos, top_combinado
+
+DIRECTORIO_HISTORICO = "historico"
+PATRON_MES = re.compile(r"^turnos-(\d{4}-\d{2})\.bin$")
+
+
+def mes_de(fecha):
+    """Partición (AAAA-MM) de una fecha YYYY-MM-DD."""
+    return fecha[:7]
+
+
+class Historico:
+    """
+    Turnos de días pasados, guardados en un archivo por mes.
+
+    Cada mes vive en `historico/turnos-AAAA-MM.bin`, en el formato binario
+    de archivo_historico (se lee con `mmap`, sin cargar los turnos), y en
+    `historico/resumen.json` se guardan los contadores de estadísticas de
+    cada mes. Al lado se guardan dos estructuras derivadas del resumen:
+    `historico/estadisticas.bin`, los contadores de todos los meses ya
+    sumados, y `historico/nombres.bin`, el índice de trigramas de los nombres
+    archivados (cada nombre con los meses en que aparece). Así las
+    estadísticas del histórico no leen los turnos ni recorren los meses, y
+    las búsquedas por nombre sólo abren los meses donde aparece el nombre.
+    Si falta el resumen se rearma contando sobre las columnas de cada mes;
+    si una estructura derivada falta o no corresponde al resumen, se rearma
+    desde el resumen.
+
+    Sólo se escribe desde el repositorio, con el bloqueo de clientes.json
+    tomado. En Windows un mes abierto por otro proceso no se puede
+    reemplazar: la archivación falla y se reintenta al día siguiente.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_HISTORICO):
+        self.directorio = directorio
+
+    def ruta_mes(self, mes):
+        return os.path.join(self.directorio, f"turnos-{mes}.bin")
+
+    def ruta_resumen(self):
+        return os.path.join(self.directorio, "resumen.json")
+
+    def ruta_nombres(self):
+        return os.path.join(self.directorio, "nombres.bin")
+
+    def ruta_estadisticas(self):
+        return os.path.join(self.directorio, "estadisticas.bin")
+
+    def meses(self, desde=None, hasta=None):
+        """Meses archivados (AAAA-MM, en orden) que se cruzan con el rango de fechas."""
+        try:
+            nombres = os.listdir(self.directorio)
+        except FileNotFoundError:
+            return []
+        meses = sorted(m.group(1) for m in map(PATRON_MES.match, nombres) if m)
+        return [
+            mes for mes in meses
+            if (not desde or mes >= mes_de(desde)) and (not hasta or mes <= mes_de(hasta))
+        ]
+
+    def archivo_mes(self, mes):
+        """ArchivoHistorico de ese mes; el mapa queda abierto mientras el archivo no cambie."""
+        return cache_archivos.cargar_cacheado((self.ruta_mes(mes),), lambda: ArchivoHistorico(self.ruta_mes(mes)))
+
+    def resumenes(self):
+        """Contadores guardados por mes: {mes: {"total": n, "cliente": {...}, "categoria": {...}, "banda": {...}}}."""
+        def leer():
+            with open(self.ruta_resumen(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        try:
+            return cache_archivos.cargar_cacheado((self.ruta_resumen(),), leer)
+        except (FileNotFoundError, ValueError):
+            return {mes: self.archivo_mes(mes).contadores() for mes in self.meses()}
+
+    def nombres(self):
+        """
+        IndiceNombres de los nombres archivados; los IDs son pares (mes, nombre).
+
+        Se lee una vez de `nombres.bin` y queda en memoria mientras no cambien
+        ni el índice ni el resumen.
+        """
+        return self._derivado(self.ruta_nombres(), IndiceNombres.desde_estado, lambda resumenes: IndiceNombres(
+            {"id": (mes, nombre), "nombre": nombre}
+            for mes, resumen in resumenes.items() for nombre in resumen["cliente"]
+        ))
+
+    def estadisticas_archivadas(self):
+        """
+        EstadisticasTurnos con los contadores de todos los meses archivados juntos.
+
+        Se suman al archivar (ver `agregar`) y se guardan en `estadisticas.bin`,
+        así que consultar las estadísticas no recorre los resúmenes.
+        """
+        def armar(resumenes):
+            estadisticas = EstadisticasTurnos()
+            for resumen in resumenes.values():
+                estadisticas.sumar_contadores(resumen)
+            return estadisticas
+        return self._derivado(self.ruta_estadisticas(), EstadisticasTurnos.desde_estado, armar)
+
+    def _derivado(self, ruta, desde_estado, armar):
+        """
+        Estructura guardada en `ruta` que se deriva del resumen, en memoria
+        mientras no cambien ni ella ni el resumen.
+
+        Si falta, está dañada o no corresponde al resumen actual se arma con
+        `armar(resumenes)` y se vuelve a guardar.
+        """
+        def leer():
+            try:
+                with open(ruta, "rb") as f:
+                    guardado = marshal.load(f)
+                if guardado["firma"] == cache_archivos.firma((self.ruta_resumen(),)):
+                    return desde_estado(guardado["estado"])
+            except (OSError, EOFError, ValueError, TypeError, KeyError):
+                pass
+            datos = armar(self.resumenes())
+            if os.path.isdir(self.directorio):
+                self._guardar_derivado(ruta, datos)
+            return datos
+        return cache_archivos.cargar_cacheado((self.ruta_resumen(), ruta), leer)
+
+    def _guardar_derivado(self, ruta, datos):
+        """Escribe el estado de `datos`, marcado con la firma del resumen que refleja."""
+        contenido = marshal.dumps({"firma": cache_archivos.firma((self.ruta_resumen(),)), "estado": datos.a_estado()})
+        temporal = f"{ruta}.{os.getpid()}.tmp"  # Lo pueden rearmar a la vez procesos que sólo leen
+        with open(temporal, "wb") as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+        cache_archivos.recordar((self.ruta_resumen(), ruta), datos)
+
+    def agregar(self, turnos):
+        """
+        Archiva los turnos (con fecha YYYY-MM-DD) en el archivo de su mes.
+
+        Si un turno ya estaba archivado (una archivación anterior se cortó
+        antes de sacarlo de clientes.json) se reemplaza por ID, así que se
+        puede repetir sin duplicar.
+        """
+        por_mes = {}
+        for turno in turnos:
+            por_mes.setdefault(mes_de(turno["fecha"]), []).append(dict(turno))
+        os.makedirs(self.directorio, exist_ok=True)
+        resumenes = dict(self.resumenes())
+        nombres = self.nombres()
+        estadisticas = self.estadisticas_archivadas()
+        # Se cambian en su lugar: si algo falla, que se vuelvan a leer.
+        cache_archivos.olvidar((self.ruta_resumen(), self.ruta_nombres()))
+        cache_archivos.olvidar((self.ruta_resumen(), self.ruta_estadisticas()))
+        for mes, nuevos in sorted(por_mes.items()):
+            ruta = self.ruta_mes(mes)
+            anteriores = []
+            if os.path.exists(ruta):
+                anteriores = ArchivoHistorico(ruta).turnos()
+                cache_archivos.olvidar((ruta,))  # Suelta el mapa antes de reemplazar el archivo
+            por_id = {t["id"]: t for t in anteriores}
+            por_id.update((t["id"], t) for t in nuevos)
+            escribir_archivo(ruta, por_id.values())
+            anterior = resumenes.get(mes)
+            resumenes[mes] = self.archivo_mes(mes).contadores()
+            if anterior is not None:
+                estadisticas.sumar_contadores(anterior, -1)
+                for nombre in anterior["cliente"].keys() - resumenes[mes]["cliente"].keys():
+                    nombres.quitar({"id": (mes, nombre), "nombre": nombre})
+            estadisticas.sumar_contadores(resumenes[mes])
+            for nombre in resumenes[mes]["cliente"]:
+                nombres.agregar({"id": (mes, nombre), "nombre": nombre})
+        diario_turnos.escribir_atomico(self.ruta_resumen(), resumenes, indent=None)
+        self._guardar_derivado(self.ruta_nombres(), nombres)
+        self._guardar_derivado(self.ruta_estadisticas(), estadisticas)
+
+    def estadisticas(self, actuales, top=5):
+        """
+        Resumen de estadísticas de `actuales` (EstadisticasTurnos de lo no
+        archivado) más todos los meses archivados.
+
+        Categorías y bandas son pocas y se suman; para el ranking de clientes
+        sólo se combinan los candidatos de arriba de cada lado (ver
+        `top_combinado`).
+        """
+        archivadas = self.estadisticas_archivadas()
+        categorias, bandas = Counter(actuales.contadores["categoria"]), Counter(actuales.contadores["banda"])
+        categorias.update(archivadas.contadores["categoria"])
+        bandas.update(archivadas.contadores["banda"])
+        return {
+            "total": actuales.total + archivadas.total,
+            "clientes": top_combinado(actuales, archivadas, top),
+            "categorias": dict(categorias),
+            "bandas": dict(bandas),
+        }
+
+    def buscar(self, texto):
+        """
+        Turnos archivados cuyo nombre coincide con el texto, por relevancia
+        (y dentro de cada nombre por mes y día).
+
+        Cada mes donde aparece alguno de los nombres se recorre una sola vez.
+        """
+        posiciones = {}
+        for posicion, (mes, nombre) in enumerate(self.nombres().buscar(texto)):
+            posiciones.setdefault(mes, {})[nombre] = posicion
+        encontrados = []
+        for mes, por_nombre in posiciones.items():
+            if not os.path.exists(self.ruta_mes(mes)):
+                continue
+            archivo = self.archivo_mes(mes)
+            codigos = archivo.codigos("nombre")
+            orden = {codigos[nombre]: posicion for nombre, posicion in por_nombre.items() if nombre in codigos}
+            columna = archivo.columna("nombre")
+            encontrados.extend((orden[columna[fila]], fila, archivo) for fila in archivo.con_nombres(orden))
+        encontrados.sort(key=lambda e: e[:2])
+        return [archivo.turno(fila) for _, fila, archivo in encontrados]
+
+    def archivos(self, desde=None, hasta=None):
+        """ArchivoHistorico de los meses que se cruzan con el rango."""
+        return [self.archivo_mes(mes) for mes in self.meses(desde, hasta)]
@@ -1,49 +1,163 @@
-import json
-from datetime import datetime
-
-def cargar_feriados():
-    """Carga la lista de feriados desde un archivo JSON."""
-    try:
-        with open("feriados.json", "r", encoding="utf-8") as f:
-            datos = json.load(f)
-            return datos.get("feriados", [])  
-    except FileNotFoundError:
-        print("⚠ Error: No se encontró el archivo 'feriados.json'.")
-        return []
-    except json.JSONDecodeError:
-        print("⚠ Error: Formato incorrecto en 'feriados.json'.")
-        return []
-
-FERIADOS_ARG = cargar_feriados()
-
-def turno_disponible(clientes, fecha, hora):
-    """Verifica si el horario ya está ocupado."""
-    for turno in clientes:
-        if "fecha" in turno and "hora" in turno:  # Previene KeyError
-            if turno["fecha"] == fecha and turno["hora"] == hora:
-                return False  # Turno ya ocupado
-    return True  # Turno disponible
-
-
-def horario_disponible(clientes, categoria, hora, fecha):
-    """Verifica disponibilidad de horarios evitando feriados."""
-    try:
-        fecha_turno = datetime.strptime(fecha, "%Y-%m-%d")
-        hora_turno = datetime.strptime(hora, "%H:%M")
-    except ValueError:
-        return False
-
-    if fecha_turno.strftime("%Y-%m-%d") in FERIADOS_ARG:
-        return False  
-
-    for turno in clientes:
-        if turno.get("categoria") == categoria and turno.get("fecha") == fecha:
-            hora_existente = datetime.strptime(turno["hora"], "%H:%M")
-            if abs((hora_turno - hora_existente).total_seconds()) / 3600 < 1:
-                return False
-    return True
-
-
-
-
-
+import json
+from datetime import date, datetime, timedelta
+import cache_archivos
+from validaciones import DIAS_LIMITE, DIAS_VALIDOS
+
+ARCHIVO_FERIADOS = "feriados.json"
+
+def _leer_feriados():
+    with open(ARCHIVO_FERIADOS, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _datos_feriados():
+    """Contenido de feriados.json (se relee sólo si el archivo cambió); {} si falta o está mal."""
+    try:
+        return cache_archivos.cargar_cacheado((ARCHIVO_FERIADOS,), _leer_feriados)
+    except FileNotFoundError:
+        print("⚠ Error: No se encontró el archivo 'feriados.json'.")
+        return {}
+    except json.JSONDecodeError:
+        print("⚠ Error: Formato incorrecto en 'feriados.json'.")
+        return {}
+
+def cargar_feriados():
+    """Carga la lista de feriados desde un archivo JSON (se relee sólo si el archivo cambió)."""
+    return _datos_feriados().get("feriados", [])
+
+FERIADOS_ARG = cargar_feriados()
+
+
+def _a_fecha(valor):
+    """date a partir de un date/datetime o de un texto YYYY-MM-DD (None si no se puede)."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class Calendario:
+    """
+    Días en que se pueden tomar turnos: ni domingos ni feriados.
+
+    Los feriados pueden ser de cualquier año ("YYYY-MM-DD") o repetirse
+    todos los años ("MM-DD"). Para el horizonte de reservas (desde `desde`
+    hasta DIAS_LIMITE días después) se precalcula un `bytearray` con un byte
+    por día, así que preguntar si un día se puede reservar es un acceso por
+    posición y el próximo día hábil se busca con `find`. Los días fuera del
+    horizonte se calculan en el momento.
+    """
+
+    def __init__(self, feriados=(), recurrentes=(), desde=None, dias=DIAS_LIMITE):
+        self.feriados = {f for f in map(_a_fecha, feriados) if f}
+        self.recurrentes = set()
+        for texto in recurrentes:
+            dia = _a_fecha(f"2000-{texto}")  # 2000 es bisiesto: admite "02-29"
+            if dia:
+                self.recurrentes.add((dia.month, dia.day))
+        self.desde = _a_fecha(desde) or date.today()
+        self._inicio = self.desde.toordinal()
+        self.reservables = bytearray(
+            self._calcular(self.desde + timedelta(days=d)) for d in range(dias + 1)
+        )
+
+    def es_feriado(self, fecha):
+        dia = _a_fecha(fecha)
+        return dia is not None and (dia in self.feriados or (dia.month, dia.day) in self.recurrentes)
+
+    def __contains__(self, fecha):
+        # Permite usar el calendario donde antes se usaba la lista: `fecha in feriados`.
+        return self.es_feriado(fecha)
+
+    def _calcular(self, dia):
+        return dia.weekday() in DIAS_VALIDOS and not self.es_feriado(dia)
+
+    def es_reservable(self, fecha):
+        """True si ese día (date o YYYY-MM-DD) no es domingo ni feriado."""
+        dia = _a_fecha(fecha)
+        if dia is None:
+            return False
+        posicion = dia.toordinal() - self._inicio
+        if 0 <= posicion < len(self.reservables):
+            return bool(self.reservables[posicion])
+        return self._calcular(dia)
+
+    def proximo_reservable(self, desde=None):
+        """El primer día reservable a partir de `desde` inclusive (por defecto, el inicio del calendario)."""
+        dia = _a_fecha(desde) if desde is not None else self.desde
+        if dia is None:
+            return None
+        posicion = dia.toordinal() - self._inicio
+        if 0 <= posicion < len(self.reservables):
+            encontrado = self.reservables.find(1, posicion)
+            if encontrado >= 0:
+                return self.desde + timedelta(days=encontrado)
+            dia = self.desde + timedelta(days=len(self.reservables))
+        for _ in range(366):
+            if self._calcular(dia):
+                return dia
+            dia += timedelta(days=1)
+        return None
+
+    def dias_reservables(self, desde=None, hasta=None):
+        """Días reservables del horizonte entre `desde` y `hasta` (inclusive)."""
+        inicio = max(0, (_a_fecha(desde) or self.desde).toordinal() - self._inicio)
+        fin = len(self.reservables) - 1
+        if _a_fecha(hasta):
+            fin = min(fin, _a_fecha(hasta).toordinal() - self._inicio)
+        posicion = self.reservables.find(1, inicio, fin + 1) if inicio <= fin else -1
+        while posicion >= 0:
+            yield self.desde + timedelta(days=posicion)
+            posicion = self.reservables.find(1, posicion + 1, fin + 1)
+
+
+_calendario = None
+_calendario_datos = None
+
+def obtener_calendario():
+    """
+    Calendario de feriados.json desde hoy.
+
+    Se arma una vez y se reutiliza mientras el archivo no cambie y no cambie el día.
+    """
+    global _calendario, _calendario_datos
+    datos = _datos_feriados()
+    if _calendario is None or _calendario_datos is not datos or _calendario.desde != date.today():
+        _calendario = Calendario(datos.get("feriados", []), datos.get("recurrentes", []))
+        _calendario_datos = datos
+    return _calendario
+
+def turno_disponible(clientes, fecha, hora):
+    """Verifica si el horario ya está ocupado."""
+    for turno in clientes:
+        if "fecha" in turno and "hora" in turno:  # Previene KeyError
+            if turno["fecha"] == fecha and turno["hora"] == hora:
+                return False  # Turno ya ocupado
+    return True  # Turno disponible
+
+
+def horario_disponible(clientes, categoria, hora, fecha):
+    """Verifica disponibilidad de horarios evitando feriados."""
+    try:
+        fecha_turno = datetime.strptime(fecha, "%Y-%m-%d")
+        hora_turno = datetime.strptime(hora, "%H:%M")
+    except ValueError:
+        return False
+
+    if obtener_calendario().es_feriado(fecha_turno):
+        return False
+
+    for turno in clientes:
+        if turno.get("categoria") == categoria and turno.get("fecha") == fecha:
+            hora_existente = datetime.strptime(turno["hora"], "%H:%M")
+            if abs((hora_turno - hora_existente).total_seconds()) / 3600 < 1:
+                return False
+    return True
+
+
+
+
+
@@ -0,0 +1,65 @@
+import marshal
+import os
+import struct
+import sys
+import zlib
+
+import metricas
+from indice_turnos import IndiceTurnos
+
+MAGICO = b"TURNOSIM"
+FORMATO = 1  # Subirlo si cambia lo que guarda IndiceTurnos.a_estado: las imágenes viejas se descartan
+ENCABEZADO = struct.Struct("<8sIIIQ")  # Mágico, formato, versión de marshal, CRC32 y largo de los datos
+
+
+def ruta_imagen(ruta_base):
+    return ruta_base + ".imagen"
+
+def guardar(ruta_base, indice, firma, registros=0):
+    """
+    Guarda el índice (turnos por columnas, ocupación, reservas, estadísticas
+    y nombres) en una imagen binaria junto a clientes.json.
+
+    `firma` es la de los archivos de turnos que el índice refleja (ver
+    cache_archivos.firma) y `registros` las operaciones del diario incluidas.
+    No se hace fsync: una imagen cortada no pasa el CRC y se vuelve a armar
+    desde el JSON.
+    """
+    datos = marshal.dumps({
+        "firma": firma,
+        "registros": registros,
+        "orden_bytes": sys.byteorder,
+        "indice": indice.a_estado(),
+    })
+    ruta = ruta_imagen(ruta_base)
+    temporal = f"{ruta}.{os.getpid()}.tmp"  # La pueden escribir a la vez procesos que sólo leen
+    with open(temporal, "wb") as f:
+        f.write(ENCABEZADO.pack(MAGICO, FORMATO, marshal.version, zlib.crc32(datos), len(datos)))
+        f.write(datos)
+        metricas.sumar("bytes_escritos", f.tell(), archivo=os.path.basename(ruta))
+    os.replace(temporal, ruta)
+
+def cargar(ruta_base, vigente):
+    """
+    Contenido de la imagen ({"firma", "registros", "indice"}), o None si no
+    existe, está dañada, es de otro formato o `vigente(firma)` dice que los
+    archivos cambiaron desde que se guardó.
+    """
+    try:
+        with open(ruta_imagen(ruta_base), "rb") as f:
+            magico, formato, version, suma, largo = ENCABEZADO.unpack(f.read(ENCABEZADO.size))
+            datos = f.read()
+    except (OSError, struct.error):
+        return None
+    if (magico, formato, version) != (MAGICO, FORMATO, marshal.version):
+        return None
+    if largo != len(datos) or zlib.crc32(datos) != suma:
+        return None
+    try:
+        contenido = marshal.loads(datos)
+        if contenido["orden_bytes"] != sys.byteorder or not vigente(contenido["firma"]):
+            return None
+        contenido["indice"] = IndiceTurnos.desde_estado(contenido["indice"])
+    except (EOFError, ValueError, TypeError, KeyError, IndexError):
+        return None
+    return contenido
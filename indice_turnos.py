@@ -0,0 +1,201 @@
+from collections import Counter
+from almacen_columnar import AlmacenColumnar, FilaTurno
+from busqueda_nombres import IndiceNombres
+from estadisticas import EstadisticasTurnos
+
+
+def normalizar_nombre(nombre):
+    """Normaliza un nombre para comparar reservas (sin espacios extremos ni mayúsculas)."""
+    return (nombre or "").strip().lower()
+
+def clave_franja(turno):
+    """Clave (categoria, fecha, hora) usada para contar la ocupación."""
+    return (turno.get("categoria"), turno.get("fecha"), turno.get("hora"))
+
+def clave_reserva(turno):
+    """Clave (nombre normalizado, fecha, hora) usada para detectar duplicados."""
+    return (normalizar_nombre(turno.get("nombre")), turno.get("fecha"), turno.get("hora"))
+
+
+class IndiceTurnos:
+    """
+    Índice en memoria de los turnos cargados.
+
+    Mantiene la cantidad de turnos por (categoria, fecha, hora), el ID de la
+    reserva de cada cliente por (nombre, fecha, hora), el turno de cada ID y
+    las estadísticas, para que los controles de capacidad y duplicados, las
+    búsquedas por ID y los resúmenes no tengan que recorrer toda la lista.
+
+    Los turnos en sí viven en un AlmacenColumnar: lo que se devuelve (lista,
+    obtener) son sus FilaTurno, que se usan como los diccionarios de antes.
+    """
+
+    def __init__(self, clientes=()):
+        self.ocupacion = Counter()
+        self.reservas = {}
+        self._cantidad_reservas = Counter()
+        self.por_id = {}
+        self.ultimo_id = 0
+        self.total = 0
+        self._lista = None
+        self._nombres = None
+        self.estadisticas = EstadisticasTurnos()
+        self.almacen = AlmacenColumnar()
+        for turno in clientes:
+            self.agregar(turno)
+
+    def agregar(self, turno):
+        """Registra un turno en el índice (se copia al almacén por columnas) y devuelve su fila."""
+        if not (isinstance(turno, FilaTurno) and turno.almacen is self.almacen):
+            turno = self.almacen.agregar(turno)
+        id_turno = turno.get("id")
+        if isinstance(id_turno, int):
+            self.por_id[id_turno] = turno
+            self.ultimo_id = max(self.ultimo_id, id_turno)
+        self._lista = None
+        if self._nombres is not None:
+            self._nombres.agregar(turno)
+        self._contar(turno, 1)
+        self.total += 1
+        return turno
+
+    def quitar(self, turno):
+        """Quita un turno del índice."""
+        if self.por_id.get(turno.get("id")) is turno:
+            del self.por_id[turno["id"]]
+        if isinstance(turno, FilaTurno) and turno.almacen is self.almacen:
+            self.almacen.quitar(turno.fila)
+        self._lista = None
+        if self._nombres is not None:
+            self._nombres.quitar(turno)
+        self._contar(turno, -1)
+        self.total -= 1
+
+    def reemplazar(self, turno, nuevo):
+        """Cambia todos los campos de un turno por los de `nuevo`, sin moverlo de lugar en la lista."""
+        if self._nombres is not None:
+            self._nombres.quitar(turno)
+        self._contar(turno, -1)
+        for clave in [clave for clave in turno if clave not in nuevo]:
+            del turno[clave]
+        for clave, valor in nuevo.items():
+            turno[clave] = valor
+        self._contar(turno, 1)
+        if self._nombres is not None:
+            self._nombres.agregar(turno)
+
+    def mover(self, turno, nueva_fecha, nueva_hora):
+        """Cambia la fecha y hora de un turno manteniendo el índice al día."""
+        self._contar(turno, -1)
+        turno["fecha"] = nueva_fecha
+        turno["hora"] = nueva_hora
+        self._contar(turno, 1)
+
+    def _contar(self, turno, delta):
+        self.estadisticas.sumar(turno, delta)
+        franja = clave_franja(turno)
+        self.ocupacion[franja] += delta
+        if self.ocupacion[franja] <= 0:
+            del self.ocupacion[franja]
+
+        clave = clave_reserva(turno)
+        self._cantidad_reservas[clave] += delta
+        if delta > 0:
+            self.reservas.setdefault(clave, turno.get("id"))
+        elif self._cantidad_reservas[clave] <= 0:
+            del self._cantidad_reservas[clave]
+            self.reservas.pop(clave, None)
+        elif self.reservas.get(clave) == turno.get("id"):
+            # Queda otra reserva legacy con la misma clave: no se conoce su ID.
+            self.reservas[clave] = None
+
+    def obtener(self, id_turno):
+        """Turno con ese ID, o None."""
+        return self.por_id.get(id_turno)
+
+    def a_estado(self):
+        """
+        El índice completo como datos simples (para la imagen binaria).
+
+        Las filas del almacén se guardan compactadas: primero las de `por_id`
+        en su orden (el orden de la lista) y después las vivas sin ID.
+        """
+        filas = [turno.fila for turno in self.por_id.values()]
+        con_id = set(filas)
+        filas.extend(fila for fila, viva in enumerate(self.almacen.vivas) if viva and fila not in con_id)
+        return {
+            "almacen": self.almacen.a_estado(filas),
+            "con_id": len(con_id),
+            "ocupacion": dict(self.ocupacion),
+            "reservas": self.reservas,
+            "cantidad_reservas": dict(self._cantidad_reservas),
+            "ultimo_id": self.ultimo_id,
+            "total": self.total,
+            "estadisticas": self.estadisticas.a_estado(),
+            "nombres": self._nombres.a_estado() if self._nombres is not None else None,
+        }
+
+    @classmethod
+    def desde_estado(cls, estado):
+        """Índice armado a partir de `a_estado`, sin recorrer los turnos uno por uno."""
+        indice = cls()
+        indice.almacen = AlmacenColumnar.desde_estado(estado["almacen"])
+        vistas, ids = indice.almacen.vistas, indice.almacen.col_id
+        indice.por_id = {ids[fila]: vistas[fila] for fila in range(estado["con_id"])}
+        indice.ocupacion = Counter(estado["ocupacion"])
+        indice.reservas = estado["reservas"]
+        indice._cantidad_reservas = Counter(estado["cantidad_reservas"])
+        indice.ultimo_id = estado["ultimo_id"]
+        indice.total = estado["total"]
+        indice.estadisticas = EstadisticasTurnos.desde_estado(estado["estadisticas"])
+        if estado["nombres"] is not None:
+            indice._nombres = IndiceNombres.desde_estado(estado["nombres"])
+        return indice
+
+    def lista(self):
+        """Turnos con ID en orden de alta (la lista se arma sólo después de un cambio)."""
+        if self._lista is None:
+            self._lista = list(self.por_id.values())
+        return self._lista
+
+    def nombres(self):
+        """Índice de trigramas de nombres; se arma en la primera búsqueda y luego se mantiene."""
+        if self._nombres is None:
+            self._nombres = IndiceNombres(self.por_id.values())
+        return self._nombres
+
+    def cantidad(self, categoria, fecha, hora, excluir=None):
+        """Cantidad de turnos de la categoría en esa fecha y hora."""
+        cantidad = self.ocupacion.get((categoria, fecha, hora), 0)
+        if excluir is not None and clave_franja(excluir) == (categoria, fecha, hora):
+            cantidad -= 1
+        return cantidad
+
+    def tiene_reserva(self, nombre, fecha, hora, excluir=None):
+        """Indica si el cliente ya tiene un turno en esa fecha y hora."""
+        clave = (normalizar_nombre(nombre), fecha, hora)
+        cantidad = self._cantidad_reservas.get(clave, 0)
+        if excluir is not None and clave_reserva(excluir) == clave:
+            cantidad -= 1
+        return cantidad > 0
+
+    def reserva(self, nombre, fecha, hora):
+        """ID del turno del cliente en esa fecha y hora (None si no tiene o no tiene ID)."""
+        return self.reservas.get((normalizar_nombre(nombre), fecha, hora))
+
+
+_ultimo = {"clientes": None, "indice": None}
+
+def indice_para(clientes):
+    """
+    Devuelve el índice de la lista de turnos recibida.
+
+    El índice se construye una sola vez por lista cargada y luego se mantiene
+    con agregar/quitar/mover; si la lista cambió de tamaño por fuera se reconstruye.
+    """
+    indice = _ultimo["indice"]
+    if _ultimo["clientes"] is not clientes or indice.total != len(clientes):
+        indice = IndiceTurnos(clientes)
+        _ultimo["clientes"] = clientes
+        _ultimo["indice"] = indice
+    return indice
@@ -1,200 +1,536 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-from agregar_turno import agregar_turno, cancelar_turno, modificar_turno, exportar_csv, buscar_turno, cargar_clientes
-from servicios import CATEGORIAS
-from graficos import mostrar_estadisticas_completas
-from validaciones import (
-    validar_anticipacion, validar_fecha, validar_hora, validar_limite_4_meses, validar_nombre_completo,
-    validar_no_vacios, validar_dia_valido, turno_duplicado, validar_capacidad_categoria,
-    HORARIOS_VALIDOS, 
-)
-import subprocess
-
-def actualizar_servicios(event):
-    """Actualiza los servicios según la categoría seleccionada."""
-    categoria = combo_categoria.get()
-    combo_servicio["values"] = CATEGORIAS.get(categoria, [])
-
-def registrar_turno_gui():
-    """Registra turnos en la interfaz."""
-    nombre = entry_nombre.get()
-    categoria = combo_categoria.get()
-    servicio = combo_servicio.get()
-    fecha = entry_fecha.get()
-    hora = combo_hora.get()
-
-   
-    if not validar_no_vacios([nombre, categoria, servicio, fecha, hora]):
-        messagebox.showwarning("Campos vacíos", "Complete todos los campos.")
-        return
-
-    if not validar_nombre_completo(nombre):
-        messagebox.showwarning("Nombre inválido", "El nombre debe tener al menos 4 letras y solo contener letras y espacios.")
-        return
-
-    if not validar_fecha(fecha):
-        messagebox.showwarning("Fecha inválida", "Ingrese una fecha válida en formato YYYY-MM-DD y que no sea pasada.")
-        return
-
-    if not validar_dia_valido(fecha):
-        messagebox.showwarning("Día no disponible", "No se pueden registrar turnos los domingos.")
-        return
-
-    if not validar_hora(hora):
-        messagebox.showwarning("Hora inválida", "Ingrese una hora válida en punto o y media entre 10:00 y 18:00.")
-        return
-
-    if not validar_anticipacion(fecha, hora):
-        messagebox.showwarning(
-            "Anticipación insuficiente",
-            "Los turnos deben solicitarse con al menos 2 horas de anticipación."
-        )
-        return
-    
-    if not validar_limite_4_meses(fecha):
-        messagebox.showwarning(
-        "Fecha inválida", 
-        "No se pueden crear o modificar turnos con más de 4 meses de anticipación."
-    )
-        return
-
-    clientes = cargar_clientes()
-
-    turno = {
-        "nombre": nombre.strip(),
-        "categoria": categoria,
-        "servicio": servicio,
-        "fecha": fecha,
-        "hora": hora
-    }
-
-    
-    if turno_duplicado(clientes, turno):
-        messagebox.showerror("Duplicado", f"{nombre} ya tiene un turno registrado el {fecha} a las {hora}.")
-        return
-
-    
-    disponible, mensaje = validar_capacidad_categoria(clientes, categoria, fecha, hora)
-    if not disponible:
-        messagebox.showerror("Capacidad", mensaje)
-        return
-
-    
-    resultado = agregar_turno(turno)
-    messagebox.showinfo("Resultado", resultado)
-
-
-def cancelar_turno_gui():
-    nombre = entry_nombre.get()
-    resultado = cancelar_turno(nombre)
-    messagebox.showinfo("Resultado", resultado)
-
-def modificar_turno_gui():
-    nombre = entry_nombre.get()
-    nueva_fecha = entry_fecha.get()
-    nueva_hora = combo_hora.get()
-
-    if not validar_no_vacios([nombre, nueva_fecha, nueva_hora]):
-        messagebox.showwarning("Campos vacíos", "Complete los datos para modificar el turno.")
-        return
-
-    if not validar_fecha(nueva_fecha):
-        messagebox.showwarning("Fecha inválida", "Ingrese una fecha válida en formato YYYY-MM-DD y que no sea pasada.")
-        return
-
-    if not validar_dia_valido(nueva_fecha):
-        messagebox.showwarning("Día no válido", "No se pueden registrar turnos los domingos.")
-        return
-
-    if not validar_hora(nueva_hora):
-        messagebox.showwarning("Hora inválida", "Ingrese una hora válida en punto o y media entre 10:00 y 18:00.")
-        return
-
-    if not validar_anticipacion(nueva_fecha, nueva_hora):
-        messagebox.showwarning("Anticipación insuficiente", "Los turnos deben modificarse con al menos 2 horas de anticipación.")
-        return
-    
-    if not validar_limite_4_meses(nueva_fecha):
-        messagebox.showwarning(
-        "Fecha inválida", 
-        "No se pueden crear o modificar turnos con más de 4 meses de anticipación."
-    )
-        return
-    
-
-    clientes = cargar_clientes()
-
-    
-    turno_actual = next((t for t in clientes if t.get("nombre") == nombre), None)
-    if not turno_actual:
-        messagebox.showerror("Error", "Turno no encontrado.")
-        return
-
-    
-    clientes_sin_actual = [t for t in clientes if t != turno_actual]
-    ok, mensaje = validar_capacidad_categoria(clientes_sin_actual, turno_actual["categoria"], nueva_fecha, nueva_hora)
-    if not ok:
-        messagebox.showerror("Capacidad", mensaje)
-        return
-
-    
-    resultado = modificar_turno(nombre, nueva_fecha, nueva_hora)
-    messagebox.showinfo("Resultado", resultado)
-
-def exportar_turnos_gui():
-    exportar_csv()
-    messagebox.showinfo("Exportación", "Turnos exportados correctamente a turnos.csv.")
-
-def buscar_turno_gui():
-    nombre = entry_nombre.get()
-    if not nombre:
-        messagebox.showwarning("Campos vacíos", "Ingrese el nombre del cliente para buscar turnos.")
-        return
-
-    resultados = buscar_turno(nombre)
-    messagebox.showinfo("Resultado", "\n".join(resultados))
-
-def estadisticas_gui():
-    clientes = cargar_clientes()
-    if not clientes:
-        messagebox.showinfo("Información", "No hay turnos registrados para mostrar estadísticas.")
-        return
-    mostrar_estadisticas_completas(clientes)
-
-def abrir_cancelar_turnos():
-    subprocess.Popen(["python", "cancelar_turnos.py"])
-
-# Ventana principal
-root = tk.Tk()
-root.title("Sistema de Turnos Estética")
-root.geometry("420x520")
-
-tk.Label(root, text="Nombre del Cliente:").pack()
-entry_nombre = tk.Entry(root)
-entry_nombre.pack()
-
-tk.Label(root, text="Categoría de Servicio:").pack()
-combo_categoria = ttk.Combobox(root, values=list(CATEGORIAS.keys()), state="readonly")
-combo_categoria.pack()
-combo_categoria.bind("<<ComboboxSelected>>", actualizar_servicios)
-
-tk.Label(root, text="Servicio:").pack()
-combo_servicio = ttk.Combobox(root, state="readonly")
-combo_servicio.pack()
-
-tk.Label(root, text="Fecha (YYYY-MM-DD):").pack()
-entry_fecha = tk.Entry(root)
-entry_fecha.pack()
-
-tk.Label(root, text="Hora:").pack()
-combo_hora = ttk.Combobox(root, values=HORARIOS_VALIDOS, state="readonly")
-combo_hora.pack()
-
-tk.Button(root, text="Registrar Turno", command=registrar_turno_gui).pack(pady=3)
-tk.Button(root, text="Cancelar Turno", command=abrir_cancelar_turnos).pack(pady=3)
-tk.Button(root, text="Modificar Turno", command=modificar_turno_gui).pack(pady=3)
-tk.Button(root, text="Exportar Turnos a CSV", command=exportar_turnos_gui).pack(pady=3)
-tk.Button(root, text="Buscar Turno", command=buscar_turno_gui).pack(pady=3)
-tk.Button(root, text="Ver Estadísticas", command=estadisticas_gui).pack(pady=3)
-
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import metricas
+from agregar_turno import (
+    agendar_turno, mover_turno,
+    agendar_serie, cancelar_serie, mover_serie, turnos_por_nombre,
+    exportar_csv, buscar_turno, obtener_estadisticas,
+)
+from analisis_ocupacion import construir_matriz_ocupacion, rango_predeterminado
+from cancelar_turnos import CAMBIO_TURNOS, ventana_cancelar_turno
+from exportacion import ExportacionCancelada
+from segundo_plano import TrabajosEnSegundoPlano
+from series_turnos import FRECUENCIAS, describir_resultado
+from servicios import CATEGORIAS
+from graficos import mostrar_estadisticas_completas
+from disponibilidad import construir_disponibilidad, describir_horarios, sugerir_horarios
+from validaciones import (
+    validar_no_vacios, validar_formato_fecha, HORARIOS_VALIDOS,
+    ANTICIPACION, CAMPOS_VACIOS, CAPACIDAD, DOMINGO, DUPLICADO, FECHA_INVALIDA, FECHA_PASADA,
+    FERIADO, FUERA_DE_LIMITE, HORA_INVALIDA, NO_ENCONTRADO, NOMBRE_INVALIDO, CONFLICTO,
+)
+import threading
+
+# Los manejadores de los botones leen los widgets, mandan el trabajo con el
+# almacenamiento a `trabajos` (otro hilo) y muestran el resultado cuando
+# vuelve al hilo de Tkinter.
+
+def actualizar_servicios(event):
+    """Actualiza los servicios según la categoría seleccionada."""
+    categoria = combo_categoria.get()
+    combo_servicio["values"] = CATEGORIAS.get(categoria, [])
+
+TITULOS_ERROR = {
+    CAMPOS_VACIOS: "Campos vacíos",
+    NOMBRE_INVALIDO: "Nombre inválido",
+    FECHA_INVALIDA: "Fecha inválida",
+    FECHA_PASADA: "Fecha inválida",
+    FUERA_DE_LIMITE: "Fecha inválida",
+    DOMINGO: "Día no disponible",
+    FERIADO: "Día no disponible",
+    HORA_INVALIDA: "Hora inválida",
+    ANTICIPACION: "Anticipación insuficiente",
+    DUPLICADO: "Duplicado",
+    CAPACIDAD: "Capacidad",
+    NO_ENCONTRADO: "Error",
+    CONFLICTO: "Turno modificado en otro puesto",
+}
+
+def detalle_error(error, categoria, fecha, hora):
+    """Texto a mostrar para un ErrorValidacion; si no hay lugar suma los horarios libres más cercanos (lee el almacenamiento)."""
+    if error.codigo == CAPACIDAD:
+        return mensaje_con_sugerencias(error.mensaje, categoria, fecha, hora)
+    return error.mensaje
+
+def mostrar_error_validacion(error, mensaje):
+    """Muestra un ErrorValidacion con el texto armado por detalle_error."""
+    titulo = TITULOS_ERROR.get(error.codigo, "Error")
+    if error.codigo in (CAPACIDAD, DUPLICADO, NO_ENCONTRADO, CONFLICTO):
+        messagebox.showerror(titulo, mensaje)
+    else:
+        messagebox.showwarning(titulo, mensaje)
+
+def registrar_turno_gui():
+    """Registra turnos en la interfaz."""
+    turno = {
+        "nombre": entry_nombre.get().strip(),
+        "categoria": combo_categoria.get(),
+        "servicio": combo_servicio.get(),
+        "fecha": entry_fecha.get().strip(),
+        "hora": combo_hora.get()
+    }
+
+    def trabajar():
+        nuevo_id, error = agendar_turno(turno)
+        if error:
+            return None, error, detalle_error(error, turno["categoria"], turno["fecha"], turno["hora"])
+        return nuevo_id, None, None
+
+    def mostrar(resultado):
+        nuevo_id, error, mensaje = resultado
+        if error:
+            mostrar_error_validacion(error, mensaje)
+            return
+        avisar_cambio()
+        messagebox.showinfo("Resultado", f"Turno de {turno['nombre']} (ID: {nuevo_id}) agendado correctamente.")
+
+    trabajos.ejecutar(trabajar, al_terminar=mostrar, deshabilitar=[boton_registrar])
+
+
+def leer_id_turno():
+    """ID ingresado en la ventana principal (None si está vacío o no es un número)."""
+    texto = entry_id.get().strip()
+    return int(texto) if texto.isdigit() else None
+
+def modificar_turno_gui():
+    nombre = entry_nombre.get()
+    id_turno = leer_id_turno()
+    nueva_fecha = entry_fecha.get().strip()
+    nueva_hora = combo_hora.get()
+
+    if not validar_no_vacios([nombre or id_turno, nueva_fecha, nueva_hora]):
+        messagebox.showwarning("Campos vacíos", "Complete los datos para modificar el turno.")
+        return
+
+    def trabajar():
+        elegido = id_turno
+        if elegido is None:
+            # Sin ID se toma el primer turno con ese nombre, como antes.
+            encontrados = turnos_por_nombre(nombre)
+            if not encontrados:
+                return None, None, None
+            elegido = encontrados[0]["id"]
+        turno_actual, error = mover_turno(elegido, nueva_fecha, nueva_hora)
+        if error:
+            categoria = turno_actual["categoria"] if turno_actual else None
+            return turno_actual, error, detalle_error(error, categoria, nueva_fecha, nueva_hora)
+        return turno_actual, None, None
+
+    def mostrar(resultado):
+        turno_actual, error, mensaje = resultado
+        if error:
+            mostrar_error_validacion(error, mensaje)
+        elif turno_actual is None:
+            messagebox.showerror("Error", "Turno no encontrado.")
+        else:
+            avisar_cambio()
+            messagebox.showinfo(
+                "Resultado",
+                f"Turno de {turno_actual.get('nombre')} modificado a {nueva_fecha} a las {nueva_hora}."
+            )
+
+    trabajos.ejecutar(trabajar, al_terminar=mostrar, deshabilitar=[boton_modificar])
+
+def series_gui():
+    """Ventana para agendar una serie con los datos del formulario, o cancelar/mover una serie por su ID."""
+    ventana = tk.Toplevel(root)
+    ventana.title("Series de turnos")
+    ventana.geometry("340x420")
+
+    tk.Label(ventana, text="Nueva serie (con los datos de la ventana principal)", font=("Arial", 10, "bold")).pack(pady=(8, 4))
+    tk.Label(ventana, text="Frecuencia:").pack()
+    combo_frecuencia = ttk.Combobox(ventana, values=list(FRECUENCIAS), state="readonly")
+    combo_frecuencia.current(0)
+    combo_frecuencia.pack()
+    tk.Label(ventana, text="Hasta (YYYY-MM-DD, opcional):").pack()
+    entry_hasta = tk.Entry(ventana)
+    entry_hasta.pack()
+    tk.Label(ventana, text="Cantidad de turnos (opcional):").pack()
+    entry_repeticiones = tk.Entry(ventana)
+    entry_repeticiones.pack()
+
+    def agendar():
+        turno = {
+            "nombre": entry_nombre.get().strip(),
+            "categoria": combo_categoria.get(),
+            "servicio": combo_servicio.get(),
+            "fecha": entry_fecha.get().strip(),
+            "hora": combo_hora.get(),
+        }
+        hasta = entry_hasta.get().strip() or None
+        repeticiones = entry_repeticiones.get().strip()
+        if hasta and not validar_formato_fecha(hasta):
+            messagebox.showwarning("Fecha inválida", "Use el formato YYYY-MM-DD.", parent=ventana)
+            return
+        if repeticiones and not repeticiones.isdigit():
+            messagebox.showwarning("Cantidad inválida", "La cantidad debe ser un número.", parent=ventana)
+            return
+
+        def mostrar(resultado):
+            if resultado.serie is not None:
+                entry_serie.delete(0, tk.END)
+                entry_serie.insert(0, resultado.serie)
+                avisar_cambio()
+            messagebox.showinfo("Serie", describir_resultado(resultado, turno["nombre"]), parent=ventana)
+
+        trabajos.ejecutar(
+            agendar_serie, turno, FRECUENCIAS[combo_frecuencia.get()], hasta, int(repeticiones) if repeticiones else None,
+            al_terminar=mostrar, deshabilitar=[boton_agendar],
+        )
+
+    boton_agendar = tk.Button(ventana, text="Agendar serie", command=agendar)
+    boton_agendar.pack(pady=6)
+
+    tk.Label(ventana, text="Serie existente", font=("Arial", 10, "bold")).pack(pady=(10, 4))
+    tk.Label(ventana, text="ID de la serie:").pack()
+    entry_serie = tk.Entry(ventana)
+    entry_serie.pack()
+    tk.Label(ventana, text="Correr días (p. ej. 7 o -1) y/o nueva hora:").pack()
+    movimiento = tk.Frame(ventana)
+    movimiento.pack()
+    entry_dias = tk.Entry(movimiento, width=6)
+    entry_dias.pack(side=tk.LEFT, padx=3)
+    combo_nueva_hora = ttk.Combobox(movimiento, values=[""] + HORARIOS_VALIDOS, state="readonly", width=8)
+    combo_nueva_hora.pack(side=tk.LEFT, padx=3)
+
+    def mover():
+        serie = entry_serie.get().strip()
+        dias = entry_dias.get().strip() or "0"
+        if not serie or not dias.lstrip("-").isdigit():
+            messagebox.showwarning("Datos incompletos", "Ingrese el ID de la serie y los días (un número).", parent=ventana)
+            return
+
+        def mostrar(resultado):
+            movidos, errores = resultado
+            if errores:
+                detalle = "\n".join(f"{fecha or ''} {error.mensaje}".strip() for fecha, error in errores)
+                messagebox.showerror("Serie", f"No se movió ningún turno de la serie:\n{detalle}", parent=ventana)
+                return
+            avisar_cambio()
+            messagebox.showinfo("Serie", f"Serie {serie}: {movidos} turno(s) movidos.", parent=ventana)
+
+        trabajos.ejecutar(mover_serie, serie, int(dias), combo_nueva_hora.get() or None, al_terminar=mostrar)
+
+    def cancelar():
+        serie = entry_serie.get().strip()
+        if not serie:
+            messagebox.showwarning("Datos incompletos", "Ingrese el ID de la serie.", parent=ventana)
+            return
+        if not messagebox.askyesno("Confirmar", f"¿Cancelar todos los turnos pendientes de la serie {serie}?", parent=ventana):
+            return
+
+        def mostrar(mensaje):
+            avisar_cambio()
+            messagebox.showinfo("Serie", mensaje, parent=ventana)
+
+        trabajos.ejecutar(cancelar_serie, serie, al_terminar=mostrar)
+
+    botones = tk.Frame(ventana)
+    botones.pack(pady=6)
+    tk.Button(botones, text="Mover serie", command=mover).pack(side=tk.LEFT, padx=3)
+    tk.Button(botones, text="Cancelar serie", command=cancelar).pack(side=tk.LEFT, padx=3)
+
+def mensaje_con_sugerencias(mensaje, categoria, fecha, hora):
+    sugerencias = sugerir_horarios(categoria, fecha, hora)
+    if not sugerencias:
+        return mensaje
+    return f"{mensaje}\n\nHorarios libres más cercanos:\n{describir_horarios(sugerencias)}"
+
+def horarios_libres_gui():
+    categoria = combo_categoria.get()
+    fecha = entry_fecha.get()
+    if not categoria:
+        messagebox.showwarning("Campos vacíos", "Seleccione una categoría para ver los horarios libres.")
+        return
+
+    def trabajar():
+        matriz = construir_disponibilidad()
+        if fecha:
+            libres = [(fecha, hora, lugares) for hora, lugares in matriz.libres_del_dia(fecha, categoria)]
+            return f"Horarios libres de {categoria} el {fecha}", libres
+        return f"Próximos horarios libres de {categoria}", matriz.proximos_libres(categoria, cantidad=10)
+
+    def mostrar(resultado):
+        titulo, libres = resultado
+        if not libres:
+            messagebox.showinfo("Horarios libres", "No hay horarios libres para esa búsqueda.")
+            return
+        messagebox.showinfo("Horarios libres", f"{titulo}:\n{describir_horarios(libres)}")
+
+    trabajos.ejecutar(trabajar, al_terminar=mostrar)
+
+def exportar_turnos_gui():
+    ventana = tk.Toplevel(root)
+    ventana.title("Exportar Turnos")
+    ventana.geometry("320x400")
+
+    tk.Label(ventana, text="Desde (YYYY-MM-DD, opcional):").pack()
+    entry_desde = tk.Entry(ventana)
+    entry_desde.pack()
+
+    tk.Label(ventana, text="Hasta (YYYY-MM-DD, opcional):").pack()
+    entry_hasta = tk.Entry(ventana)
+    entry_hasta.pack()
+
+    tk.Label(ventana, text="Categoría (opcional):").pack()
+    combo_cat = ttk.Combobox(ventana, values=[""] + list(CATEGORIAS.keys()), state="readonly")
+    combo_cat.pack()
+
+    tk.Label(ventana, text="Servicio (opcional):").pack()
+    combo_serv = ttk.Combobox(ventana, state="readonly")
+    combo_serv.pack()
+    combo_cat.bind("<<ComboboxSelected>>", lambda e: combo_serv.configure(values=[""] + CATEGORIAS.get(combo_cat.get(), [])))
+
+    tk.Label(ventana, text="Archivo:").pack()
+    entry_ruta = tk.Entry(ventana)
+    entry_ruta.insert(0, "turnos.csv")
+    entry_ruta.pack()
+
+    var_gzip = tk.BooleanVar(value=False)
+    tk.Checkbutton(ventana, text="Comprimir (gzip)", variable=var_gzip).pack()
+    var_incremental = tk.BooleanVar(value=False)
+    tk.Checkbutton(ventana, text="Sólo cambios desde la última exportación", variable=var_incremental).pack()
+
+    def exportar():
+        desde, hasta = entry_desde.get().strip(), entry_hasta.get().strip()
+        for fecha in (desde, hasta):
+            if fecha and not validar_formato_fecha(fecha):
+                messagebox.showerror("Fecha inválida", "Use el formato YYYY-MM-DD.", parent=ventana)
+                return
+        ruta = entry_ruta.get().strip() or "turnos.csv"
+        if var_gzip.get() and not ruta.endswith(".gz"):
+            ruta += ".gz"
+
+        categoria, servicio = combo_cat.get() or None, combo_serv.get() or None
+        comprimir, incremental = var_gzip.get(), var_incremental.get()
+        cancelacion = threading.Event()
+        estado["cancelacion"] = cancelacion
+
+        def avanzar(cantidad):
+            if ventana.winfo_exists():
+                etiqueta_progreso.configure(text=f"Exportando... {cantidad} turno(s)")
+
+        def trabajar():
+            # Corre en otro hilo: el progreso se pasa al hilo de Tkinter.
+            return exportar_csv(
+                ruta, desde or None, hasta or None, categoria, servicio,
+                comprimir=comprimir, incremental=incremental, cancelacion=cancelacion,
+                progreso=lambda cantidad: trabajos.en_hilo_principal(avanzar, cantidad),
+            )
+
+        def terminar():
+            estado["cancelacion"] = None
+            if not ventana.winfo_exists():
+                return False
+            barra.stop()
+            boton_cancelar.configure(state="disabled")
+            etiqueta_progreso.configure(text="")
+            return True
+
+        def mostrar(mensaje):
+            if terminar():
+                messagebox.showinfo("Exportación", mensaje, parent=ventana)
+
+        def fallar(error):
+            if not terminar():
+                return
+            if isinstance(error, ExportacionCancelada):
+                messagebox.showinfo("Exportación", str(error), parent=ventana)
+            elif isinstance(error, OSError):
+                messagebox.showerror("Exportación", f"No se pudo exportar: {error}", parent=ventana)
+            else:
+                messagebox.showerror("Exportación", f"Error al exportar: {error}", parent=ventana)
+
+        boton_cancelar.configure(state="normal")
+        etiqueta_progreso.configure(text="Exportando...")
+        barra.start(15)
+        trabajos.ejecutar(
+            trabajar, al_terminar=mostrar, al_fallar=fallar, deshabilitar=[boton], cancelacion=cancelacion
+        )
+
+    def cancelar():
+        if estado["cancelacion"] is not None:
+            estado["cancelacion"].set()
+            etiqueta_progreso.configure(text="Cancelando...")
+
+    def cerrar():
+        cancelar()  # Cerrar la ventana no deja una exportación corriendo
+        ventana.destroy()
+
+    estado = {"cancelacion": None}
+    boton = tk.Button(ventana, text="Exportar", command=exportar)
+    boton.pack(pady=8)
+    barra = ttk.Progressbar(ventana, mode="indeterminate", length=220)
+    barra.pack()
+    etiqueta_progreso = tk.Label(ventana, text="")
+    etiqueta_progreso.pack()
+    boton_cancelar = tk.Button(ventana, text="Cancelar exportación", command=cancelar, state="disabled")
+    boton_cancelar.pack(pady=4)
+    ventana.protocol("WM_DELETE_WINDOW", cerrar)
+
+def buscar_turno_gui():
+    nombre = entry_nombre.get()
+    if not nombre:
+        messagebox.showwarning("Campos vacíos", "Ingrese el nombre del cliente para buscar turnos.")
+        return
+
+    trabajos.ejecutar(
+        buscar_turno, nombre,
+        al_terminar=lambda resultados: messagebox.showinfo("Resultado", "\n".join(resultados)),
+    )
+
+def estadisticas_gui():
+    def trabajar():
+        return obtener_estadisticas(top=5)["resumen"], construir_matriz_ocupacion(*rango_predeterminado())
+
+    def mostrar(resultado):
+        resumen, ocupacion = resultado
+        if not resumen["total"]:
+            messagebox.showinfo("Información", "No hay turnos registrados para mostrar estadísticas.")
+            return
+        with metricas.tramo("render"):
+            mostrar_estadisticas_completas(resumen, ocupacion, recalcular=recalcular_ocupacion)
+
+    trabajos.ejecutar(trabajar, al_terminar=mostrar)
+
+def recalcular_ocupacion(desde, hasta, listo):
+    """Arma la matriz de ocupación de otro rango en segundo plano (la usa el mapa de calor)."""
+    trabajos.ejecutar(
+        construir_matriz_ocupacion, desde, hasta, al_terminar=listo,
+        al_fallar=lambda error: messagebox.showerror("Ocupación", str(error)),
+    )
+
+def metricas_gui():
+    """Panel de depuración: tiempos por tramo y contadores de este proceso."""
+    ventana = tk.Toplevel(root)
+    ventana.title("Métricas")
+    texto = tk.Text(ventana, width=64, height=22, font=("Courier", 10))
+    texto.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    activas_var = tk.BooleanVar(value=metricas.ACTIVAS)
+
+    def actualizar():
+        texto.configure(state="normal")
+        texto.delete("1.0", tk.END)
+        texto.insert(tk.END, metricas.texto_resumen())
+        texto.configure(state="disabled")
+
+    def cambiar_activas():
+        metricas.activar(activas_var.get())
+        actualizar()
+
+    def reiniciar():
+        metricas.reiniciar()
+        actualizar()
+
+    def exportar():
+        ruta = filedialog.asksaveasfilename(
+            title="Exportar métricas", defaultextension=".prom",
+            filetypes=[("Prometheus (texto)", "*.prom"), ("JSON", "*.json")],
+        )
+        if ruta:
+            try:
+                messagebox.showinfo("Métricas", metricas.exportar(ruta), parent=ventana)
+            except OSError as e:
+                messagebox.showerror("Métricas", f"No se pudieron guardar: {e}", parent=ventana)
+
+    botones = tk.Frame(ventana)
+    botones.pack(pady=(0, 10))
+    tk.Checkbutton(botones, text="Medir", variable=activas_var, command=cambiar_activas).pack(side=tk.LEFT, padx=3)
+    tk.Button(botones, text="Actualizar", command=actualizar).pack(side=tk.LEFT, padx=3)
+    tk.Button(botones, text="Reiniciar", command=reiniciar).pack(side=tk.LEFT, padx=3)
+    tk.Button(botones, text="Exportar...", command=exportar).pack(side=tk.LEFT, padx=3)
+    actualizar()
+
+def mostrar_ocupado(ocupado):
+    """Indicador de la ventana principal mientras hay trabajos en segundo plano."""
+    if ocupado:
+        etiqueta_ocupado.configure(text="Procesando...")
+        barra_ocupado.start(15)
+        root.configure(cursor="watch")
+    else:
+        etiqueta_ocupado.configure(text="")
+        barra_ocupado.stop()
+        root.configure(cursor="")
+
+def cerrar_aplicacion():
+    trabajos.cerrar()
+    root.destroy()
+
+def abrir_cancelar_turnos():
+    """Ventana de cancelación dentro de la aplicación (una sola: si ya está abierta, se trae al frente)."""
+    ventana = ventanas["cancelar"]
+    if ventana is not None and ventana.winfo_exists():
+        ventana.deiconify()
+        ventana.lift()
+        ventana.focus_set()
+        return
+    ventanas["cancelar"] = ventana_cancelar_turno(root, trabajos, al_cancelar=lambda id_turno: actualizar_total())
+
+def avisar_cambio():
+    """Después de agendar, modificar o cancelar desde la ventana principal: refresca las demás vistas."""
+    ventana = ventanas["cancelar"]
+    if ventana is not None and ventana.winfo_exists():
+        ventana.event_generate(CAMBIO_TURNOS)
+    actualizar_total()
+
+def actualizar_total():
+    trabajos.ejecutar(
+        lambda: obtener_estadisticas(top=0)["total_turnos"],
+        al_terminar=lambda total: etiqueta_total.configure(text=f"Turnos registrados: {total}"),
+    )
+
+# Ventana principal
+root = tk.Tk()
+root.title("Sistema de Turnos Estética")
+root.geometry("420x760")
+trabajos = TrabajosEnSegundoPlano(root)
+ventanas = {"cancelar": None}  # Ventanas secundarias que hay que refrescar cuando cambian los turnos
+
+tk.Label(root, text="Nombre del Cliente:").pack()
+entry_nombre = tk.Entry(root)
+entry_nombre.pack()
+
+tk.Label(root, text="ID del turno (para modificar):").pack()
+entry_id = tk.Entry(root)
+entry_id.pack()
+
+tk.Label(root, text="Categoría de Servicio:").pack()
+combo_categoria = ttk.Combobox(root, values=list(CATEGORIAS.keys()), state="readonly")
+combo_categoria.pack()
+combo_categoria.bind("<<ComboboxSelected>>", actualizar_servicios)
+
+tk.Label(root, text="Servicio:").pack()
+combo_servicio = ttk.Combobox(root, state="readonly")
+combo_servicio.pack()
+
+tk.Label(root, text="Fecha (YYYY-MM-DD):").pack()
+entry_fecha = tk.Entry(root)
+entry_fecha.pack()
+
+tk.Label(root, text="Hora:").pack()
+combo_hora = ttk.Combobox(root, values=HORARIOS_VALIDOS, state="readonly")
+combo_hora.pack()
+
+boton_registrar = tk.Button(root, text="Registrar Turno", command=registrar_turno_gui)
+boton_registrar.pack(pady=3)
+tk.Button(root, text="Cancelar Turno", command=abrir_cancelar_turnos).pack(pady=3)
+tk.Button(root, text="Turnos Periódicos (series)", command=series_gui).pack(pady=3)
+boton_modificar = tk.Button(root, text="Modificar Turno", command=modificar_turno_gui)
+boton_modificar.pack(pady=3)
+tk.Button(root, text="Ver Horarios Libres", command=horarios_libres_gui).pack(pady=3)
+tk.Button(root, text="Exportar Turnos a CSV", command=exportar_turnos_gui).pack(pady=3)
+tk.Button(root, text="Buscar Turno", command=buscar_turno_gui).pack(pady=3)
+tk.Button(root, text="Ver Estadísticas", command=estadisticas_gui).pack(pady=3)
+tk.Button(root, text="Métricas (depuración)", command=metricas_gui).pack(pady=3)
+
+etiqueta_total = tk.Label(root, text="")
+etiqueta_total.pack(pady=(8, 0))
+barra_ocupado = ttk.Progressbar(root, mode="indeterminate", length=200)
+barra_ocupado.pack(pady=(4, 0))
+etiqueta_ocupado = tk.Label(root, text="")
+etiqueta_ocupado.pack()
+trabajos.al_cambiar_ocupado = mostrar_ocupado
+root.protocol("WM_DELETE_WINDOW", cerrar_aplicacion)
+actualizar_total()
+
 root.mainloop()
\ No newline at end of file
@@ -1,405 +1,415 @@
-from datetime import datetime
-from collections import Counter
-from agregar_turno import agregar_turno, cargar_clientes
-from cancelar_turnos import guardar_turnos
-
-from validaciones import (
-    validar_nombre_completo,
-    validar_fecha,
-    validar_hora,
-    validar_dia_valido,
-    turno_duplicado,
-    validar_anticipacion,
-    validar_capacidad_categoria,
-    validar_limite_4_meses,
-)
-from horarios import cargar_feriados
-
-CATEGORIAS = {
-    "Cabello": [
-        "Corte de cabello",
-        "Tinte de cabello",
-        "Peinado",
-        "Tratamiento capilar",
-        "Lavado y peinado",
-        "Alisado permanente",
-        "Extensiones",
-        "Mechas",
-        "Hidratación profunda"
-    ],
-    "Uñas": [
-        "Manicura",
-        "Pedicura",
-        "Acrilicas",
-        "Gel semipermanente"
-    ],
-    "Facial": [
-        "Masaje facial",
-        "Limpieza facial",
-        "Maquillaje",
-    ],
-    "Depilación": [
-        "Depilación con cera",
-        "Depilación con hilo",
-        "Depilación láser",
-        "Depilación con azucar"
-    ]
-}
-
-FERIADOS_ARG = cargar_feriados()
-
-def seleccionar_categoria_servicio():
-    print("Seleccione una categoría (0 para salir):")
-    categorias_list = list(CATEGORIAS.keys())
-    for i, cat in enumerate(categorias_list, 1):
-        print(f"{i}. {cat}")
-    print("0. Volver atrás")
-
-    while True:
-        opcion_cat = input("Ingrese el número de la categoría: ").strip()
-        if opcion_cat == "0":
-            return None, None
-        try:
-            opcion_cat = int(opcion_cat)
-            if 1 <= opcion_cat <= len(categorias_list):
-                categoria_seleccionada = categorias_list[opcion_cat - 1]
-                break
-            else:
-                print(f"Debe ingresar un número entre 0 y {len(categorias_list)}.")
-        except ValueError:
-            print("Debe ingresar un número válido.")
-
-    servicios_list = CATEGORIAS[categoria_seleccionada]
-    print(f"Servicios disponibles para {categoria_seleccionada} (0 para salir):")
-    for i, serv in enumerate(servicios_list, 1):
-        print(f"{i}. {serv}")
-    print("0. Volver atrás")
-
-    while True:
-        opcion_serv = input("Ingrese el número del servicio: ").strip()
-        if opcion_serv == "0":
-            return None, None
-        try:
-            opcion_serv = int(opcion_serv)
-            if 1 <= opcion_serv <= len(servicios_list):
-                servicio_seleccionado = servicios_list[opcion_serv - 1]
-                break
-            else:
-                print(f"Debe ingresar un número entre 0 y {len(servicios_list)}.")
-        except ValueError:
-            print("Debe ingresar un número válido.")
-
-    return categoria_seleccionada, servicio_seleccionado
-
-def registrar_turno_cmd():
-    print("=== Registrar nuevo turno ===")
-    clientes = cargar_clientes()
-    feriados = FERIADOS_ARG
-
-    while True:
-        nombre = input("Nombre completo (0 para salir): ").strip()
-        if nombre == "0":
-            print("Operación cancelada, regresando al menú principal.")
-            return
-        if not validar_nombre_completo(nombre):
-            print("El nombre debe tener al menos 4 letras y solo contener letras y espacios.")
-        else:
-            break
-
-    categoria, servicio = seleccionar_categoria_servicio()
-    if categoria is None or servicio is None:
-        print("Operación cancelada, regresando al menú principal.")
-        return
-
-    while True:
-        fecha = input("Fecha (YYYY-MM-DD) (0 para salir): ").strip()
-        if fecha == "0":
-            print("Operación cancelada, regresando al menú principal.")
-            return
-        if not validar_fecha(fecha):
-            print("Fecha inválida. Use formato YYYY-MM-DD y no puede ser pasada.")
-            continue
-
-        try:
-            fecha_dt = datetime.strptime(fecha, "%Y-%m-%d").date()
-            if fecha_dt.strftime("%Y-%m-%d") in feriados:
-                print("No se pueden registrar turnos en días feriados.")
-                continue
-        except ValueError:
-            print("Formato de fecha inválido.")
-            continue
-
-        if not validar_dia_valido(fecha):
-            print("No se pueden registrar turnos los domingos.")
-            continue
-        if not validar_limite_4_meses(fecha):
-            print("No se pueden crear turnos con más de 4 meses de anticipación.")
-            continue
-
-        break
-
-    while True:
-        hora = input("Hora (HH:MM) (0 para salir): ").strip()
-        if hora == "0":
-            print("Operación cancelada, regresando al menú principal.")
-            return
-        if not validar_hora(hora):
-            print("Hora inválida. Solo horarios en punto o y media entre 10:00 y 18:00.")
-            continue
-        if not validar_anticipacion(fecha, hora):
-            print("Los turnos deben solicitarse con al menos 2 horas de anticipación.")
-            continue
-        break
-
-    turno = {
-        "nombre": nombre,
-        "categoria": categoria,
-        "servicio": servicio,
-        "fecha": fecha,
-        "hora": hora
-    }
-
-    if turno_duplicado(clientes, turno):
-        print(f"{nombre} ya tiene un turno registrado el {fecha} a las {hora}.")
-        return
-
-    disponible, mensaje = validar_capacidad_categoria(clientes, categoria, fecha, hora)
-    if not disponible:
-        print(f"{mensaje}")
-        return
-
-    resultado = agregar_turno(turno)
-    print(f"{resultado}")
-
-def mostrar_turnos():
-    clientes = cargar_clientes()
-    if not clientes:
-        print("\nNo hay turnos cargados.\n")
-        return
-
-    print("\nTurnos agendados")
-    print("----------------------")
-    for i, turno in enumerate(clientes, 1):
-        nombre = turno.get("nombre", "Sin nombre")
-        fecha = turno.get("fecha", "Sin fecha")
-        hora = turno.get("hora", "Sin hora")
-        categoria = turno.get("categoria", "Sin categoría")
-        servicio = turno.get("servicio", "Sin servicio")
-        print(f"{i}. {fecha} {hora} - {nombre} ({categoria} - {servicio})")
-    print()
-
-def clasificar_banda_horaria(hora_str):
-    try:
-        hora = datetime.strptime(hora_str, "%H:%M").time()
-        if datetime.strptime("10:00", "%H:%M").time() <= hora <= datetime.strptime("15:00", "%H:%M").time():
-            return "Mañana"
-        elif datetime.strptime("15:30", "%H:%M").time() <= hora <= datetime.strptime("18:00", "%H:%M").time():
-            return "Tarde"
-        else:
-            return "Desconocido"
-    except ValueError:
-        return "Desconocido"
-
-def mostrar_estadisticas():
-    clientes = cargar_clientes()
-    if not clientes:
-        print("\nNo hay turnos registrados para mostrar estadísticas.\n")
-        return
-
-    nombres = [t.get("nombre", "Sin nombre") for t in clientes]
-    ranking_clientes = Counter(nombres).most_common(5)
-
-    categorias = [t.get("categoria", "Sin categoría") for t in clientes]
-    conteo_categorias = Counter(categorias)
-
-    bandas = [clasificar_banda_horaria(t.get("hora", "")) for t in clientes]
-    conteo_bandas = Counter(bandas)
-
-    print("\nEstadísticas del sistema de turnos")
-    print("--------------------------------------")
-
-    print("\nTop 5 clientes con más turnos:")
-    for i, (nombre, cantidad) in enumerate(ranking_clientes, 1):
-        print(f"   {i}. {nombre} - {cantidad} turno(s)")
-
-    print("\nCantidad de turnos por categoría:")
-    for categoria, cantidad in conteo_categorias.items():
-        print(f"   - {categoria}: {cantidad} turno(s)")
-
-    print("\nCantidad de turnos por franja horaria:")
-    for banda in ["Mañana", "Tarde", "Desconocido"]:
-        if banda in conteo_bandas:
-            print(f"   - {banda}: {conteo_bandas[banda]} turno(s)")
-    print()
-
-
-def cancelar_turno_cmd():
-    clientes = cargar_clientes()
-    if not clientes:
-        print("No hay turnos para cancelar.")
-        return
-
-    print("Seleccione el turno a cancelar (0 para volver atrás):")
-    for i, turno in enumerate(clientes, 1):
-        print(f"{i}. {turno.get('fecha', 'Sin fecha')} {turno.get('hora', 'Sin hora')} - {turno.get('nombre', 'Sin nombre')} ({turno.get('categoria', 'Sin categoría')} - {turno.get('servicio', 'Sin servicio')})")
-    print("0. Volver atrás")
-
-    while True:
-        opcion = input("Ingrese el número del turno a cancelar: ").strip()
-        if opcion == "0":
-            print("Cancelación no realizada: Volviendo al menú principal")
-            return
-        try:
-            opcion = int(opcion)
-            if 1 <= opcion <= len(clientes):
-                turno_seleccionado = clientes[opcion - 1]
-                break
-            else:
-                print(f"Debe ingresar un número entre 0 y {len(clientes)}.")
-        except ValueError:
-            print("Debe ingresar un número válido.")
-
-    confirm = input(f"Confirma cancelar el turno de {turno_seleccionado.get('nombre', 'Sin nombre')} el {turno_seleccionado.get('fecha', 'Sin fecha')} a las {turno_seleccionado.get('hora', 'Sin hora')}? (s/n): ").strip().lower()
-    if confirm == 's':
-        clientes.remove(turno_seleccionado)
-        guardar_turnos(clientes)
-        print("Turno cancelado con éxito.")
-    else:
-        print("Cancelación no realizada.")
-
-def modificar_turno_cmd():
-    clientes = cargar_clientes()
-    feriados = FERIADOS_ARG
-
-    if not clientes:
-        print("No hay turnos para modificar.")
-        return
-
-    print("Seleccione el turno a modificar (0 para volver atrás):")
-    for i, turno in enumerate(clientes, 1):
-        print(f"{i}. {turno.get('fecha', 'Sin fecha')} {turno.get('hora', 'Sin hora')} - {turno.get('nombre', 'Sin nombre')} ({turno.get('categoria', 'Sin categoría')} - {turno.get('servicio', 'Sin servicio')})")
-    print("0. Volver atrás")
-
-    while True:
-        opcion = input("Ingrese el número del turno a modificar: ").strip()
-        if opcion == "0":
-            print("Modificación abortada, regresando al menú principal.")
-            return
-        try:
-            opcion = int(opcion)
-            if 1 <= opcion <= len(clientes):
-                turno_seleccionado = clientes[opcion - 1]
-                break
-            else:
-                print(f"Debe ingresar un número entre 0 y {len(clientes)}.")
-        except ValueError:
-            print("Debe ingresar un número válido.")
-
-    nombre = turno_seleccionado["nombre"]
-    categoria = turno_seleccionado["categoria"]
-
-    while True:
-        nueva_fecha = input("Ingrese la nueva fecha (YYYY-MM-DD) (0 para salir): ").strip()
-        if nueva_fecha == "0":
-            print("Modificación abortada, regresando al menú principal.")
-            return
-        if not validar_fecha(nueva_fecha):
-            print("Fecha inválida. Use formato YYYY-MM-DD y no puede ser pasada.")
-            continue
-
-        try:
-            fecha_dt = datetime.strptime(nueva_fecha, "%Y-%m-%d").date()
-            if fecha_dt.strftime("%Y-%m-%d") in feriados:
-                print("No se pueden registrar turnos en días feriados.")
-                continue
-        except ValueError:
-            print("Formato de fecha inválido.")
-            continue
-
-        if not validar_dia_valido(nueva_fecha):
-            print("No se pueden registrar turnos los domingos.")
-            continue
-        if not validar_limite_4_meses(nueva_fecha):
-            print("No se pueden crear turnos con más de 4 meses de anticipación.")
-            continue
-
-        break
-
-    while True:
-        nueva_hora = input("Ingrese la nueva hora (HH:MM) (0 para salir): ").strip()
-        if nueva_hora == "0":
-            print("Modificación abortada, regresando al menú principal.")
-            return
-        if not validar_hora(nueva_hora):
-            print("Hora inválida. Solo horarios en punto o y media entre 10:00 y 18:00.")
-            continue
-        if not validar_anticipacion(nueva_fecha, nueva_hora):
-            print("Los turnos deben solicitarse con al menos 2 horas de anticipación.")
-            continue
-        break
-
-    nuevo_turno = {
-        "nombre": nombre,
-        "categoria": categoria,
-        "servicio": turno_seleccionado["servicio"],
-        "fecha": nueva_fecha,
-        "hora": nueva_hora
-    }
-
-    otros_turnos = [t for t in clientes if t != turno_seleccionado]
-
-    if turno_duplicado(otros_turnos, nuevo_turno):
-        print(f"{nombre} ya tiene un turno registrado el {nueva_fecha} a las {nueva_hora}.")
-        return
-
-    disponible, mensaje = validar_capacidad_categoria(otros_turnos, categoria, nueva_fecha, nueva_hora)
-    if not disponible:
-        print(f"{mensaje}")
-        return
-
-    turno_seleccionado['fecha'] = nueva_fecha
-    turno_seleccionado['hora'] = nueva_hora
-
-    guardar_turnos(clientes)
-    print("Turno modificado con éxito.")
-
-def menu():
-    while True:
-        print("""
-===============================
-Sistema de Gestión de Estética
-===============================
-
-1. Agendar turno
-2. Cancelar turno
-3. Ver turnos agendados
-4. Modificar turno
-5. Ver estadísticas
-6. Salir
-""")
-        opcion = input("Seleccione una opción: ").strip()
-
-        if opcion == "1":
-            registrar_turno_cmd()
-
-        elif opcion == "2":
-            cancelar_turno_cmd()
-
-        elif opcion == "3":
-            mostrar_turnos()
-
-        elif opcion == "4":
-            modificar_turno_cmd()
-
-        elif opcion == "5":
-            mostrar_estadisticas()
-
-        elif opcion == "6":
-            print("¡Hasta pronto!")
-            break
-
-        else:
-            print("Opción no válida. Intente nuevamente.\n")
-
-if __name__ == "__main__":
+from agregar_turno import (
+    agendar_turno, cargar_clientes, cancelar_turno_por_id, mover_turno, obtener_estadisticas,
+    agendar_serie, cancelar_serie, mover_serie,
+)
+import metricas
+from series_turnos import FRECUENCIAS, describir_resultado
+from repositorio import version_de
+
+from validaciones import CAPACIDAD, NO_ENCONTRADO, Turno, validar_turno
+from horarios import obtener_calendario
+from disponibilidad import describir_horarios, sugerir_horarios
+from estadisticas import BANDAS
+
+CATEGORIAS = {
+    "Cabello": [
+        "Corte de cabello",
+        "Tinte de cabello",
+        "Peinado",
+        "Tratamiento capilar",
+        "Lavado y peinado",
+        "Alisado permanente",
+        "Extensiones",
+        "Mechas",
+        "Hidratación profunda"
+    ],
+    "Uñas": [
+        "Manicura",
+        "Pedicura",
+        "Acrilicas",
+        "Gel semipermanente"
+    ],
+    "Facial": [
+        "Masaje facial",
+        "Limpieza facial",
+        "Maquillaje",
+    ],
+    "Depilación": [
+        "Depilación con cera",
+        "Depilación con hilo",
+        "Depilación láser",
+        "Depilación con azucar"
+    ]
+}
+
+def seleccionar_categoria_servicio():
+    print("Seleccione una categoría (0 para salir):")
+    categorias_list = list(CATEGORIAS.keys())
+    for i, cat in enumerate(categorias_list, 1):
+        print(f"{i}. {cat}")
+    print("0. Volver atrás")
+
+    while True:
+        opcion_cat = input("Ingrese el número de la categoría: ").strip()
+        if opcion_cat == "0":
+            return None, None
+        try:
+            opcion_cat = int(opcion_cat)
+            if 1 <= opcion_cat <= len(categorias_list):
+                categoria_seleccionada = categorias_list[opcion_cat - 1]
+                break
+            else:
+                print(f"Debe ingresar un número entre 0 y {len(categorias_list)}.")
+        except ValueError:
+            print("Debe ingresar un número válido.")
+
+    servicios_list = CATEGORIAS[categoria_seleccionada]
+    print(f"Servicios disponibles para {categoria_seleccionada} (0 para salir):")
+    for i, serv in enumerate(servicios_list, 1):
+        print(f"{i}. {serv}")
+    print("0. Volver atrás")
+
+    while True:
+        opcion_serv = input("Ingrese el número del servicio: ").strip()
+        if opcion_serv == "0":
+            return None, None
+        try:
+            opcion_serv = int(opcion_serv)
+            if 1 <= opcion_serv <= len(servicios_list):
+                servicio_seleccionado = servicios_list[opcion_serv - 1]
+                break
+            else:
+                print(f"Debe ingresar un número entre 0 y {len(servicios_list)}.")
+        except ValueError:
+            print("Debe ingresar un número válido.")
+
+    return categoria_seleccionada, servicio_seleccionado
+
+def registrar_turno_cmd():
+    print("=== Registrar nuevo turno ===")
+    calendario = obtener_calendario()
+
+    while True:
+        nombre = input("Nombre completo (0 para salir): ").strip()
+        if nombre == "0":
+            print("Operación cancelada, regresando al menú principal.")
+            return
+        error = validar_turno(Turno(nombre, None, None, None, None), etapas=("nombre",))
+        if error:
+            print(error.mensaje)
+        else:
+            break
+
+    categoria, servicio = seleccionar_categoria_servicio()
+    if categoria is None or servicio is None:
+        print("Operación cancelada, regresando al menú principal.")
+        return
+
+    while True:
+        fecha = input("Fecha (YYYY-MM-DD) (0 para salir): ").strip()
+        if fecha == "0":
+            print("Operación cancelada, regresando al menú principal.")
+            return
+        error = validar_turno(Turno(nombre, categoria, servicio, fecha, None), feriados=calendario, etapas=("fecha",))
+        if error:
+            print(error.mensaje)
+            continue
+        break
+
+    while True:
+        hora = input("Hora (HH:MM) (0 para salir): ").strip()
+        if hora == "0":
+            print("Operación cancelada, regresando al menú principal.")
+            return
+        error = validar_turno(Turno(nombre, categoria, servicio, fecha, hora), etapas=("hora",))
+        if error:
+            print(error.mensaje)
+            continue
+        break
+
+    turno = {
+        "nombre": nombre,
+        "categoria": categoria,
+        "servicio": servicio,
+        "fecha": fecha,
+        "hora": hora
+    }
+
+    nuevo_id, error = agendar_turno(turno)
+    if error:
+        print(error.mensaje)
+        if error.codigo == CAPACIDAD:
+            mostrar_sugerencias(categoria, fecha, hora)
+        return
+
+    print(f"Turno de {nombre} (ID: {nuevo_id}) agendado correctamente.")
+
+def mostrar_sugerencias(categoria, fecha, hora):
+    sugerencias = sugerir_horarios(categoria, fecha, hora)
+    if sugerencias:
+        print("Horarios libres más cercanos:")
+        for linea in describir_horarios(sugerencias).splitlines():
+            print(f"   - {linea}")
+
+def mostrar_turnos():
+    clientes = cargar_clientes()
+    if not clientes:
+        print("\nNo hay turnos cargados.\n")
+        return
+
+    print("\nTurnos agendados")
+    print("----------------------")
+    for i, turno in enumerate(clientes, 1):
+        nombre = turno.get("nombre", "Sin nombre")
+        fecha = turno.get("fecha", "Sin fecha")
+        hora = turno.get("hora", "Sin hora")
+        categoria = turno.get("categoria", "Sin categoría")
+        servicio = turno.get("servicio", "Sin servicio")
+        print(f"{i}. {fecha} {hora} - {nombre} ({categoria} - {servicio})")
+    print()
+
+def mostrar_estadisticas():
+    resumen = obtener_estadisticas(top=5)["resumen"]
+    if not resumen["total"]:
+        print("\nNo hay turnos registrados para mostrar estadísticas.\n")
+        return
+
+    ranking_clientes = resumen["clientes"]
+    conteo_categorias = resumen["categorias"]
+    conteo_bandas = resumen["bandas"]
+
+    print("\nEstadísticas del sistema de turnos")
+    print("--------------------------------------")
+
+    print("\nTop 5 clientes con más turnos:")
+    for i, (nombre, cantidad) in enumerate(ranking_clientes, 1):
+        print(f"   {i}. {nombre or 'Sin nombre'} - {cantidad} turno(s)")
+
+    print("\nCantidad de turnos por categoría:")
+    for categoria, cantidad in conteo_categorias.items():
+        print(f"   - {categoria or 'Sin categoría'}: {cantidad} turno(s)")
+
+    print("\nCantidad de turnos por franja horaria:")
+    for banda in BANDAS:
+        if banda in conteo_bandas:
+            print(f"   - {banda}: {conteo_bandas[banda]} turno(s)")
+    print()
+
+
+def cancelar_turno_cmd():
+    clientes = cargar_clientes()
+    if not clientes:
+        print("No hay turnos para cancelar.")
+        return
+
+    print("Seleccione el turno a cancelar (0 para volver atrás):")
+    for i, turno in enumerate(clientes, 1):
+        print(f"{i}. {turno.get('fecha', 'Sin fecha')} {turno.get('hora', 'Sin hora')} - {turno.get('nombre', 'Sin nombre')} ({turno.get('categoria', 'Sin categoría')} - {turno.get('servicio', 'Sin servicio')})")
+    print("0. Volver atrás")
+
+    while True:
+        opcion = input("Ingrese el número del turno a cancelar: ").strip()
+        if opcion == "0":
+            print("Cancelación no realizada: Volviendo al menú principal")
+            return
+        try:
+            opcion = int(opcion)
+            if 1 <= opcion <= len(clientes):
+                turno_seleccionado = clientes[opcion - 1]
+                break
+            else:
+                print(f"Debe ingresar un número entre 0 y {len(clientes)}.")
+        except ValueError:
+            print("Debe ingresar un número válido.")
+
+    confirm = input(f"Confirma cancelar el turno de {turno_seleccionado.get('nombre', 'Sin nombre')} el {turno_seleccionado.get('fecha', 'Sin fecha')} a las {turno_seleccionado.get('hora', 'Sin hora')}? (s/n): ").strip().lower()
+    if confirm == 's':
+        print(cancelar_turno_por_id(turno_seleccionado["id"], version=version_de(turno_seleccionado)))
+    else:
+        print("Cancelación no realizada.")
+
+def modificar_turno_cmd():
+    clientes = cargar_clientes()
+    calendario = obtener_calendario()
+
+    if not clientes:
+        print("No hay turnos para modificar.")
+        return
+
+    print("Seleccione el turno a modificar (0 para volver atrás):")
+    for i, turno in enumerate(clientes, 1):
+        print(f"{i}. {turno.get('fecha', 'Sin fecha')} {turno.get('hora', 'Sin hora')} - {turno.get('nombre', 'Sin nombre')} ({turno.get('categoria', 'Sin categoría')} - {turno.get('servicio', 'Sin servicio')})")
+    print("0. Volver atrás")
+
+    while True:
+        opcion = input("Ingrese el número del turno a modificar: ").strip()
+        if opcion == "0":
+            print("Modificación abortada, regresando al menú principal.")
+            return
+        try:
+            opcion = int(opcion)
+            if 1 <= opcion <= len(clientes):
+                turno_seleccionado = clientes[opcion - 1]
+                break
+            else:
+                print(f"Debe ingresar un número entre 0 y {len(clientes)}.")
+        except ValueError:
+            print("Debe ingresar un número válido.")
+
+    nombre = turno_seleccionado["nombre"]
+    categoria = turno_seleccionado["categoria"]
+    servicio = turno_seleccionado.get("servicio")
+
+    while True:
+        nueva_fecha = input("Ingrese la nueva fecha (YYYY-MM-DD) (0 para salir): ").strip()
+        if nueva_fecha == "0":
+            print("Modificación abortada, regresando al menú principal.")
+            return
+        error = validar_turno(Turno(nombre, categoria, servicio, nueva_fecha, None), feriados=calendario, etapas=("fecha",))
+        if error:
+            print(error.mensaje)
+            continue
+        break
+
+    while True:
+        nueva_hora = input("Ingrese la nueva hora (HH:MM) (0 para salir): ").strip()
+        if nueva_hora == "0":
+            print("Modificación abortada, regresando al menú principal.")
+            return
+        error = validar_turno(Turno(nombre, categoria, servicio, nueva_fecha, nueva_hora), etapas=("hora",))
+        if error:
+            print(error.mensaje)
+            continue
+        break
+
+    _, error = mover_turno(turno_seleccionado["id"], nueva_fecha, nueva_hora, version=version_de(turno_seleccionado))
+    if error:
+        if error.codigo == NO_ENCONTRADO:
+            print("El turno ya no existe: fue cancelado desde otra ventana.")
+            return
+        print(error.mensaje)
+        if error.codigo == CAPACIDAD:
+            mostrar_sugerencias(categoria, nueva_fecha, nueva_hora)
+        return
+    print("Turno modificado con éxito.")
+
+def series_cmd():
+    print("""
+1. Agendar una serie de turnos
+2. Mover una serie
+3. Cancelar una serie
+0. Volver atrás
+""")
+    opcion = input("Seleccione una opción: ").strip()
+    if opcion == "1":
+        nombre = input("Nombre del cliente: ").strip()
+        categoria = input(f"Categoría ({', '.join(CATEGORIAS)}): ").strip()
+        servicio = input("Servicio: ").strip()
+        fecha = input("Fecha del primer turno (YYYY-MM-DD): ").strip()
+        hora = input("Hora (HH:MM): ").strip()
+        frecuencias = list(FRECUENCIAS)
+        for i, frecuencia in enumerate(frecuencias, 1):
+            print(f"{i}. {frecuencia}")
+        elegida = input("Frecuencia: ").strip()
+        if not elegida.isdigit() or not 1 <= int(elegida) <= len(frecuencias):
+            print("Frecuencia inválida.")
+            return
+        hasta = input("Hasta (YYYY-MM-DD, Enter para no limitar): ").strip() or None
+        cantidad = input("Cantidad de turnos (Enter para no limitar): ").strip()
+        if cantidad and not cantidad.isdigit():
+            print("La cantidad debe ser un número.")
+            return
+        turno = {"nombre": nombre, "categoria": categoria, "servicio": servicio, "fecha": fecha, "hora": hora}
+        resultado = agendar_serie(turno, FRECUENCIAS[frecuencias[int(elegida) - 1]], hasta, int(cantidad) if cantidad else None)
+        print(describir_resultado(resultado, nombre))
+    elif opcion == "2":
+        serie = input("ID de la serie: ").strip()
+        dias = input("Días a correr (p. ej. 7 o -1, Enter para no cambiar la fecha): ").strip() or "0"
+        nueva_hora = input("Nueva hora (HH:MM, Enter para no cambiarla): ").strip() or None
+        if not dias.lstrip("-").isdigit():
+            print("Los días deben ser un número.")
+            return
+        movidos, errores = mover_serie(serie, int(dias), nueva_hora)
+        if errores:
+            print("No se movió ningún turno de la serie:")
+            for fecha, error in errores:
+                print(f"  {fecha or ''} {error.mensaje}".rstrip())
+            return
+        print(f"Serie {serie}: {movidos} turno(s) movidos.")
+    elif opcion == "3":
+        serie = input("ID de la serie: ").strip()
+        if input(f"¿Cancelar todos los turnos pendientes de la serie {serie}? (s/n): ").strip().lower() == "s":
+            print(cancelar_serie(serie))
+
+def mostrar_metricas():
+    print()
+    print(metricas.texto_resumen())
+    print("""
+1. Exportar (.prom o .json)
+2. Reiniciar
+3. Prender/apagar la medición
+0. Volver atrás
+""")
+    opcion = input("Seleccione una opción: ").strip()
+    if opcion == "1":
+        ruta = input("Archivo (por ejemplo metricas.prom o metricas.json): ").strip()
+        if ruta:
+            try:
+                print(metricas.exportar(ruta))
+            except OSError as e:
+                print(f"No se pudieron guardar las métricas: {e}")
+    elif opcion == "2":
+        metricas.reiniciar()
+        print("Métricas reiniciadas.")
+    elif opcion == "3":
+        metricas.activar(not metricas.ACTIVAS)
+        print(f"Medición {'prendida' if metricas.ACTIVAS else 'apagada'}.")
+
+def menu():
+    while True:
+        print("""
+===============================
+Sistema de Gestión de Estética
+===============================
+
+1. Agendar turno
+2. Cancelar turno
+3. Ver turnos agendados
+4. Modificar turno
+5. Ver estadísticas
+6. Turnos periódicos (series)
+7. Métricas
+8. Salir
+""")
+        opcion = input("Seleccione una opción: ").strip()
+
+        if opcion == "1":
+            registrar_turno_cmd()
+
+        elif opcion == "2":
+            cancelar_turno_cmd()
+
+        elif opcion == "3":
+            mostrar_turnos()
+
+        elif opcion == "4":
+            modificar_turno_cmd()
+
+        elif opcion == "5":
+            mostrar_estadisticas()
+
+        elif opcion == "6":
+            series_cmd()
+
+        elif opcion == "7":
+            mostrar_metricas()
+
+        elif opcion == "8":
+            print("¡Hasta pronto!")
+            break
+
+        else:
+            print("Opción no válida. Intente nuevamente.\n")
+
+if __name__ == "__main__":
     menu()
\ No newline at end of file
@@ -0,0 +1,157 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Se prenden con TURNOS_METRICAS=1 (o desde el panel de depuración). Apagadas,
+# `tramo` devuelve siempre el mismo contexto vacío y `sumar` vuelve enseguida.
+ACTIVAS = os.environ.get("TURNOS_METRICAS", "") not in ("", "0")
+ARCHIVO = os.environ.get("TURNOS_METRICAS_ARCHIVO")  # Si está, se vuelcan al salir
+PREFIJO = "turnos"
+
+_NADA = nullcontext()
+_bloqueo = threading.Lock()
+_contadores = {}  # (nombre, etiquetas) -> valor
+_tramos = {}  # nombre -> [cantidad, segundos, máximo]
+_desde = time.time()
+
+
+class _Tramo:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        duracion = time.perf_counter() - self.inicio
+        with _bloqueo:
+            tramo = _tramos.setdefault(self.nombre, [0, 0.0, 0.0])
+            tramo[0] += 1
+            tramo[1] += duracion
+            tramo[2] = max(tramo[2], duracion)
+
+
+def activar(activas=True):
+    global ACTIVAS
+    ACTIVAS = activas
+
+def tramo(nombre):
+    """
+    Mide el bloque `with` como un tramo (carga, validacion, indice, escritura, render).
+
+    Los tramos pueden anidarse: la validación incluye las consultas al índice.
+    """
+    if not ACTIVAS:
+        return _NADA
+    return _Tramo(nombre)
+
+def sumar(nombre, cantidad=1, **etiquetas):
+    """Suma al contador `nombre` con esas etiquetas (p. ej. sumar("rechazos", motivo="feriado"))."""
+    if not ACTIVAS:
+        return
+    clave = (nombre, tuple(sorted(etiquetas.items())))
+    with _bloqueo:
+        _contadores[clave] = _contadores.get(clave, 0) + cantidad
+
+def reiniciar():
+    global _desde
+    with _bloqueo:
+        _contadores.clear()
+        _tramos.clear()
+        _desde = time.time()
+
+def instantanea():
+    """Copia de las métricas como diccionario (es lo que se guarda en JSON)."""
+    with _bloqueo:
+        contadores = sorted(_contadores.items())
+        tramos = {nombre: list(valores) for nombre, valores in _tramos.items()}
+    return {
+        "activas": ACTIVAS,
+        "desde": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_desde)),
+        "contadores": [
+            {"nombre": nombre, "etiquetas": dict(etiquetas), "valor": valor}
+            for (nombre, etiquetas), valor in contadores
+        ],
+        "tramos": {
+            nombre: {
+                "cantidad": cantidad,
+                "total_ms": round(segundos * 1000, 3),
+                "promedio_ms": round(segundos * 1000 / cantidad, 3),
+                "maximo_ms": round(maximo * 1000, 3),
+            }
+            for nombre, (cantidad, segundos, maximo) in sorted(tramos.items())
+        },
+    }
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    pares = ",".join(f'{clave}="{str(valor).replace(chr(34), chr(39))}"' for clave, valor in etiquetas.items())
+    return "{" + pares + "}"
+
+def texto_prometheus():
+    """Las métricas en el formato de texto de Prometheus."""
+    datos = instantanea()
+    lineas = []
+    tipos_escritos = set()
+    for contador in datos["contadores"]:
+        nombre = f"{PREFIJO}_{contador['nombre']}_total"
+        if nombre not in tipos_escritos:
+            lineas.append(f"# TYPE {nombre} counter")
+            tipos_escritos.add(nombre)
+        lineas.append(f"{nombre}{_etiquetas(contador['etiquetas'])} {contador['valor']}")
+    if datos["tramos"]:
+        nombre = f"{PREFIJO}_tramo_segundos"
+        lineas.append(f"# TYPE {nombre} summary")
+        for tramo_nombre, tramo in datos["tramos"].items():
+            etiqueta = _etiquetas({"tramo": tramo_nombre})
+            lineas.append(f"{nombre}_count{etiqueta} {tramo['cantidad']}")
+            lineas.append(f"{nombre}_sum{etiqueta} {tramo['total_ms'] / 1000:.6f}")
+        lineas.append(f"# TYPE {nombre}_max gauge")
+        for tramo_nombre, tramo in datos["tramos"].items():
+            lineas.append(f"{nombre}_max{_etiquetas({'tramo': tramo_nombre})} {tramo['maximo_ms'] / 1000:.6f}")
+    return "\n".join(lineas) + "\n"
+
+def texto_resumen():
+    """Resumen legible para el panel de depuración y el menú."""
+    datos = instantanea()
+    lineas = [f"Métricas {'activas' if datos['activas'] else 'apagadas'} (desde {datos['desde']})", ""]
+    if datos["tramos"]:
+        lineas.append(f"{'Tramo':<12} {'veces':>7} {'prom. ms':>10} {'máx. ms':>10} {'total ms':>11}")
+        for nombre, tramo in datos["tramos"].items():
+            lineas.append(
+                f"{nombre:<12} {tramo['cantidad']:>7} {tramo['promedio_ms']:>10.3f} "
+                f"{tramo['maximo_ms']:>10.3f} {tramo['total_ms']:>11.1f}"
+            )
+        lineas.append("")
+    for contador in datos["contadores"]:
+        etiquetas = ", ".join(f"{valor}" for valor in contador["etiquetas"].values())
+        lineas.append(f"{contador['nombre']}{f' ({etiquetas})' if etiquetas else ''}: {contador['valor']}")
+    if len(lineas) == 2:
+        lineas.append("Todavía no hay nada medido.")
+    return "\n".join(lineas)
+
+def exportar(ruta):
+    """Guarda las métricas: en JSON si la ruta termina en .json, si no en texto de Prometheus."""
+    contenido = (
+        json.dumps(instantanea(), ensure_ascii=False, indent=4) if ruta.endswith(".json") else texto_prometheus()
+    )
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+    return f"Métricas guardadas en {ruta}."
+
+def _volcar_al_salir():
+    if ACTIVAS:
+        exportar(ARCHIVO)
+
+
+if ARCHIVO:
+    atexit.register(_volcar_al_salir)
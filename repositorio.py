@@ -0,0 +1,495 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import bloqueo_archivos
+import cache_archivos
+import diario_turnos
+import imagen_turnos
+import metricas
+from historico import DIRECTORIO_HISTORICO, Historico
+from indice_turnos import IndiceTurnos
+
+ARCHIVO_CLIENTES = "clientes.json"
+ARCHIVO_SQLITE = "turnos.db"
+BLOQUE_ITERACION = 1000  # Turnos que se copian por vez al recorrer (el resto del tiempo no se bloquea a los demás hilos)
+
+# "json": cada cambio reescribe clientes.json.
+# "diario": cada cambio se agrega a clientes.json.diario y se compacta cada tanto.
+# "sqlite": los turnos viven en turnos.db (ver repositorio_sqlite.py).
+MODO_ALMACENAMIENTO = os.environ.get("TURNOS_ALMACENAMIENTO", "json")
+
+
+def marca_modificacion():
+    """Marca de tiempo que se guarda en `modificado` al dar de alta o cambiar un turno."""
+    return datetime.now().isoformat(timespec="microseconds")
+
+def version_de(turno):
+    """Versión del turno: empieza en 1 y sube con cada cambio (los turnos viejos no la tienen)."""
+    return turno.get("version") or 1
+
+
+class ConflictoDeVersion(Exception):
+    """
+    El turno cambió desde que se leyó (otro puesto lo modificó o lo canceló).
+
+    `actual` es el turno como está guardado ahora, o None si ya no existe.
+    """
+
+    def __init__(self, actual):
+        super().__init__("El turno fue modificado desde otro puesto.")
+        self.actual = actual
+
+
+class RepositorioArchivo:
+    """
+    Turnos guardados en clientes.json, en modo "json" o "diario".
+
+    Lo cargado (un IndiceTurnos con el mapa id -> turno) se comparte entre
+    llamadas y sólo se vuelve a leer si otro proceso modificó los archivos
+    (ver cache_archivos). Dentro de `transaccion()` se trabaja sobre una única
+    carga y los cambios se persisten juntos al salir (una reescritura o un
+    registro por operación).
+
+    Los cambios se hacen siempre dentro de una transacción, que toma el
+    bloqueo de clientes.json (bloqueo_archivos) y relee lo que otros procesos
+    hayan escrito: lo que se valida adentro se valida contra lo último
+    guardado. El bloqueo dura sólo la lectura, la validación y la escritura,
+    no el tiempo que el usuario tarda en completar un formulario; para eso
+    cada turno lleva una `version` que `eliminar`/`actualizar` pueden
+    comparar (ConflictoDeVersion si cambió).
+
+    Los turnos de días pasados se mueven una vez por día a un histórico
+    particionado por mes (ver historico.py): clientes.json sólo guarda los
+    de hoy en adelante. Búsquedas, estadísticas y exportaciones abarcan
+    también el histórico; los controles de capacidad y duplicados, no.
+
+    Al arrancar, el índice se levanta de la imagen binaria (ver
+    imagen_turnos) si los archivos no cambiaron desde que se guardó; si no,
+    se arma desde el JSON y se vuelve a guardar la imagen.
+
+    Entre hilos del mismo proceso (los trabajos en segundo plano de la GUI)
+    consultas y transacciones se excluyen con un RLock: el índice no se
+    lee mientras otro hilo lo está cambiando. Las consultas devuelven copias
+    de los turnos, no las filas del almacén, así que se pueden seguir
+    leyendo después de soltar el bloqueo.
+    """
+
+    def __init__(self, ruta=ARCHIVO_CLIENTES, modo="json"):
+        self.ruta = ruta
+        self.modo = modo
+        self.indice = IndiceTurnos()
+        self.historico = Historico(os.path.join(os.path.dirname(ruta), DIRECTORIO_HISTORICO))
+        self._pendientes = None
+        self._archivado = None  # Día de la última archivación de este proceso
+        self._firma_imagen = None  # Firma de los archivos que refleja la última imagen guardada o leída
+        self._hilos = threading.RLock()  # Siempre antes que el bloqueo de archivos, para no cruzarse
+
+    def _rutas(self):
+        if self.modo == "diario":
+            return (self.ruta, diario_turnos.ruta_diario(self.ruta), diario_turnos.ruta_diario_anterior(self.ruta))
+        return (self.ruta,)
+
+    def _ruta_secuencia(self):
+        return self.ruta + ".secuencia"
+
+    def _leer(self):
+        with metricas.tramo("carga"):
+            indice = self._leer_imagen()
+            if indice is None:
+                indice = self._leer_json()
+            indice.ultimo_id = max(indice.ultimo_id, self._leer_secuencia())
+        return indice
+
+    def _leer_json(self):
+        # La firma se toma antes de leer: si algo cambia mientras tanto, la imagen queda vieja y se descarta.
+        firma = cache_archivos.firma(self._rutas())
+        if self.modo == "diario":
+            clientes = diario_turnos.cargar(self.ruta)
+        elif os.path.exists(self.ruta):
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                clientes = json.load(f)
+            if any(not isinstance(t.get("id"), int) for t in clientes) or len({t.get("id") for t in clientes}) != len(clientes):
+                # Turnos viejos sin ID: se les asigna uno y se guarda una única vez
+                # (con el bloqueo, por si otro hilo o puesto hace la misma carga).
+                with bloqueo_archivos.bloqueo(self.ruta):
+                    diario_turnos.asignar_ids_faltantes(clientes)
+                    diario_turnos.escribir_atomico(self.ruta, clientes)
+                    firma = cache_archivos.firma(self._rutas())
+        else:
+            clientes = []
+        indice = IndiceTurnos(clientes)
+        self._guardar_imagen(indice, firma)
+        return indice
+
+    def _leer_imagen(self):
+        """Índice de la imagen binaria, o None si no sirve (en modo diario, con la cola del diario aplicada)."""
+        actual = cache_archivos.firma(self._rutas())
+        contenido = imagen_turnos.cargar(self.ruta, lambda firma: self._imagen_vigente(firma, actual))
+        if contenido is None:
+            return None
+        indice = contenido["indice"]
+        self._firma_imagen = contenido["firma"]
+        if self.modo == "diario":
+            guardado = contenido["firma"][1]
+
+            def aplicar(operacion):
+                # Igual que diario_turnos.cargar: alta y cambio reemplazan por ID, baja borra si existe.
+                if operacion["op"] == "baja":
+                    anterior = indice.obtener(operacion["id"])
+                    if anterior is not None:
+                        indice.quitar(anterior)
+                    return
+                anterior = indice.obtener(operacion["turno"]["id"])
+                if anterior is not None:
+                    indice.reemplazar(anterior, operacion["turno"])
+                else:
+                    indice.agregar(operacion["turno"])
+
+            if not diario_turnos.aplicar_cola(self.ruta, guardado[1] if guardado else 0, contenido["registros"], aplicar):
+                return None
+        return indice
+
+    def _imagen_vigente(self, guardada, actual):
+        """
+        Indica si una imagen guardada con la firma `guardada` refleja los archivos actuales.
+
+        En modo diario también sirve si desde entonces sólo se agregaron
+        líneas al mismo diario (se aplican al cargarla).
+        """
+        if guardada == actual:
+            return True
+        if self.modo != "diario" or guardada is None or len(guardada) != len(actual):
+            return False
+        base, diario, anterior = guardada
+        if base != actual[0] or anterior != actual[2] or actual[1] is None:
+            return False
+        # (mtime, tamaño, inodo): el mismo archivo, que sólo pudo crecer.
+        return diario is None or (diario[2] == actual[1][2] and diario[1] <= actual[1][1])
+
+    def _guardar_imagen(self, indice, firma):
+        self._firma_imagen = firma
+        registros = diario_turnos.registros_pendientes() if self.modo == "diario" else 0
+        try:
+            imagen_turnos.guardar(self.ruta, indice, firma, registros)
+        except OSError as e:
+            print(f"⚠ No se pudo guardar la imagen de los turnos: {e}")
+
+    def _leer_secuencia(self):
+        try:
+            with open(self._ruta_secuencia(), "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _guardar_secuencia(self, ultimo_id):
+        temporal = self._ruta_secuencia() + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(str(ultimo_id))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self._ruta_secuencia())
+
+    def refrescar(self):
+        """Trae los turnos del disco si cambiaron desde la última lectura."""
+        self.indice = cache_archivos.cargar_cacheado(self._rutas(), self._leer)
+        return self.indice
+
+    def _datos(self):
+        if self._pendientes is None:
+            self._archivar_si_corresponde()
+            self.refrescar()
+        return self.indice
+
+    @contextmanager
+    def lectura(self):
+        """
+        Bloquea los cambios de los demás hilos de este proceso mientras dura el bloque y da el índice.
+
+        Hace falta para leer el almacén por columnas desde otro hilo (p. ej.
+        analisis_ocupacion con `almacenes()`).
+        """
+        with self._hilos:
+            yield self._datos()
+
+    def _archivar_si_corresponde(self):
+        """Una vez por día (y por proceso) pasa al histórico los turnos de días anteriores."""
+        hoy = date.today()
+        if self._archivado == hoy:
+            return
+        self._archivado = hoy
+        try:
+            self.archivar_pasados(hoy)
+        except (OSError, bloqueo_archivos.ArchivoOcupado) as e:
+            print(f"⚠ No se pudieron archivar los turnos pasados: {e}")
+
+    def archivar_pasados(self, hoy=None):
+        """
+        Mueve al histórico los turnos con fecha anterior a `hoy` y devuelve cuántos fueron.
+
+        Primero se escriben los meses del histórico y después se sacan de
+        clientes.json en una misma transacción; si algo se corta en el medio,
+        la próxima archivación los vuelve a escribir sin duplicarlos.
+        """
+        hoy = hoy or date.today()
+        ayer = (hoy - timedelta(days=1)).isoformat()
+        with self.transaccion():
+            indice = self._datos()
+            almacen = indice.almacen
+            pasados = [almacen.vistas[i] for i in almacen.filtrar(hasta=ayer) if almacen.col_id[i]]
+            if not pasados:
+                return 0
+            # Los IDs archivados no se reutilizan aunque ya no estén en clientes.json.
+            self._guardar_secuencia(max(indice.ultimo_id, self._leer_secuencia()))
+            self.historico.agregar(pasados)
+            for turno in pasados:
+                indice.quitar(turno)
+                self._registrar("baja", turno)
+        return len(pasados)
+
+    def todos(self):
+        """Lista completa de turnos."""
+        with self.lectura() as indice:
+            return [dict(t) for t in indice.lista()]
+
+    def guardar(self, clientes):
+        """Reemplaza todos los turnos guardados por la lista recibida."""
+        with self._hilos, bloqueo_archivos.bloqueo(self.ruta):
+            diario_turnos.asignar_ids_faltantes(clientes)
+            ultimo_id = max(self.indice.ultimo_id, self._leer_secuencia())
+            self.indice = IndiceTurnos(clientes)
+            self.indice.ultimo_id = max(self.indice.ultimo_id, ultimo_id)
+            if self.modo == "diario":
+                diario_turnos.compactar(self.ruta, clientes)
+            else:
+                diario_turnos.escribir_atomico(self.ruta, clientes)
+            cache_archivos.recordar(self._rutas(), self.indice)
+            self._guardar_imagen(self.indice, cache_archivos.firma(self._rutas()))
+
+    @contextmanager
+    def transaccion(self):
+        """Agrupa consultas y cambios sobre una misma carga de los turnos, con el archivo bloqueado."""
+        with self._hilos, bloqueo_archivos.bloqueo(self.ruta):
+            if self._pendientes is not None:
+                yield
+                return
+            self._archivar_si_corresponde()
+            self.refrescar()
+            self._pendientes = []
+            try:
+                yield
+            except BaseException:
+                # Lo aplicado en memoria no llegó al disco: se descarta la carga.
+                self._pendientes = None
+                cache_archivos.olvidar(self._rutas())
+                self.refrescar()
+                raise
+            cambios, self._pendientes = self._pendientes, None
+            if cambios:
+                self._persistir(cambios)
+
+    def _registrar(self, operacion, turno):
+        self._pendientes.append((operacion, turno))
+
+    def _persistir(self, cambios):
+        with metricas.tramo("escritura"):
+            if any(operacion == "alta" for operacion, _ in cambios):
+                # La secuencia se guarda antes que los turnos para no reutilizar IDs.
+                self._guardar_secuencia(self.indice.ultimo_id)
+            if self.modo == "diario":
+                diario_turnos.registrar_lote(self.ruta, cambios, self.indice.lista)
+            else:
+                diario_turnos.escribir_atomico(self.ruta, self.indice.lista())
+            # En modo diario la imagen se rehace sólo cuando el diario se compactó:
+            # mientras tanto alcanza con aplicar la cola al cargarla.
+            firma = cache_archivos.firma(self._rutas())
+            if self.modo != "diario" or not self._imagen_vigente(self._firma_imagen, firma):
+                self._guardar_imagen(self.indice, firma)
+        cache_archivos.recordar(self._rutas(), self.indice)
+
+    def obtener(self, id_turno):
+        """Turno con ese ID, o None."""
+        with self.lectura() as indice:
+            turno = indice.obtener(id_turno)
+            return dict(turno) if turno is not None else None
+
+    def cantidad(self, categoria, fecha, hora, excluir=None):
+        """Cantidad de turnos de la categoría en esa fecha y hora."""
+        with self.lectura() as indice, metricas.tramo("indice"):
+            return indice.cantidad(categoria, fecha, hora, excluir=excluir)
+
+    def tiene_reserva(self, nombre, fecha, hora, excluir=None):
+        """Indica si el cliente ya tiene un turno en esa fecha y hora."""
+        with self.lectura() as indice, metricas.tramo("indice"):
+            return indice.tiene_reserva(nombre, fecha, hora, excluir=excluir)
+
+    def iterar(self, desde=None, hasta=None, categoria=None, servicio=None, modificado_desde=None):
+        """
+        Recorre los turnos que pasan los filtros, del histórico (sólo los meses del rango) y los actuales.
+
+        El filtrado se hace sobre las columnas del almacén y de los archivos
+        del histórico; de éstos sólo se decodifican los turnos que pasan. Los
+        turnos actuales se copian de a BLOQUE_ITERACION con el índice
+        bloqueado, así una exportación larga no frena a los demás hilos.
+        """
+        with self.lectura() as actuales:
+            archivos = self.historico.archivos(desde, hasta)
+            archivados = set(actuales.por_id)
+        for archivo in archivos:
+            for fila in archivo.filtrar(desde, hasta, categoria, servicio, modificado_desde):
+                if archivo.id(fila) not in archivados:  # Archivación cortada: vale la copia actual
+                    yield archivo.turno(fila)
+        with self.lectura() as actuales:
+            almacen = actuales.almacen
+            # Las vistas siguen valiendo aunque el almacén se compacte entre un bloque y otro.
+            vistas = [almacen.vistas[fila] for fila in almacen.filtrar(desde, hasta, categoria, servicio, modificado_desde)]
+        for inicio in range(0, len(vistas), BLOQUE_ITERACION):
+            with self._hilos:
+                bloque = [dict(t) for t in vistas[inicio:inicio + BLOQUE_ITERACION]]
+            yield from bloque
+
+    def ids_por_fecha(self, desde=None, hasta=None, categoria=None, nombre=None):
+        """
+        IDs de los turnos que pasan los filtros, ordenados por fecha, hora e ID.
+
+        Se filtra y se ordena sobre las columnas de enteros del almacén (y el
+        índice de nombres si se busca por nombre); no se arma ningún turno.
+        """
+        with self.lectura() as indice:
+            almacen = indice.almacen
+            filas = almacen.filtrar(desde, hasta, categoria)
+            col_id = almacen.col_id
+            if nombre:
+                buscados = set(indice.nombres().buscar(nombre))
+                filas = [i for i in filas if col_id[i] in buscados]
+            col_dia, col_hora = almacen.col_dia, almacen.col_hora
+            filas = sorted(filas, key=lambda i: (col_dia[i], col_hora[i], col_id[i]))
+            return [col_id[i] for i in filas if col_id[i]]
+
+    def obtener_varios(self, ids):
+        """Turnos de esos IDs en el mismo orden (se omiten los que ya no existen)."""
+        with self.lectura() as indice:
+            return [dict(t) for t in map(indice.obtener, ids) if t is not None]
+
+    def almacenes(self, desde=None, hasta=None):
+        """
+        Columnas para los análisis: los ArchivoHistorico de los meses que se
+        cruzan con el rango y el almacén de los turnos actuales. Desde otro
+        hilo, el almacén se recorre dentro de `lectura()`.
+        """
+        with self.lectura() as indice:
+            return self.historico.archivos(desde, hasta) + [indice.almacen]
+
+    def estadisticas(self, top=5):
+        """Resumen de estadísticas (ver EstadisticasTurnos.resumen): lo actual se mantiene con cada cambio y el histórico por mes."""
+        with self.lectura() as indice:
+            if not self.historico.meses():
+                return indice.estadisticas.resumen(top)
+            return self.historico.estadisticas(indice.estadisticas, top)
+
+    def ocupacion(self, desde, hasta):
+        """Pares ((categoria, fecha, hora), cantidad) de las franjas ocupadas entre dos fechas."""
+        with self.lectura() as indice:
+            return [
+                (franja, cantidad) for franja, cantidad in indice.ocupacion.items()
+                if cantidad and isinstance(franja[1], str) and desde <= franja[1] <= hasta
+            ]
+
+    def por_nombre(self, nombre):
+        """Turnos cuyo nombre coincide exactamente."""
+        with self.lectura() as indice:
+            return [dict(t) for t in indice.lista() if t.get("nombre") == nombre]
+
+    def por_serie(self, serie):
+        """
+        Turnos de una serie (ver series_turnos), por fecha y hora.
+
+        El ID de la serie es un campo extra, así que sólo se miran las filas
+        que tienen extras. Los turnos ya archivados no se incluyen.
+        """
+        with self.lectura() as indice:
+            almacen = indice.almacen
+            filas = [
+                fila for fila, extras in almacen.extras.items() if extras.get("serie") == serie and almacen.vivas[fila]
+            ]
+            filas.sort(key=lambda i: (almacen.col_dia[i], almacen.col_hora[i], almacen.col_id[i]))
+            return [dict(almacen.vistas[fila]) for fila in filas]
+
+    def buscar(self, texto, limite=None):
+        """Turnos cuyo nombre coincide con el texto, sin distinguir mayúsculas ni tildes, por relevancia."""
+        with self.lectura() as indice, metricas.tramo("indice"):
+            resultado = [dict(indice.obtener(i)) for i in indice.nombres().buscar(texto, limite)]
+            if limite is None or len(resultado) < limite:
+                archivados = [t for t in self.historico.buscar(texto) if t.get("id") not in indice.por_id]
+                resultado.extend(archivados if limite is None else archivados[:limite - len(resultado)])
+        return resultado
+
+    def insertar(self, turno):
+        """Agrega un turno nuevo asignándole el siguiente ID de la secuencia."""
+        with self.transaccion():
+            indice = self._datos()
+            turno["id"] = indice.ultimo_id + 1
+            turno["modificado"] = marca_modificacion()
+            turno["version"] = 1
+            indice.agregar(turno)
+            self._registrar("alta", turno)
+        return turno["id"]
+
+    def _vigente(self, turno, version):
+        """Turno guardado con el ID de `turno`; si se pidió `version` y no coincide, ConflictoDeVersion."""
+        actual = self._datos().obtener(turno.get("id"))
+        if version is not None and (actual is None or version_de(actual) != version):
+            raise ConflictoDeVersion(actual)
+        return actual
+
+    def eliminar(self, turno, version=None):
+        """
+        Elimina un turno por su ID. Devuelve False si ya no existía.
+
+        Con `version`, sólo se elimina si el turno sigue en esa versión
+        (si no, ConflictoDeVersion).
+        """
+        with self.transaccion():
+            actual = self._vigente(turno, version)
+            if actual is None:
+                return False
+            self._datos().quitar(actual)
+            self._registrar("baja", actual)
+        return True
+
+    def actualizar(self, turno, nueva_fecha, nueva_hora, version=None):
+        """
+        Cambia la fecha y hora de un turno por su ID. Devuelve False si ya no existía.
+
+        Con `version`, sólo se cambia si el turno sigue en esa versión
+        (si no, ConflictoDeVersion).
+        """
+        with self.transaccion():
+            actual = self._vigente(turno, version)
+            if actual is None:
+                return False
+            self._datos().mover(actual, nueva_fecha, nueva_hora)
+            actual["modificado"] = marca_modificacion()
+            actual["version"] = version_de(actual) + 1
+            self._registrar("cambio", actual)
+        turno["fecha"] = nueva_fecha
+        turno["hora"] = nueva_hora
+        turno["modificado"] = actual["modificado"]
+        turno["version"] = actual["version"]
+        return True
+
+
+_repositorios = {}
+
+def obtener_repositorio(modo=None):
+    """Devuelve el repositorio del modo de almacenamiento configurado."""
+    modo = modo or MODO_ALMACENAMIENTO
+    if modo not in _repositorios:
+        if modo == "sqlite":
+            from repositorio_sqlite import RepositorioSQLite
+            _repositorios[modo] = RepositorioSQLite(ARCHIVO_SQLITE)
+        else:
+            _repositorios[modo] = RepositorioArchivo(ARCHIVO_CLIENTES, modo)
+    return _repositorios[modo]
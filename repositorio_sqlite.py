@@ -0,0 +1,399 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import metricas
+from busqueda_nombres import IndiceNombres
+from estadisticas import claves_estadisticas
+from indice_turnos import normalizar_nombre
+from repositorio import ConflictoDeVersion, marca_modificacion, version_de
+
+CAMPOS = ("nombre", "categoria", "servicio", "fecha", "hora", "modificado", "version")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS turnos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL DEFAULT '',
+    nombre_normalizado TEXT NOT NULL DEFAULT '',
+    categoria TEXT,
+    servicio TEXT,
+    fecha TEXT,
+    hora TEXT,
+    extra TEXT,
+    modificado TEXT,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_turnos_franja ON turnos (categoria, fecha, hora);
+CREATE INDEX IF NOT EXISTS idx_turnos_nombre ON turnos (nombre);
+CREATE INDEX IF NOT EXISTS idx_turnos_reserva ON turnos (nombre_normalizado, fecha, hora);
+CREATE INDEX IF NOT EXISTS idx_turnos_fecha ON turnos (fecha);
+"""
+
+INDICES_POSTERIORES = """
+CREATE INDEX IF NOT EXISTS idx_turnos_modificado ON turnos (modificado);
+CREATE TABLE IF NOT EXISTS estadisticas (
+    tipo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (tipo, clave)
+);
+CREATE INDEX IF NOT EXISTS idx_estadisticas_ranking ON estadisticas (tipo, cantidad);
+"""
+
+
+def _a_fila(turno):
+    """Valores de columnas para un turno (los campos desconocidos van a `extra`)."""
+    extra = {k: v for k, v in turno.items() if k not in CAMPOS and k != "id"}
+    return (
+        turno.get("nombre", ""),
+        normalizar_nombre(turno.get("nombre")),
+        turno.get("categoria"),
+        turno.get("servicio"),
+        turno.get("fecha"),
+        turno.get("hora"),
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+        turno.get("modificado"),
+        version_de(turno),
+    )
+
+def _a_turno(fila):
+    """Convierte una fila en el diccionario que usa el resto del sistema."""
+    turno = {campo: fila[campo] for campo in CAMPOS if fila[campo] is not None}
+    turno["id"] = fila["id"]
+    if fila["extra"]:
+        turno.update(json.loads(fila["extra"]))
+    return turno
+
+
+class RepositorioSQLite:
+    """
+    Turnos guardados en una base SQLite.
+
+    Cada consulta usa un índice y cada cambio escribe su fila y los
+    contadores de la tabla `estadisticas` en la misma transacción; las
+    operaciones compuestas se agrupan con `transaccion()` (BEGIN IMMEDIATE).
+    Entre procesos el bloqueo lo maneja SQLite; entre hilos que comparten
+    la conexión, un RLock. Como en RepositorioArchivo, cada turno lleva una
+    `version` que `eliminar`/`actualizar` pueden comparar.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.executescript(ESQUEMA)
+        columnas = {f["name"] for f in self.conexion.execute("PRAGMA table_info(turnos)")}
+        if "modificado" not in columnas:
+            # Bases creadas antes de que existiera la columna.
+            self.conexion.execute("ALTER TABLE turnos ADD COLUMN modificado TEXT")
+        if "version" not in columnas:
+            self.conexion.execute("ALTER TABLE turnos ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        self.conexion.executescript(INDICES_POSTERIORES)
+        self._en_transaccion = False
+        self._hilos = threading.RLock()
+        self._nombres = None
+        self._version_nombres = None
+        if not self.conexion.execute("SELECT 1 FROM estadisticas LIMIT 1").fetchone():
+            self._reconstruir_estadisticas()
+
+    @contextmanager
+    def transaccion(self):
+        """Ejecuta el bloque dentro de una transacción de escritura."""
+        with self._hilos:
+            if self._en_transaccion:
+                yield
+                return
+            self.conexion.execute("BEGIN IMMEDIATE")
+            self._en_transaccion = True
+            try:
+                yield
+            except BaseException:
+                self.conexion.execute("ROLLBACK")
+                self._nombres = None  # Puede tener altas/bajas que no se confirmaron
+                raise
+            else:
+                with metricas.tramo("escritura"):
+                    self.conexion.execute("COMMIT")
+            finally:
+                self._en_transaccion = False
+
+    def _sumar_estadisticas(self, turno, delta):
+        """Actualiza los contadores de estadísticas dentro de la transacción en curso."""
+        claves = (("total", ""),) + claves_estadisticas(turno)
+        for tipo, clave in claves:
+            self.conexion.execute(
+                "INSERT INTO estadisticas (tipo, clave, cantidad) VALUES (?, ?, ?)"
+                " ON CONFLICT (tipo, clave) DO UPDATE SET cantidad = cantidad + excluded.cantidad",
+                (tipo, clave or "", delta),
+            )
+        if delta < 0:
+            self.conexion.execute("DELETE FROM estadisticas WHERE cantidad <= 0")
+
+    def _reconstruir_estadisticas(self):
+        """Arma los contadores desde cero (bases creadas antes de que existieran)."""
+        with self.transaccion():
+            self.conexion.execute("DELETE FROM estadisticas")
+            for fila in self.conexion.execute("SELECT nombre, categoria, hora FROM turnos").fetchall():
+                self._sumar_estadisticas(dict(fila), 1)
+
+    def refrescar(self):
+        return self.todos()
+
+    def todos(self):
+        """Lista completa de turnos."""
+        with self._hilos:
+            filas = self.conexion.execute("SELECT * FROM turnos ORDER BY id")
+            return [_a_turno(f) for f in filas]
+
+    def guardar(self, clientes):
+        """Reemplaza todos los turnos guardados por la lista recibida."""
+        with self.transaccion():
+            self.conexion.execute("DELETE FROM turnos")
+            self.conexion.execute("DELETE FROM estadisticas")
+            for turno in clientes:
+                self.insertar(turno)
+
+    def obtener(self, id_turno):
+        """Turno con ese ID, o None."""
+        with self._hilos:
+            fila = self.conexion.execute("SELECT * FROM turnos WHERE id = ?", (id_turno,)).fetchone()
+            return _a_turno(fila) if fila else None
+
+    def cantidad(self, categoria, fecha, hora, excluir=None):
+        """Cantidad de turnos de la categoría en esa fecha y hora."""
+        with self._hilos:
+            excluido = excluir.get("id", -1) if excluir else -1
+            with metricas.tramo("indice"):
+                fila = self.conexion.execute(
+                    "SELECT COUNT(*) FROM turnos WHERE categoria = ? AND fecha = ? AND hora = ? AND id != ?",
+                    (categoria, fecha, hora, excluido),
+                ).fetchone()
+            return fila[0]
+
+    def tiene_reserva(self, nombre, fecha, hora, excluir=None):
+        """Indica si el cliente ya tiene un turno en esa fecha y hora."""
+        with self._hilos:
+            excluido = excluir.get("id", -1) if excluir else -1
+            with metricas.tramo("indice"):
+                fila = self.conexion.execute(
+                    "SELECT 1 FROM turnos WHERE nombre_normalizado = ? AND fecha = ? AND hora = ? AND id != ? LIMIT 1",
+                    (normalizar_nombre(nombre), fecha, hora, excluido),
+                ).fetchone()
+            return fila is not None
+
+    def iterar(self, desde=None, hasta=None, categoria=None, servicio=None, modificado_desde=None):
+        """
+        Recorre los turnos que pasan los filtros leyendo de a una fila.
+
+        Usa una conexión propia para poder recorrer desde otro hilo sin
+        mezclarse con las transacciones de la conexión principal.
+        """
+        condiciones, parametros = [], []
+        for condicion, valor in (
+            ("fecha >= ?", desde), ("fecha <= ?", hasta), ("categoria = ?", categoria),
+            ("servicio = ?", servicio), ("modificado > ?", modificado_desde),
+        ):
+            if valor:
+                condiciones.append(condicion)
+                parametros.append(valor)
+        donde = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        conexion = sqlite3.connect(self.ruta)
+        conexion.row_factory = sqlite3.Row
+        try:
+            for fila in conexion.execute(f"SELECT * FROM turnos{donde} ORDER BY id", parametros):
+                yield _a_turno(fila)
+        finally:
+            conexion.close()
+
+    def ids_por_fecha(self, desde=None, hasta=None, categoria=None, nombre=None):
+        """IDs de los turnos que pasan los filtros, ordenados por fecha, hora e ID (usa idx_turnos_fecha)."""
+        with self._hilos:
+            condiciones, parametros = [], []
+            for condicion, valor in (("fecha >= ?", desde), ("fecha <= ?", hasta), ("categoria = ?", categoria)):
+                if valor:
+                    condiciones.append(condicion)
+                    parametros.append(valor)
+            donde = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+            filas = self.conexion.execute(f"SELECT id FROM turnos{donde} ORDER BY fecha, hora, id", parametros)
+            ids = [f[0] for f in filas]
+            if nombre:
+                buscados = set(self._indice_nombres().buscar(nombre))
+                ids = [i for i in ids if i in buscados]
+            return ids
+
+    def obtener_varios(self, ids):
+        """Turnos de esos IDs en el mismo orden (se omiten los que ya no existen)."""
+        with self._hilos:
+            filas = {}
+            for inicio in range(0, len(ids), 500):
+                bloque = ids[inicio:inicio + 500]
+                marcas = ",".join("?" * len(bloque))
+                for fila in self.conexion.execute(f"SELECT * FROM turnos WHERE id IN ({marcas})", bloque):
+                    filas[fila["id"]] = fila
+            return [_a_turno(filas[i]) for i in ids if i in filas]
+
+    def estadisticas(self, top=5):
+        """Resumen de estadísticas leído de la tabla de contadores (no recorre los turnos)."""
+        with self._hilos:
+            def contadores(tipo):
+                filas = self.conexion.execute(
+                    "SELECT clave, cantidad FROM estadisticas WHERE tipo = ? ORDER BY rowid", (tipo,)
+                )
+                return {f[0] or None: f[1] for f in filas}
+
+            total = self.conexion.execute("SELECT cantidad FROM estadisticas WHERE tipo = 'total'").fetchone()
+            clientes = self.conexion.execute(
+                "SELECT clave, cantidad FROM estadisticas WHERE tipo = 'cliente' ORDER BY cantidad DESC LIMIT ?", (top,)
+            )
+            return {
+                "total": total[0] if total else 0,
+                "clientes": [(f[0] or None, f[1]) for f in clientes],
+                "categorias": contadores("categoria"),
+                "bandas": contadores("banda"),
+            }
+
+    def ocupacion(self, desde, hasta):
+        """Pares ((categoria, fecha, hora), cantidad) de las franjas ocupadas entre dos fechas."""
+        with self._hilos:
+            filas = self.conexion.execute(
+                "SELECT categoria, fecha, hora, COUNT(*) FROM turnos"
+                " WHERE fecha BETWEEN ? AND ? GROUP BY categoria, fecha, hora",
+                (desde, hasta),
+            )
+            return [((f[0], f[1], f[2]), f[3]) for f in filas]
+
+    def por_nombre(self, nombre):
+        """Turnos cuyo nombre coincide exactamente."""
+        with self._hilos:
+            filas = self.conexion.execute("SELECT * FROM turnos WHERE nombre = ? ORDER BY id", (nombre,))
+            return [_a_turno(f) for f in filas]
+
+    def por_serie(self, serie):
+        """Turnos de una serie (ver series_turnos), por fecha y hora."""
+        with self._hilos:
+            filas = self.conexion.execute(
+                "SELECT * FROM turnos WHERE json_extract(extra, '$.serie') = ? ORDER BY fecha, hora, id", (serie,)
+            )
+            return [_a_turno(f) for f in filas]
+
+    def _indice_nombres(self):
+        """
+        Índice de trigramas de nombres en memoria.
+
+        Se mantiene con los cambios de esta conexión y se reconstruye si
+        `PRAGMA data_version` indica que otra conexión modificó la base.
+        """
+        version = self.conexion.execute("PRAGMA data_version").fetchone()[0]
+        if self._nombres is None or version != self._version_nombres:
+            filas = self.conexion.execute("SELECT id, nombre FROM turnos")
+            self._nombres = IndiceNombres({"id": f["id"], "nombre": f["nombre"]} for f in filas)
+            self._version_nombres = version
+        return self._nombres
+
+    def buscar(self, texto, limite=None):
+        """Turnos cuyo nombre coincide con el texto, sin distinguir mayúsculas ni tildes, por relevancia."""
+        with self._hilos:
+            with metricas.tramo("indice"):
+                return self.obtener_varios(self._indice_nombres().buscar(texto, limite))
+
+    def insertar(self, turno):
+        """Agrega un turno; conserva su ID si lo trae y no está usado."""
+        with self._hilos:
+            id_pedido = turno.get("id") if isinstance(turno.get("id"), int) else None
+            if id_pedido is not None and self.conexion.execute(
+                "SELECT 1 FROM turnos WHERE id = ?", (id_pedido,)
+            ).fetchone():
+                id_pedido = None
+            turno.setdefault("modificado", marca_modificacion())
+            turno.setdefault("version", 1)
+            with self.transaccion():
+                cursor = self.conexion.execute(
+                    "INSERT INTO turnos (id, nombre, nombre_normalizado, categoria, servicio, fecha, hora, extra, modificado, version)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (id_pedido,) + _a_fila(turno),
+                )
+                self._sumar_estadisticas(turno, 1)
+            turno["id"] = cursor.lastrowid
+            if self._nombres is not None:
+                self._nombres.agregar(turno)
+            return turno["id"]
+
+    def _vigente(self, turno, version):
+        """Turno guardado con el ID de `turno`; si se pidió `version` y no coincide, ConflictoDeVersion."""
+        actual = self.obtener(turno.get("id"))
+        if version is not None and (actual is None or version_de(actual) != version):
+            raise ConflictoDeVersion(actual)
+        return actual
+
+    def eliminar(self, turno, version=None):
+        """Elimina un turno. Devuelve False si ya no existía (ConflictoDeVersion si cambió de `version`)."""
+        with self._hilos:
+            with self.transaccion():
+                actual = self._vigente(turno, version)
+                if actual is None:
+                    return False
+                self.conexion.execute("DELETE FROM turnos WHERE id = ?", (actual["id"],))
+                self._sumar_estadisticas(actual, -1)
+            if self._nombres is not None:
+                self._nombres.quitar(actual)
+            return True
+
+    def actualizar(self, turno, nueva_fecha, nueva_hora, version=None):
+        """Cambia la fecha y hora de un turno. Devuelve False si ya no existía (ConflictoDeVersion si cambió de `version`)."""
+        with self._hilos:
+            modificado = marca_modificacion()
+            with self.transaccion():
+                actual = self._vigente(turno, version)
+                if actual is None:
+                    return False
+                nueva_version = version_de(actual) + 1
+                self.conexion.execute(
+                    "UPDATE turnos SET fecha = ?, hora = ?, modificado = ?, version = ? WHERE id = ?",
+                    (nueva_fecha, nueva_hora, modificado, nueva_version, actual["id"]),
+                )
+                self._sumar_estadisticas(actual, -1)
+                self._sumar_estadisticas(dict(actual, hora=nueva_hora), 1)
+            turno["fecha"] = nueva_fecha
+            turno["hora"] = nueva_hora
+            turno["modificado"] = modificado
+            turno["version"] = nueva_version
+            return True
+
+
+def migrar_desde_json(ruta_json, ruta_db):
+    """
+    Copia los turnos de un clientes.json a una base SQLite nueva.
+
+    Los registros viejos sin `fecha` se guardan con fecha NULL y los que no
+    tienen `id` (o lo tienen repetido) reciben uno nuevo.
+    """
+    with open(ruta_json, "r", encoding="utf-8") as f:
+        clientes = json.load(f)
+
+    repositorio = RepositorioSQLite(ruta_db)
+    existentes = repositorio.conexion.execute("SELECT COUNT(*) FROM turnos").fetchone()[0]
+    if existentes:
+        return f"La base {ruta_db} ya tiene {existentes} turnos; no se migró nada."
+
+    con_id = [t for t in clientes if isinstance(t, dict) and isinstance(t.get("id"), int)]
+    sin_id = [t for t in clientes if isinstance(t, dict) and not isinstance(t.get("id"), int)]
+    with repositorio.transaccion():
+        # Primero los que traen ID para conservarlos; después los que reciben uno nuevo.
+        for turno in con_id + sin_id:
+            repositorio.insertar(dict(turno))
+    return f"Se migraron {len(con_id) + len(sin_id)} turnos de {ruta_json} a {ruta_db}."
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrar":
+        print("Uso: python repositorio_sqlite.py migrar [clientes.json] [turnos.db]")
+        sys.exit(1)
+    ruta_json = sys.argv[2] if len(sys.argv) > 2 else "clientes.json"
+    ruta_db = sys.argv[3] if len(sys.argv) > 3 else "turnos.db"
+    if not os.path.exists(ruta_json):
+        print(f"No se encontró {ruta_json}.")
+        sys.exit(1)
+    print(migrar_desde_json(ruta_json, ruta_db))
@@ -0,0 +1,91 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+HILOS = 3
+INTERVALO = 50  # Milisegundos entre revisiones de la cola de resultados
+
+
+class TrabajosEnSegundoPlano:
+    """
+    Corre funciones en un grupo de hilos y entrega los resultados en el hilo de Tkinter.
+
+    Los hilos nunca tocan widgets: dejan lo que haya que hacer en la GUI en
+    una cola que el hilo principal vacía con `after` cada INTERVALO ms. Ahí
+    se llama a `al_terminar(resultado)` o a `al_fallar(excepcion)`, se
+    vuelven a habilitar los botones deshabilitados y se avisa a
+    `al_cambiar_ocupado(ocupado)` para mostrar u ocultar el indicador.
+    """
+
+    def __init__(self, raiz, hilos=HILOS):
+        self.raiz = raiz
+        self.grupo = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="turnos")
+        self.pendientes = queue.Queue()  # Funciones a llamar en el hilo principal
+        self.en_curso = 0
+        self.cancelaciones = set()
+        self.al_cambiar_ocupado = None
+        self.raiz.after(INTERVALO, self._revisar)
+
+    def ejecutar(self, trabajo, *args, al_terminar=None, al_fallar=None, deshabilitar=(), cancelacion=None):
+        """
+        Corre `trabajo(*args)` en otro hilo. Se llama desde el hilo principal.
+
+        Los widgets de `deshabilitar` quedan inactivos hasta que termina.
+        `cancelacion` (un threading.Event que el trabajo consulta) se marca
+        si se cierra la aplicación antes de que termine.
+        """
+        for widget in deshabilitar:
+            widget.configure(state="disabled")
+        if cancelacion is not None:
+            self.cancelaciones.add(cancelacion)
+        self.en_curso += 1
+        self._avisar()
+
+        def entregar(futuro):
+            self.en_curso -= 1
+            self.cancelaciones.discard(cancelacion)
+            for widget in deshabilitar:
+                if widget.winfo_exists():
+                    widget.configure(state="normal")
+            self._avisar()
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                (al_fallar or mostrar_falla)(e)
+                return
+            if al_terminar is not None:
+                al_terminar(resultado)
+
+        futuro = self.grupo.submit(trabajo, *args)
+        futuro.add_done_callback(lambda f: self.pendientes.put(lambda: entregar(f)))
+        return futuro
+
+    def en_hilo_principal(self, funcion, *args):
+        """Pide, desde un trabajo, que `funcion(*args)` se llame en el hilo de Tkinter (p. ej. para el progreso)."""
+        self.pendientes.put(lambda: funcion(*args))
+
+    def ocupado(self):
+        return self.en_curso > 0
+
+    def cerrar(self):
+        """Cancela lo que se pueda y no espera a los trabajos en curso."""
+        for cancelacion in list(self.cancelaciones):
+            cancelacion.set()
+        self.grupo.shutdown(wait=False, cancel_futures=True)
+
+    def _avisar(self):
+        if self.al_cambiar_ocupado is not None:
+            self.al_cambiar_ocupado(self.ocupado())
+
+    def _revisar(self):
+        while True:
+            try:
+                funcion = self.pendientes.get_nowait()
+            except queue.Empty:
+                break
+            funcion()
+        self.raiz.after(INTERVALO, self._revisar)
+
+
+def mostrar_falla(error):
+    messagebox.showerror("Error", f"No se pudo completar la operación: {error}")
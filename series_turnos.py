@@ -0,0 +1,58 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from validaciones import DOMINGO, FERIADO, Reloj
+
+FRECUENCIAS = {"Semanal": 1, "Cada 2 semanas": 2, "Cada 3 semanas": 3, "Cada 4 semanas": 4}
+OMITIBLES = (DOMINGO, FERIADO)  # Fechas de la serie que se saltean (y se informan) sin rechazar la serie
+
+# `serie`: ID de la serie agendada (None si no se agendó); `ids`: los turnos
+# creados; `omitidos` y `errores`: pares (fecha, ErrorValidacion).
+ResultadoSerie = namedtuple("ResultadoSerie", "serie ids omitidos errores")
+
+
+def nuevo_id_serie():
+    """ID corto para una serie nueva (se guarda en el campo `serie` de cada turno)."""
+    return uuid.uuid4().hex[:8]
+
+def fechas_serie(inicio, cada_semanas=1, hasta=None, repeticiones=None, reloj=None):
+    """
+    Fechas YYYY-MM-DD de la serie: `inicio` y cada `cada_semanas` semanas.
+
+    Termina en `hasta` (inclusive), al llegar a `repeticiones` fechas o en
+    el límite de reservas (DIAS_LIMITE días desde hoy), lo que llegue
+    primero. Devuelve [] si `inicio` no es una fecha.
+    """
+    try:
+        dia = datetime.strptime(inicio, "%Y-%m-%d").date()
+        fin = datetime.strptime(hasta, "%Y-%m-%d").date() if hasta else None
+    except (TypeError, ValueError):
+        return []
+    limite = (reloj or Reloj()).limite
+    fin = min(fin, limite) if fin else limite
+    paso = timedelta(weeks=max(1, int(cada_semanas)))
+    fechas = []
+    while dia <= fin and (repeticiones is None or len(fechas) < repeticiones):
+        fechas.append(dia.isoformat())
+        dia += paso
+    return fechas
+
+def desplazar_fecha(fecha, dias):
+    """La fecha YYYY-MM-DD `dias` días después (o antes, si es negativo)."""
+    return (datetime.strptime(fecha, "%Y-%m-%d").date() + timedelta(days=dias)).isoformat()
+
+def describir_resultado(resultado, nombre=""):
+    """Texto para el usuario con lo que pasó al agendar una serie."""
+    lineas = []
+    if resultado.serie is not None:
+        lineas.append(f"Serie {resultado.serie} de {nombre}: {len(resultado.ids)} turno(s) agendados.")
+    elif resultado.errores:
+        lineas.append("No se agendó ningún turno de la serie:")
+    else:
+        lineas.append("No quedó ninguna fecha disponible para la serie.")
+    lineas.extend(f"  {fecha}: {error.mensaje}" for fecha, error in resultado.errores)
+    if resultado.omitidos:
+        lineas.append("Fechas salteadas:")
+        lineas.extend(f"  {fecha}: {error.mensaje}" for fecha, error in resultado.omitidos)
+    return "\n".join(lineas)
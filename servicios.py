@@ -1,34 +1,34 @@
-CATEGORIAS = {
-    "Cabello": [
-        "Corte de cabello",
-        "Tinte de cabello",
-        "Peinado",
-        "Tratamiento capilar",
-        "Lavado y peinado",
-        "Alisado permanente",
-        "Extensiones",
-        "Mechas",
-        "Hidratación profunda"
-    ],
-    "Uñas": [
-        "Manicura",
-        "Pedicura",
-        "Acrilicas",
-        "Gel semipermanente"
-    ],
-    "Facial": [
-        "Masaje facial",
-        "Limpieza facial",
-        "Maquillaje",
-        
-    ],
-    "Depilación": [
-        "Depilación con cera",
-        "Depilación con hilo",
-        "Depilación láser",
-        "Depilación con azucar"
-    ]
-}
-
-
-
+CATEGORIAS = {
+    "Cabello": [
+        "Corte de cabello",
+        "Tinte de cabello",
+        "Peinado",
+        "Tratamiento capilar",
+        "Lavado y peinado",
+        "Alisado permanente",
+        "Extensiones",
+        "Mechas",
+        "Hidratación profunda"
+    ],
+    "Uñas": [
+        "Manicura",
+        "Pedicura",
+        "Acrilicas",
+        "Gel semipermanente"
+    ],
+    "Facial": [
+        "Masaje facial",
+        "Limpieza facial",
+        "Maquillaje",
+        
+    ],
+    "Depilación": [
+        "Depilación con cera",
+        "Depilación con hilo",
+        "Depilación láser",
+        "Depilación con azucar"
+    ]
+}
+
+
+
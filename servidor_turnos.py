@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import sys
+
+import agregar_turno
+import cliente_turnos
+from repositorio import MODO_ALMACENAMIENTO, obtener_repositorio
+
+DIRECCION_PREDETERMINADA = "127.0.0.1:8765"
+ESPERA_LOTE = 0.002  # Segundos que se esperan otros pedidos antes de confirmar un lote
+
+
+def _error(error):
+    return list(error) if error else None
+
+def _turno(turno):
+    return dict(turno) if turno is not None else None
+
+
+# Cada operación recibe el pedido (diccionario) y devuelve la respuesta.
+# Las escrituras usan las funciones de agregar_turno, que validan contra el
+# índice en memoria del repositorio dentro de la transacción del lote.
+
+def _agendar(pedido):
+    turno = pedido["turno"]
+    nuevo_id, error = agregar_turno.agendar_turno(turno)
+    return {"id": nuevo_id, "turno": turno if nuevo_id is not None else None, "error": _error(error)}
+
+def _mover(pedido):
+    turno, error = agregar_turno.mover_turno(pedido["id"], pedido["fecha"], pedido["hora"], pedido.get("version"))
+    return {"turno": _turno(turno), "error": _error(error)}
+
+def _cancelar(pedido):
+    if pedido.get("id") is not None:
+        turno, error = agregar_turno.quitar_turno(pedido["id"], pedido.get("version"))
+        return {"turno": _turno(turno), "error": _error(error)}
+    return {"mensaje": agregar_turno.cancelar_turno(pedido.get("nombre", ""))}
+
+def _agregar_lote(pedido):
+    turnos = pedido["turnos"]
+    resultados = agregar_turno.agregar_turnos(turnos, pedido.get("todo_o_nada", False))
+    return {"resultados": resultados, "turnos": turnos}
+
+def _agendar_serie(pedido):
+    resultado = agregar_turno.agendar_serie(
+        pedido["turno"], pedido.get("cada_semanas", 1), pedido.get("hasta"), pedido.get("repeticiones")
+    )
+    return {"resultado": resultado}
+
+def _mover_serie(pedido):
+    movidos, errores = agregar_turno.mover_serie(pedido["serie"], pedido.get("dias", 0), pedido.get("hora"))
+    return {"movidos": movidos, "errores": errores}
+
+ESCRITURAS = {
+    "agendar": _agendar,
+    "mover": _mover,
+    "cancelar": _cancelar,
+    "agregar_lote": _agregar_lote,
+    "agendar_serie": _agendar_serie,
+    "mover_serie": _mover_serie,
+    "cancelar_serie": lambda pedido: {"mensaje": agregar_turno.cancelar_serie(pedido["serie"])},
+}
+
+LECTURAS = {
+    "listar": lambda pedido: {"turnos": [dict(t) for t in agregar_turno.cargar_clientes()]},
+    "obtener": lambda pedido: {"turno": _turno(agregar_turno.obtener_turno(pedido.get("id")))},
+    "ids": lambda pedido: {"ids": agregar_turno.listar_ids_turnos(
+        pedido.get("desde"), pedido.get("hasta"), pedido.get("categoria"), pedido.get("nombre"))},
+    "turnos": lambda pedido: {"turnos": [dict(t) for t in agregar_turno.obtener_turnos(pedido.get("ids", []))]},
+    "buscar": lambda pedido: {"resultados": agregar_turno.buscar_turno(pedido.get("nombre", ""))},
+    "por_nombre": lambda pedido: {"turnos": [dict(t) for t in agregar_turno.turnos_por_nombre(pedido.get("nombre"))]},
+    "iterar": lambda pedido: {"turnos": [dict(t) for t in agregar_turno.iterar_turnos(
+        pedido.get("desde"), pedido.get("hasta"), pedido.get("categoria"), pedido.get("servicio"),
+        pedido.get("modificado_desde"))]},
+    "ocupacion": lambda pedido: {"ocupacion": obtener_repositorio().ocupacion(pedido["desde"], pedido["hasta"])},
+    "estadisticas": lambda pedido: {"estadisticas": agregar_turno.obtener_estadisticas(pedido.get("top", 5))},
+}
+
+
+class ServicioTurnos:
+    """
+    Atiende pedidos de varios puestos con un único estado en memoria.
+
+    Las lecturas se responden en el momento. Las escrituras se encolan y una
+    tarea las confirma por lotes: toma todo lo que llegó mientras se
+    confirmaba el lote anterior (más `espera_lote`), lo aplica en una sola
+    transacción del repositorio y escribe a disco una sola vez. Como todo
+    corre en el mismo hilo, cada pedido se valida viendo los anteriores del
+    mismo lote.
+    """
+
+    def __init__(self, espera_lote=ESPERA_LOTE):
+        self.espera_lote = espera_lote
+        self.cola = asyncio.Queue()
+        self.lotes = 0
+        self.escrituras = 0
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión: un pedido JSON por línea, una respuesta JSON por línea."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    respuesta = await self.resolver(json.loads(linea))
+                except Exception as e:
+                    respuesta = {"error_interno": str(e)}
+                escritor.write(json.dumps(respuesta, ensure_ascii=False, default=dict).encode("utf-8") + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def resolver(self, pedido):
+        operacion = pedido.get("op")
+        if operacion in LECTURAS:
+            return LECTURAS[operacion](pedido)
+        if operacion in ESCRITURAS:
+            respuesta = asyncio.get_running_loop().create_future()
+            await self.cola.put((pedido, respuesta))
+            return await respuesta
+        return {"error_interno": f"Operación desconocida: {operacion}"}
+
+    async def confirmar_lotes(self):
+        """Tarea que junta las escrituras pendientes y las confirma por lotes."""
+        while True:
+            lote = [await self.cola.get()]
+            await asyncio.sleep(self.espera_lote)
+            while not self.cola.empty():
+                lote.append(self.cola.get_nowait())
+            respuestas = self._aplicar(lote)
+            for (_, futuro), respuesta in zip(lote, respuestas):
+                if not futuro.done():
+                    futuro.set_result(respuesta)
+
+    def _aplicar(self, lote):
+        self.lotes += 1
+        self.escrituras += len(lote)
+        try:
+            with obtener_repositorio().transaccion():
+                return [ESCRITURAS[pedido["op"]](pedido) for pedido, _ in lote]
+        except Exception:
+            # El lote no se pudo confirmar (ya se deshizo): se reintenta cada
+            # pedido por separado para que uno con problemas no arrastre a los demás.
+            return [self._aplicar_uno(pedido) for pedido, _ in lote]
+
+    def _aplicar_uno(self, pedido):
+        try:
+            return ESCRITURAS[pedido["op"]](pedido)
+        except Exception as e:
+            return {"error_interno": str(e)}
+
+
+async def servir(direccion=DIRECCION_PREDETERMINADA, espera_lote=ESPERA_LOTE):
+    """Inicia el servicio en `direccion` ("host:puerto" o "unix:/ruta") y atiende hasta que se lo detenga."""
+    # El servicio trabaja sobre el almacenamiento local aunque TURNOS_SERVIDOR
+    # esté definida en el entorno (si no, se enviaría los pedidos a sí mismo).
+    cliente_turnos.DIRECCION = None
+    servicio = ServicioTurnos(espera_lote)
+    obtener_repositorio().refrescar()  # Carga los turnos antes de aceptar conexiones
+
+    destino = cliente_turnos.interpretar_direccion(direccion)
+    if destino[0] == "unix":
+        if os.path.exists(destino[1]):
+            os.remove(destino[1])  # Socket de una ejecución anterior
+        servidor = await asyncio.start_unix_server(servicio.atender, path=destino[1])
+    else:
+        servidor = await asyncio.start_server(servicio.atender, destino[1], destino[2])
+
+    confirmador = asyncio.create_task(servicio.confirmar_lotes())
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        confirmador.cancel()
+
+
+if __name__ == "__main__":
+    direccion = sys.argv[1] if len(sys.argv) > 1 else (os.environ.get("TURNOS_SERVIDOR") or DIRECCION_PREDETERMINADA)
+    print(f"Servicio de turnos en {direccion} (almacenamiento: {MODO_ALMACENAMIENTO}). Ctrl+C para detenerlo.")
+    try:
+        asyncio.run(servir(direccion))
+    except KeyboardInterrupt:
+        print("Servicio detenido.")
@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import cache_archivos  # noqa: E402
+import cliente_turnos  # noqa: E402
+import diario_turnos  # noqa: E402
+import repositorio  # noqa: E402
+from horarios import obtener_calendario  # noqa: E402
+
+MODOS = ("json", "diario", "sqlite")
+
+
+def reiniciar():
+    """Olvida todo lo cargado en memoria, como si arrancara otro proceso."""
+    hilo = diario_turnos._estado["compactacion"]
+    if hilo is not None:
+        hilo.join()
+    diario_turnos._estado.update(registros=0, compactacion=None)
+    for repo in repositorio._repositorios.values():
+        conexion = getattr(repo, "conexion", None)
+        if conexion is not None:
+            conexion.close()
+    repositorio._repositorios.clear()
+    cache_archivos._entradas.clear()
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Directorio de trabajo vacío (con los feriados del proyecto) y el almacenamiento sin cargar."""
+    shutil.copy(os.path.join(RAIZ, "feriados.json"), tmp_path / "feriados.json")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cliente_turnos, "DIRECCION", None)
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", "json")
+    reiniciar()
+    yield tmp_path
+    reiniciar()
+
+
+@pytest.fixture(params=MODOS)
+def modo(request, directorio, monkeypatch):
+    """Corre el test con cada modo de almacenamiento."""
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", request.param)
+    return request.param
+
+
+def dia_habil(dias=7):
+    """Primer día reservable (YYYY-MM-DD) a partir de `dias` días desde hoy."""
+    return obtener_calendario().proximo_reservable(date.today() + timedelta(days=dias)).isoformat()
+
+
+def turno(nombre="Ana Perez", categoria="Uñas", servicio="Manicura", fecha=None, hora="11:00"):
+    return {"nombre": nombre, "categoria": categoria, "servicio": servicio, "fecha": fecha or dia_habil(), "hora": hora}
+
+
+@pytest.fixture
+def servidor(directorio, monkeypatch):
+    """Servicio de turnos en otro proceso y otro directorio; este proceso queda en modo cliente."""
+    carpeta = directorio / "servidor"
+    carpeta.mkdir()
+    shutil.copy(os.path.join(RAIZ, "feriados.json"), carpeta / "feriados.json")
+    direccion = f"unix:{carpeta / 'turnos.sock'}"
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, TURNOS_ALMACENAMIENTO="json")
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "servidor_turnos.py"), direccion],
+        cwd=carpeta, env=entorno, stdout=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + 10
+    while not (carpeta / "turnos.sock").exists():
+        assert proceso.poll() is None and time.monotonic() < limite, "El servicio de turnos no arrancó."
+        time.sleep(0.02)
+    monkeypatch.setattr(cliente_turnos, "DIRECCION", direccion)
+    yield carpeta
+    proceso.terminate()
+    proceso.wait()
@@ -0,0 +1,38 @@
+from agregar_turno import agregar_turnos, cargar_clientes
+from conftest import dia_habil, turno
+from repositorio import obtener_repositorio
+
+
+def test_lote_agenda_los_validos_y_ve_los_anteriores_del_lote(modo):
+    fecha = dia_habil()
+    lote = [turno("Ana Perez", fecha=fecha), turno("Ana Perez", fecha=fecha), turno("Berta Gomez", fecha=fecha)]
+
+    resultados = agregar_turnos(lote)
+
+    assert "agendado correctamente" in resultados[0]
+    assert "ya tiene un turno" in resultados[1]
+    assert "agendado correctamente" in resultados[2]
+    assert sorted(t["nombre"] for t in cargar_clientes()) == ["Ana Perez", "Berta Gomez"]
+    assert "id" in lote[0] and "id" not in lote[1]
+
+
+def test_todo_o_nada_no_agenda_ninguno(modo):
+    fecha = dia_habil()
+    lote = [turno("Ana Perez", fecha=fecha), turno("Berta Gomez", fecha=fecha), turno("Carla Diaz", fecha=fecha)]
+
+    resultados = agregar_turnos(lote, todo_o_nada=True)
+
+    assert "Ya hay 2 turnos" in resultados[2]
+    assert all("no agendado" in r for r in resultados[:2])
+    assert cargar_clientes() == []
+    assert all("id" not in t for t in lote)
+
+
+def test_todo_o_nada_dentro_de_otra_transaccion(modo):
+    fecha = dia_habil()
+    repo = obtener_repositorio()
+    with repo.transaccion():
+        agregar_turnos([turno("Ana Perez", fecha=fecha), turno("Ana Perez", fecha=fecha)], todo_o_nada=True)
+
+    assert cargar_clientes() == []
+    assert obtener_repositorio().cantidad("Uñas", fecha, "11:00") == 0
@@ -0,0 +1,45 @@
+from almacen_columnar import COMPACTAR_DESDE
+from indice_turnos import IndiceTurnos
+
+
+def _turnos(cantidad):
+    return [
+        {"nombre": f"Cliente {i}", "categoria": "Uñas", "servicio": "Manicura", "fecha": "2030-01-07",
+         "hora": "11:00", "id": i, "version": 1, **({"serie": f"s{i}"} if i % 3 == 0 else {})}
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def test_las_bajas_compactan_el_almacen():
+    cantidad = COMPACTAR_DESDE * 3
+    indice = IndiceTurnos(_turnos(cantidad))
+    almacen = indice.almacen
+    quedan = {i: indice.obtener(i) for i in range(1, cantidad + 1) if i % 2 == 0}
+    quitado = indice.obtener(1)
+
+    for i in range(1, cantidad + 1, 2):
+        indice.quitar(indice.obtener(i))
+
+    assert len(almacen) < cantidad  # Se compactó al menos una vez
+    assert dict(quitado) == _turnos(1)[0]  # La vista de una baja sigue legible
+    assert len(almacen.nombres.valores) < cantidad
+    for i, vista in quedan.items():
+        assert indice.obtener(i) is vista
+        assert vista.almacen is almacen
+        assert vista["nombre"] == f"Cliente {i}"
+        assert vista.get("serie") == (f"s{i}" if i % 3 == 0 else None)
+    assert sorted(almacen.col_id[fila] for fila in almacen.filtrar(desde="2030-01-07")) == sorted(quedan)
+    assert sorted(indice.nombres().buscar("Cliente 10", limite=1)) == [10]
+    assert indice.cantidad("Uñas", "2030-01-07", "11:00") == len(quedan)
+
+
+def test_indice_compactado_se_guarda_y_se_recupera():
+    cantidad = COMPACTAR_DESDE * 2
+    indice = IndiceTurnos(_turnos(cantidad))
+    for i in range(1, cantidad):
+        indice.quitar(indice.obtener(i))
+    indice.agregar({"nombre": "Nueva", "categoria": "Facial", "fecha": "2030-01-08", "hora": "12:00", "id": cantidad + 1})
+
+    copia = IndiceTurnos.desde_estado(indice.a_estado())
+
+    assert [dict(t) for t in copia.lista()] == [dict(t) for t in indice.lista()]
@@ -0,0 +1,63 @@
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from analisis_ocupacion import construir_matriz_ocupacion
+from conftest import dia_habil, turno
+from horarios import Calendario
+from repositorio import obtener_repositorio
+from validaciones import HORARIOS_VALIDOS
+
+CATEGORIAS = ["Uñas", "Cabello"]
+
+
+def test_cuenta_archivado_y_actual_por_dia_y_horario(modo):
+    futuro = dia_habil()
+    repo = obtener_repositorio()
+    repo.guardar([
+        turno("Ana Perez", fecha="2024-01-10"),  # Miércoles
+        turno("Berta Gomez", fecha="2024-01-10"),
+        turno("Carla Diaz", categoria="Cabello", servicio="Corte", fecha="2024-02-05", hora="16:00"),  # Lunes
+        turno("Dora Lopez", categoria="Facial", servicio="Limpieza", fecha="2024-02-05"),
+        turno("Elena Ruiz", fecha=futuro, hora="12:30"),
+        turno("Flora Sosa", fecha="2023-12-30"),  # Fuera del rango
+    ])
+    if hasattr(repo, "archivar_pasados"):
+        repo.archivar_pasados()
+        assert repo.historico.meses() == ["2023-12", "2024-01", "2024-02"]
+
+    calendario = Calendario(desde=date(2024, 1, 1))
+    matriz = construir_matriz_ocupacion("2024-01-01", futuro, repo, CATEGORIAS, calendario)
+
+    esperado = Counter()
+    for t in repo.iterar("2024-01-01", futuro):
+        if t["categoria"] in CATEGORIAS:
+            dia = date.fromisoformat(t["fecha"]).weekday()
+            esperado[CATEGORIAS.index(t["categoria"]), dia, HORARIOS_VALIDOS.index(t["hora"])] += 1
+    contado = Counter({
+        (c, d, h): matriz.turnos(c, d, h)
+        for c in range(len(CATEGORIAS)) for d in range(7) for h in range(len(HORARIOS_VALIDOS))
+        if matriz.turnos(c, d, h)
+    })
+    assert contado == esperado
+    assert matriz.total() == 4
+    assert matriz.turnos(0, 2, HORARIOS_VALIDOS.index("11:00")) == 2
+
+
+def test_utilizacion_contra_los_dias_reservables(directorio):
+    obtener_repositorio().guardar([turno("Ana Perez", fecha="2025-06-16"), turno("Berta Gomez", fecha="2025-06-23")])
+    calendario = Calendario(["2025-06-17"], desde=date(2025, 6, 16))
+
+    matriz = construir_matriz_ocupacion("2025-06-16", "2025-06-29", obtener_repositorio(), CATEGORIAS, calendario)
+
+    once = HORARIOS_VALIDOS.index("11:00")
+    assert matriz.dias_por_semana == [2, 1, 2, 2, 2, 2, 0]
+    assert matriz.utilizacion(0, 0, once) == pytest.approx(2 / 4)
+    assert matriz.utilizacion(0, 6, once) is None
+    assert matriz.tabla()[0][once] == pytest.approx(2 / 8)
+
+
+def test_rango_invalido(directorio):
+    with pytest.raises(ValueError):
+        construir_matriz_ocupacion("2025-06-20", "2025-06-10")
@@ -0,0 +1,51 @@
+import pytest
+
+from archivo_historico import ArchivoHistorico, escribir_archivo
+
+TURNOS = [
+    {"id": 3, "nombre": "Ana Pérez", "categoria": "Uñas", "servicio": "Manicura", "fecha": "2024-01-10",
+     "hora": "11:00", "modificado": "2024-01-02T10:00:00.123456", "version": 2},
+    {"id": 1, "nombre": "Berta Gomez", "categoria": "Cabello", "servicio": "Corte", "fecha": "2024-01-03",
+     "hora": "16:00", "modificado": "2024-01-01T09:00:00", "version": 1, "serie": "ab12cd34"},
+    {"id": 2, "nombre": "Ana Pérez", "categoria": "Uñas", "servicio": "Pedicura", "fecha": "2024-01-10",
+     "hora": "07:15", "version": 1, "modificado": "ayer"},
+]
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    ruta = str(tmp_path / "turnos-2024-01.bin")
+    escribir_archivo(ruta, TURNOS)
+    return ArchivoHistorico(ruta)
+
+
+def test_devuelve_los_mismos_turnos_ordenados_por_dia_y_hora(archivo):
+    assert len(archivo) == 3
+    assert archivo.turnos() == [TURNOS[1], TURNOS[2], TURNOS[0]]
+
+
+def test_filtra_sobre_las_columnas(archivo):
+    def ids(filas):
+        return [archivo.id(fila) for fila in filas]
+
+    assert ids(archivo.rango("2024-01-04", "2024-01-31")) == [2, 3]
+    assert ids(archivo.filtrar(categoria="Uñas", servicio="Manicura")) == [3]
+    assert ids(archivo.filtrar(modificado_desde="2024-01-01T12:00:00")) == [2, 3]
+    assert ids(archivo.con_nombres({archivo.codigos("nombre")["Ana Pérez"]})) == [2, 3]
+
+
+def test_contadores(archivo):
+    contadores = archivo.contadores()
+
+    assert contadores["total"] == 3
+    assert contadores["cliente"] == {"Ana Pérez": 2, "Berta Gomez": 1}
+    assert contadores["categoria"] == {"Uñas": 2, "Cabello": 1}
+    assert contadores["banda"] == {"Mañana": 1, "Tarde": 1, "Desconocido": 1}
+
+
+def test_rechaza_otro_formato(tmp_path):
+    ruta = tmp_path / "otro.bin"
+    ruta.write_bytes(b"X" * 64)
+
+    with pytest.raises(ValueError):
+        ArchivoHistorico(str(ruta))
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+import pytest
+
+import repositorio
+from bloqueo_archivos import ArchivoOcupado
+from agregar_turno import agendar_turno, cancelar_turno, cancelar_turno_por_id, cargar_clientes, mover_turno, quitar_turno
+from conftest import RAIZ, dia_habil, reiniciar, turno
+from repositorio import version_de
+from validaciones import CONFLICTO, HORARIOS_VALIDOS, MAX_TURNOS_POR_FRANJA, NO_ENCONTRADO
+
+PUESTO = """
+import sys
+from agregar_turno import agendar_turno
+fecha, nombre = sys.argv[1], sys.argv[2]
+for hora in sys.argv[3:]:
+    nuevo_id, error = agendar_turno({"nombre": nombre, "categoria": "Uñas", "servicio": "Manicura", "fecha": fecha, "hora": hora})
+    assert error is None or error.codigo == "capacidad", error.mensaje
+"""
+
+
+@pytest.mark.parametrize("almacenamiento", ["json", "diario", "sqlite"])
+def test_varios_procesos_respetan_la_capacidad(directorio, almacenamiento, monkeypatch):
+    fecha = dia_habil()
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, TURNOS_ALMACENAMIENTO=almacenamiento)
+    nombres = ["Ana Perez", "Berta Gomez", "Carla Diaz", "Dora Lopez"]
+    puestos = [
+        subprocess.Popen([sys.executable, "-c", PUESTO, fecha, nombre, *HORARIOS_VALIDOS[:8]], cwd=directorio, env=entorno)
+        for nombre in nombres
+    ]
+    assert [p.wait() for p in puestos] == [0] * len(puestos)
+
+    reiniciar()
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", almacenamiento)
+    turnos = cargar_clientes()
+    # Cada proceso valida con lo último que guardaron los demás: nunca más de 2 por franja.
+    assert Counter(t["hora"] for t in turnos) == {hora: MAX_TURNOS_POR_FRANJA for hora in HORARIOS_VALIDOS[:8]}
+    assert len({t["id"] for t in turnos}) == len(turnos)
+
+
+def test_cambio_con_version_vieja_es_conflicto(modo):
+    fecha = dia_habil()
+    id_turno, _ = agendar_turno(turno("Ana Perez", fecha=fecha))
+    leido = [t for t in cargar_clientes() if t["id"] == id_turno][0]
+    version = version_de(leido)
+    # Otro puesto lo mueve mientras tanto.
+    assert mover_turno(id_turno, fecha, "15:00")[1] is None
+
+    _, error = mover_turno(id_turno, fecha, "16:00", version=version)
+    assert error.codigo == CONFLICTO and "15:00" in error.mensaje
+    assert "15:00" in cancelar_turno_por_id(id_turno, version=version)
+    actual, error = quitar_turno(id_turno, version=version)
+    assert error.codigo == CONFLICTO and actual["hora"] == "15:00"
+    assert [t["hora"] for t in cargar_clientes()] == ["15:00"]
+    assert quitar_turno(id_turno)[1] is None
+    assert quitar_turno(id_turno)[1].codigo == NO_ENCONTRADO
+
+
+def test_cancelar_por_nombre_con_el_archivo_tomado(directorio, monkeypatch):
+    agendar_turno(turno("Ana Perez"))
+    repo = repositorio.obtener_repositorio()
+
+    def ocupado():
+        raise ArchivoOcupado("clientes.json está siendo usado por otro puesto; intente de nuevo.")
+    monkeypatch.setattr(repo, "transaccion", ocupado)
+
+    assert cancelar_turno("Ana Perez") == "clientes.json está siendo usado por otro puesto; intente de nuevo."
+    assert [t["nombre"] for t in repo.todos()] == ["Ana Perez"]
@@ -0,0 +1,44 @@
+from busqueda_nombres import IndiceNombres, plegar
+
+CLIENTES = [
+    {"id": 1, "nombre": "Ana Pérez"},
+    {"id": 2, "nombre": "Mariana Lopez"},
+    {"id": 3, "nombre": "ana perez"},
+    {"id": 4, "nombre": "Anabella Ruiz"},
+    {"id": 5, "nombre": "Juana Anaya"},
+    {"id": 6, "nombre": "Berta Gomez"},
+]
+
+
+def test_plegar():
+    assert plegar("  Ána   PÉREZ ") == "ana perez"
+    assert plegar(None) == ""
+
+
+def test_ordena_por_relevancia():
+    indice = IndiceNombres(CLIENTES)
+
+    # Igual, empieza con (los más cortos primero), palabra que empieza con, contiene.
+    assert indice.buscar("ana") == [1, 3, 4, 5, 2]
+    assert indice.buscar("ANA PEREZ") == [1, 3]
+    assert indice.buscar("ana", limite=2) == [1, 3]
+    assert indice.buscar("go") == [6]
+    assert indice.buscar("") == []
+
+
+def test_sugiere_parecidos_si_nada_coincide():
+    indice = IndiceNombres(CLIENTES)
+
+    assert indice.buscar("berta gomes") == [6]
+    assert indice.buscar("zzz") == []
+
+
+def test_quitar_y_estado():
+    indice = IndiceNombres(CLIENTES)
+    indice.quitar({"id": 1, "nombre": "Ana Pérez"})
+    indice.quitar({"id": 6, "nombre": "Berta Gomez"})
+
+    copia = IndiceNombres.desde_estado(indice.a_estado())
+    assert copia.buscar("ana perez") == [3]
+    assert copia.buscar("berta") == []
+    assert "berta gomez" not in copia.ids_por_nombre
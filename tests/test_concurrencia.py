@@ -0,0 +1,59 @@
+import threading
+
+import almacen_columnar
+from agregar_turno import agendar_turno, agregar_turnos, cancelar_turno_por_id, listar_ids_turnos, obtener_turnos
+from conftest import dia_habil, turno
+from repositorio import obtener_repositorio
+from validaciones import HORARIOS_VALIDOS
+
+NOMBRES = ["Ana Perez", "Berta Gomez", "Carla Diaz", "Dora Lopez", "Elena Ruiz", "Flora Sosa"]
+
+
+def test_consultas_mientras_otros_hilos_agendan_y_cancelan(modo, monkeypatch):
+    # Compactar seguido, para que también se remapeen las filas mientras se lee.
+    monkeypatch.setattr(almacen_columnar, "COMPACTAR_DESDE", 4)
+    fecha = dia_habil()
+    agregar_turnos([turno(nombre, fecha=fecha, hora=hora) for nombre, hora in zip(NOMBRES, HORARIOS_VALIDOS)])
+    repo = obtener_repositorio()
+    fin = threading.Event()
+    errores = []
+    agendados = []
+
+    def escribir(nombre, hora):
+        try:
+            for _ in range(15):
+                nuevo_id, error = agendar_turno(turno(nombre, fecha=fecha, hora=hora))
+                assert error is None, error
+                agendados.append(nuevo_id)
+                assert "cancelado" in cancelar_turno_por_id(nuevo_id)
+        except Exception as e:
+            errores.append(e)
+
+    def leer():
+        try:
+            while not fin.is_set():
+                for encontrado in repo.buscar("pere"):
+                    assert encontrado["nombre"] == "Ana Perez"
+                obtener_turnos(listar_ids_turnos(nombre="gomez"))
+                list(repo.iterar(desde=fecha, hasta=fecha))
+                repo.estadisticas()
+        except Exception as e:
+            errores.append(e)
+
+    lectores = [threading.Thread(target=leer) for _ in range(3)]
+    escritores = [
+        threading.Thread(target=escribir, args=(nombre, hora))
+        for nombre, hora in zip(NOMBRES[:3], HORARIOS_VALIDOS[10:])
+    ]
+    for hilo in lectores + escritores:
+        hilo.start()
+    for hilo in escritores:
+        hilo.join()
+    fin.set()
+    for hilo in lectores:
+        hilo.join()
+
+    assert errores == []
+    assert len(agendados) == 45
+    assert [t["nombre"] for t in repo.buscar("perez")] == ["Ana Perez"]
+    assert len(repo.todos()) == len(NOMBRES)
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+import diario_turnos
+import imagen_turnos
+import repositorio
+from agregar_turno import agendar_turno, agregar_turnos, cancelar_turno_por_id, cargar_clientes, mover_turno
+from conftest import dia_habil, reiniciar, turno
+from repositorio import ARCHIVO_CLIENTES
+
+DIARIO = diario_turnos.ruta_diario(ARCHIVO_CLIENTES)
+
+
+@pytest.fixture
+def diario(directorio, monkeypatch):
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", "diario")
+    return directorio
+
+
+def _cargar_sin_imagen():
+    """Turnos (por ID) leídos de nuevo desde la instantánea y el diario."""
+    reiniciar()
+    imagen = imagen_turnos.ruta_imagen(ARCHIVO_CLIENTES)
+    if os.path.exists(imagen):
+        os.remove(imagen)
+    return {t["id"]: (t["nombre"], t["fecha"], t["hora"]) for t in cargar_clientes()}
+
+
+def test_los_cambios_van_al_diario_y_se_reaplican(diario):
+    fecha = dia_habil()
+    ana, _ = agendar_turno(turno("Ana Perez", fecha=fecha))
+    berta, _ = agendar_turno(turno("Berta Gomez", fecha=fecha))
+    agregar_turnos([turno("Carla Diaz", fecha=fecha, hora="12:00"), turno("Dora Lopez", fecha=fecha, hora="12:00")])
+    assert mover_turno(ana, fecha, "15:00")[1] is None
+    assert "cancelado" in cancelar_turno_por_id(berta)
+    esperados = {t["id"]: (t["nombre"], t["fecha"], t["hora"]) for t in cargar_clientes()}
+
+    assert not os.path.exists(ARCHIVO_CLIENTES)
+    with open(DIARIO, encoding="utf-8") as f:
+        operaciones = [json.loads(linea)["op"] for linea in f]
+    assert operaciones == ["alta", "alta", "lote", "cambio", "baja"]
+    assert _cargar_sin_imagen() == esperados
+    assert esperados[ana] == ("Ana Perez", fecha, "15:00")
+
+
+def test_se_descarta_la_ultima_linea_cortada(diario):
+    fecha = dia_habil()
+    agendar_turno(turno("Ana Perez", fecha=fecha))
+    esperados = _cargar_sin_imagen()
+    with open(DIARIO, "a", encoding="utf-8") as f:
+        f.write('{"op": "lote", "registros": [{"op": "alta", "turno": {"id": 9')
+
+    assert _cargar_sin_imagen() == esperados
+
+
+def test_reaplicar_un_diario_ya_incluido_no_cambia_nada(diario):
+    fecha = dia_habil()
+    ana, _ = agendar_turno(turno("Ana Perez", fecha=fecha))
+    agendar_turno(turno("Berta Gomez", fecha=fecha))
+    cancelar_turno_por_id(ana)
+    esperados = _cargar_sin_imagen()
+    # Una compactación cortada después de escribir la instantánea y antes de borrar el diario.
+    diario_turnos.escribir_atomico(ARCHIVO_CLIENTES, [dict(t) for t in cargar_clientes()])
+
+    assert _cargar_sin_imagen() == esperados
+
+
+def test_compactacion_en_segundo_plano(diario, monkeypatch):
+    monkeypatch.setattr(diario_turnos, "UMBRAL_COMPACTACION", 3)
+    fecha = dia_habil()
+    horas = ["10:00", "10:30", "11:00", "11:30", "12:00"]
+    for hora in horas:
+        assert agendar_turno(turno("Ana Perez", fecha=fecha, hora=hora))[1] is None
+    diario_turnos._estado["compactacion"].join()
+
+    with open(ARCHIVO_CLIENTES, encoding="utf-8") as f:
+        instantanea = json.load(f)
+    assert [t["hora"] for t in instantanea] == horas[:3]
+    assert not os.path.exists(diario_turnos.ruta_diario_anterior(ARCHIVO_CLIENTES))
+    with open(DIARIO, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    assert sorted(h for _, _, h in _cargar_sin_imagen().values()) == horas
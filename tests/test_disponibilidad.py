@@ -0,0 +1,54 @@
+from datetime import date, datetime
+
+from agregar_turno import agendar_turno
+from conftest import dia_habil, turno
+from disponibilidad import MatrizDisponibilidad, construir_disponibilidad
+from horarios import Calendario
+
+AHORA = datetime(2025, 6, 16, 9, 0)  # Lunes
+CALENDARIO = Calendario(["2025-06-17"], desde=date(2025, 6, 16))
+OCUPACION = [(("Uñas", "2025-06-18", "11:00"), 1), (("Uñas", "2025-06-18", "11:30"), 2)]
+
+
+def test_libres_respeta_calendario_anticipacion_y_ocupacion():
+    matriz = MatrizDisponibilidad(OCUPACION, CALENDARIO, AHORA)
+
+    assert matriz.libres("Uñas", "2025-06-16", "10:30") == 0  # Menos de 2 horas de anticipación
+    assert matriz.libres("Uñas", "2025-06-16", "11:00") == 2
+    assert matriz.libres("Uñas", "2025-06-17", "11:00") == 0  # Feriado
+    assert matriz.libres("Uñas", "2025-06-22", "11:00") == 0  # Domingo
+    assert matriz.libres("Uñas", "2025-06-18", "11:00") == 1
+    assert matriz.libres("Uñas", "2025-06-18", "11:30") == 0
+    assert matriz.libres("Cabello", "2025-06-18", "11:30") == 2
+    assert matriz.libres("Uñas", "2025-06-18", "07:00") == 0  # Fuera de horario
+
+
+def test_proximos_libres():
+    matriz = MatrizDisponibilidad(OCUPACION, CALENDARIO, AHORA)
+
+    assert matriz.proximos_libres("Uñas", "2025-06-18", "11:00", cantidad=3) == [
+        ("2025-06-18", "11:00", 1), ("2025-06-18", "12:00", 2), ("2025-06-18", "12:30", 2),
+    ]
+    assert matriz.proximos_libres("Uñas", "2025-06-16", "18:00", cantidad=1) == [("2025-06-16", "18:00", 2)]
+    assert matriz.proximos_libres("Uñas", "2030-01-01", "11:00") == []
+
+
+def test_ocupar_y_liberar_no_se_pasan_de_los_limites():
+    matriz = MatrizDisponibilidad(OCUPACION, CALENDARIO, AHORA)
+
+    matriz.ocupar("Uñas", "2025-06-18", "11:00", 5)
+    assert matriz.libres("Uñas", "2025-06-18", "11:00") == 0
+    matriz.liberar("Uñas", "2025-06-18", "11:00", 5)
+    assert matriz.libres("Uñas", "2025-06-18", "11:00") == 2
+    matriz.liberar("Uñas", "2025-06-17", "11:00")
+    assert matriz.libres("Uñas", "2025-06-17", "11:00") == 0
+
+
+def test_construir_con_los_turnos_guardados(modo):
+    fecha = dia_habil()
+    agendar_turno(turno("Ana Perez", fecha=fecha))
+
+    matriz = construir_disponibilidad()
+
+    assert matriz.libres("Uñas", fecha, "11:00") == 1
+    assert matriz.libres("Cabello", fecha, "11:00") == 2
@@ -0,0 +1,50 @@
+import random
+
+from agregar_turno import agendar_turno, cancelar_turno_por_id, cargar_clientes, mover_turno, obtener_estadisticas
+from conftest import dia_habil, reiniciar, turno
+from estadisticas import EstadisticasTurnos, clasificar_banda
+from servicios import CATEGORIAS
+from validaciones import HORARIOS_VALIDOS
+
+
+def test_clasificar_banda():
+    assert clasificar_banda("10:00") == "Mañana"
+    assert clasificar_banda("15:00") == "Mañana"
+    assert clasificar_banda("15:30") == "Tarde"
+    assert clasificar_banda("18:30") == "Desconocido"
+    assert clasificar_banda(None) == "Desconocido"
+
+
+def test_contadores_incrementales_coinciden_con_recontar(modo):
+    azar = random.Random(3)
+    fechas = [dia_habil(7), dia_habil(14)]
+    nombres = ["Ana Perez", "Berta Gomez", "Carla Diaz", "Dora Lopez"]
+    ids = []
+    for _ in range(40):
+        nuevo = turno(azar.choice(nombres), categoria=azar.choice(list(CATEGORIAS)), servicio="Servicio",
+                      fecha=azar.choice(fechas), hora=azar.choice(HORARIOS_VALIDOS))
+        nuevo_id, error = agendar_turno(nuevo)
+        if error is None:
+            ids.append(nuevo_id)
+    for id_turno in azar.sample(ids, 8):
+        mover_turno(id_turno, azar.choice(fechas), azar.choice(HORARIOS_VALIDOS))
+    for id_turno in azar.sample(ids, 8):
+        cancelar_turno_por_id(id_turno)
+
+    esperado = EstadisticasTurnos(cargar_clientes())
+    for _ in range(2):  # Con lo mantenido en memoria y al volver a cargar
+        resumen = obtener_estadisticas(top=3)["resumen"]
+        assert resumen["total"] == esperado.total
+        assert resumen["categorias"] == dict(esperado.contadores["categoria"])
+        assert resumen["bandas"] == dict(esperado.contadores["banda"])
+        assert [c for _, c in resumen["clientes"]] == [c for _, c in esperado.top_clientes(3)]
+        reiniciar()
+
+
+def test_top_clientes_tras_restar():
+    estadisticas = EstadisticasTurnos([turno("Ana Perez")] * 3 + [turno("Berta Gomez")] * 2)
+    estadisticas.sumar(turno("Ana Perez"), -1)
+    estadisticas.sumar(turno("Ana Perez"), -1)
+
+    assert estadisticas.top_clientes(2) == [("Berta Gomez", 2), ("Ana Perez", 1)]
+    assert EstadisticasTurnos.desde_estado(estadisticas.a_estado()).top_clientes(5) == estadisticas.top_clientes(5)
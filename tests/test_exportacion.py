@@ -0,0 +1,60 @@
+import csv
+import gzip
+import threading
+
+import pytest
+
+import exportacion
+from agregar_turno import agregar_turnos, exportar_csv, mover_turno
+from conftest import dia_habil, turno
+from exportacion import ExportacionCancelada, exportar_turnos
+
+
+def _leer(ruta, abrir=open):
+    with abrir(ruta, "rt", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_exporta_filtrado_y_comprimido(modo):
+    fecha, otra = dia_habil(), dia_habil(14)
+    agregar_turnos([
+        turno("Ana Perez", fecha=fecha),
+        turno("Berta Gomez", categoria="Cabello", servicio="Corte", fecha=fecha),
+        turno("Carla Diaz", fecha=otra),
+    ])
+
+    assert exportar_csv("turnos.csv.gz", hasta=fecha) == "Exportación completada: 2 turno(s) en turnos.csv.gz."
+    assert sorted(f["Nombre"] for f in _leer("turnos.csv.gz", gzip.open)) == ["Ana Perez", "Berta Gomez"]
+    exportar_csv("unas.csv", categoria="Uñas")
+    assert sorted(f["Nombre"] for f in _leer("unas.csv")) == ["Ana Perez", "Carla Diaz"]
+
+
+def test_exportacion_incremental(modo):
+    fecha = dia_habil()
+    lote = [turno("Ana Perez", fecha=fecha), turno("Berta Gomez", fecha=fecha)]
+    agregar_turnos(lote)
+
+    assert "2 turno(s)" in exportar_csv("cambios.csv", incremental=True)
+    assert "0 turno(s)" in exportar_csv("cambios.csv", incremental=True)
+    assert mover_turno(lote[1]["id"], fecha, "15:00")[1] is None
+    assert "1 turno(s)" in exportar_csv("cambios.csv", incremental=True)
+    assert [(f["Nombre"], f["Hora"]) for f in _leer("cambios.csv")] == [("Berta Gomez", "15:00")]
+
+
+def test_exportacion_cancelada_deja_el_archivo_anterior(tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacion, "AVISO_CADA", 2)
+    ruta = str(tmp_path / "turnos.csv")
+    exportar_turnos([turno("Ana Perez")], ruta)
+    cancelacion = threading.Event()
+    avisos = []
+
+    def progreso(cantidad):
+        avisos.append(cantidad)
+        cancelacion.set()
+
+    with pytest.raises(ExportacionCancelada):
+        exportar_turnos((turno(f"Cliente {i}") for i in range(10)), ruta, cancelacion=cancelacion, progreso=progreso)
+
+    assert avisos == [2]
+    assert [f["Nombre"] for f in _leer(ruta)] == ["Ana Perez"]
+    assert not (tmp_path / "turnos.csv.tmp").exists()
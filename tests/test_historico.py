@@ -0,0 +1,111 @@
+import marshal
+import os
+import random
+from datetime import date
+
+import pytest
+
+import cache_archivos
+import repositorio
+from conftest import turno
+from estadisticas import EstadisticasTurnos, top_combinado
+from repositorio import obtener_repositorio
+
+PASADOS = [
+    turno("Ana Perez", fecha="2024-01-10"),
+    turno("Ana Perezoso", fecha="2024-02-01"),
+    turno("Berta Gomez", fecha="2024-02-02"),
+    turno("Ana Pérez", fecha="2024-03-05", hora="12:00"),
+]
+
+
+@pytest.fixture(params=("json", "diario"))
+def archivado(request, directorio, monkeypatch):
+    """Repositorio con turnos de tres meses ya archivados y uno actual."""
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", request.param)
+    repo = obtener_repositorio()
+    repo.guardar([dict(t) for t in PASADOS] + [turno("Ana Perez")])
+    repo.archivar_pasados(date(2024, 6, 1))
+    return repo
+
+
+def _olvidar_cache():
+    cache_archivos._entradas.clear()
+
+
+def test_busqueda_recorre_los_meses_por_relevancia(archivado):
+    assert archivado.historico.meses() == ["2024-01", "2024-02", "2024-03"]
+    assert len(archivado.todos()) == 1
+
+    encontrados = [(t["nombre"], t.get("fecha")) for t in archivado.buscar("ana perez")]
+
+    assert encontrados[1:] == [("Ana Perez", "2024-01-10"), ("Ana Pérez", "2024-03-05"), ("Ana Perezoso", "2024-02-01")]
+    assert encontrados[0][0] == "Ana Perez" and encontrados[0][1] > "2024-06-01"
+    assert [t["nombre"] for t in archivado.buscar("gomez")] == ["Berta Gomez"]
+    assert archivado.buscar("ana perez", limite=2)[1]["fecha"] == "2024-01-10"
+
+
+def test_indice_de_nombres_se_guarda_con_el_resumen(archivado):
+    historico = archivado.historico
+    with open(historico.ruta_nombres(), "rb") as f:
+        guardado = marshal.load(f)
+    assert guardado["firma"] == cache_archivos.firma((historico.ruta_resumen(),))
+
+    archivado.guardar(archivado.todos() + [turno("Carla Diaz", fecha="2024-01-20")])
+    archivado.archivar_pasados(date(2024, 6, 1))
+
+    with open(historico.ruta_nombres(), "rb") as f:
+        guardado = marshal.load(f)
+    assert guardado["firma"] == cache_archivos.firma((historico.ruta_resumen(),))
+    _olvidar_cache()
+    assert [t["fecha"] for t in historico.buscar("carla")] == ["2024-01-20"]
+    assert len(historico.buscar("ana perez")) == 3
+
+
+@pytest.mark.parametrize("danar", [os.remove, lambda ruta: open(ruta, "wb").write(b"\x00basura")])
+def test_indice_de_nombres_se_rearma_desde_el_resumen(archivado, danar):
+    historico = archivado.historico
+    antes = historico.buscar("perez")
+    danar(historico.ruta_nombres())
+    _olvidar_cache()
+
+    assert historico.buscar("perez") == antes
+    assert os.path.exists(historico.ruta_nombres())
+
+
+def _contar(turnos, top):
+    total = EstadisticasTurnos(turnos)
+    return total.total, total.contadores, sorted(total.contadores["cliente"].values(), reverse=True)[:top]
+
+
+def test_estadisticas_suman_lo_archivado_y_lo_actual(archivado):
+    archivado.guardar(archivado.todos() + [turno("Berta Gomez", hora="16:00"), turno("Berta Gomez", fecha="2024-03-01")])
+    archivado.archivar_pasados(date(2024, 6, 1))
+    todos = list(archivado.iterar())
+    total, contadores, mejores = _contar(todos, 2)
+
+    resumen = archivado.estadisticas(top=2)
+
+    assert resumen["total"] == total == len(PASADOS) + 3
+    assert resumen["categorias"] == dict(contadores["categoria"])
+    assert resumen["bandas"] == dict(contadores["banda"])
+    assert resumen["clientes"] == [("Berta Gomez", 3), ("Ana Perez", 2)]
+    assert [c for _, c in resumen["clientes"]] == mejores
+    _olvidar_cache()
+    os.remove(archivado.historico.ruta_estadisticas())
+    assert archivado.estadisticas(top=2) == resumen
+
+
+def test_top_combinado_coincide_con_sumar_todo():
+    azar = random.Random(7)
+    nombres = [f"Cliente {i}" for i in range(40)]
+    for _ in range(30):
+        una = EstadisticasTurnos(turno(azar.choice(nombres[:25])) for _ in range(azar.randrange(60)))
+        otra = EstadisticasTurnos(turno(azar.choice(nombres[15:])) for _ in range(azar.randrange(60)))
+        juntos = una.contadores["cliente"] + otra.contadores["cliente"]
+        top = azar.randrange(1, 8)
+
+        ranking = top_combinado(una, otra, top)
+
+        assert [c for _, c in ranking] == sorted(juntos.values(), reverse=True)[:top]
+        assert all(juntos[nombre] == cantidad for nombre, cantidad in ranking)
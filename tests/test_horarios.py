@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from horarios import Calendario
+
+DESDE = date(2025, 6, 16)  # Lunes
+
+
+def test_domingos_y_feriados_no_son_reservables():
+    calendario = Calendario(["2025-06-17"], ["12-25", "02-29"], desde=DESDE, dias=30)
+
+    assert calendario.es_reservable("2025-06-16")
+    assert not calendario.es_reservable("2025-06-17")
+    assert not calendario.es_reservable(date(2025, 6, 22))  # Domingo
+    assert calendario.es_reservable("2025-06-21")  # Sábado
+    assert not calendario.es_reservable("2025-12-25")  # Fuera del horizonte: se calcula en el momento
+    assert not calendario.es_reservable("2028-02-29")
+    assert not calendario.es_reservable("no es fecha")
+    assert "2026-12-25" in calendario
+
+
+def test_proximo_reservable():
+    calendario = Calendario(["2025-06-17", "2025-06-18"], desde=DESDE, dias=3)
+
+    assert calendario.proximo_reservable() == DESDE
+    assert calendario.proximo_reservable("2025-06-17") == date(2025, 6, 19)
+    assert calendario.proximo_reservable("2025-06-22") == date(2025, 6, 23)  # Después del horizonte
+    assert calendario.proximo_reservable("mal") is None
+
+
+def test_dias_reservables_del_horizonte():
+    calendario = Calendario(["2025-06-20"], desde=DESDE, dias=14)
+
+    dias = list(calendario.dias_reservables("2025-06-18", "2025-06-24"))
+
+    esperados = [DESDE + timedelta(days=d) for d in (2, 3, 5, 7, 8)]
+    assert dias == esperados
+    assert list(calendario.dias_reservables("2025-07-10")) == []
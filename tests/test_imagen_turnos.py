@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+import diario_turnos
+import imagen_turnos
+import repositorio
+from agregar_turno import agendar_turno, cargar_clientes
+from conftest import dia_habil, reiniciar, turno
+from repositorio import ARCHIVO_CLIENTES, RepositorioArchivo
+
+IMAGEN = imagen_turnos.ruta_imagen(ARCHIVO_CLIENTES)
+
+
+@pytest.fixture(params=("json", "diario"))
+def con_imagen(request, directorio, monkeypatch):
+    """Dos turnos agendados, con la imagen guardada y el proceso "reiniciado"."""
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", request.param)
+    fecha = dia_habil()
+    agendar_turno(turno("Ana Perez", fecha=fecha))
+    agendar_turno(turno("Berta Gomez", fecha=fecha))
+    reiniciar()
+    return request.param
+
+
+def _nombres():
+    return sorted(t["nombre"] for t in cargar_clientes())
+
+
+def _sin_json(monkeypatch):
+    """Hace fallar la carga desde el JSON: sólo puede usarse la imagen."""
+    def fallar(self):
+        raise AssertionError("Se leyó el JSON en lugar de la imagen.")
+    monkeypatch.setattr(RepositorioArchivo, "_leer_json", fallar)
+
+
+def test_arranca_desde_la_imagen(con_imagen, monkeypatch):
+    assert os.path.exists(IMAGEN)
+    _sin_json(monkeypatch)
+
+    assert _nombres() == ["Ana Perez", "Berta Gomez"]
+
+
+def test_imagen_con_crc_invalido_se_descarta(con_imagen, monkeypatch):
+    with open(IMAGEN, "r+b") as f:
+        f.seek(-5, os.SEEK_END)
+        byte = f.read(1)
+        f.seek(-5, os.SEEK_END)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert imagen_turnos.cargar(ARCHIVO_CLIENTES, lambda firma: True) is None
+
+    assert _nombres() == ["Ana Perez", "Berta Gomez"]  # Desde el JSON (y el diario)
+    reiniciar()
+    _sin_json(monkeypatch)
+    assert _nombres() == ["Ana Perez", "Berta Gomez"]  # La imagen se volvió a escribir
+
+
+def test_imagen_cortada_se_descarta(con_imagen):
+    with open(IMAGEN, "r+b") as f:
+        f.truncate(imagen_turnos.ENCABEZADO.size + 10)
+
+    assert _nombres() == ["Ana Perez", "Berta Gomez"]
+
+
+def test_imagen_vieja_se_descarta(con_imagen):
+    # Otro programa reescribe los turnos sin pasar por el repositorio.
+    diario_turnos.escribir_atomico(ARCHIVO_CLIENTES, [dict(turno("Carla Diaz"), id=1)])
+    if os.path.exists(diario_turnos.ruta_diario(ARCHIVO_CLIENTES)):
+        os.remove(diario_turnos.ruta_diario(ARCHIVO_CLIENTES))
+
+    assert _nombres() == ["Carla Diaz"]
+
+
+def test_modo_diario_aplica_la_cola_agregada_despues_de_la_imagen(directorio, monkeypatch):
+    monkeypatch.setattr(repositorio, "MODO_ALMACENAMIENTO", "diario")
+    fecha = dia_habil()
+    agendar_turno(turno("Ana Perez", fecha=fecha))
+    with open(IMAGEN, "rb") as f:
+        imagen = f.read()
+    agendar_turno(turno("Berta Gomez", fecha=fecha))
+    with open(IMAGEN, "wb") as f:
+        f.write(imagen)  # La imagen no incluye el segundo turno, que sólo está en el diario
+    with open(diario_turnos.ruta_diario(ARCHIVO_CLIENTES), encoding="utf-8") as f:
+        assert [json.loads(linea)["op"] for linea in f] == ["alta", "alta"]
+    reiniciar()
+    _sin_json(monkeypatch)
+
+    assert _nombres() == ["Ana Perez", "Berta Gomez"]
@@ -0,0 +1,70 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from agregar_turno import agendar_serie, agendar_turno, cancelar_serie, mover_serie
+from conftest import turno
+from repositorio import obtener_repositorio
+from series_turnos import desplazar_fecha
+from validaciones import CAPACIDAD, FERIADO
+
+
+@pytest.fixture
+def inicio(modo):
+    """Primer día de la serie; el único feriado es el de la semana siguiente."""
+    dia = date.today() + timedelta(days=7)
+    while dia.weekday() == 6:
+        dia += timedelta(days=1)
+    with open("feriados.json", "w", encoding="utf-8") as f:
+        json.dump({"feriados": [desplazar_fecha(dia.isoformat(), 7)], "recurrentes": []}, f)
+    return dia.isoformat()
+
+
+def _fechas(serie):
+    return [(t["fecha"], t["hora"]) for t in obtener_repositorio().por_serie(serie)]
+
+
+def test_agendar_serie_saltea_feriados(inicio):
+    resultado = agendar_serie(turno("Ana Perez", fecha=inicio), cada_semanas=1, repeticiones=4)
+
+    assert resultado.serie is not None and resultado.errores == []
+    assert [(f, e.codigo) for f, e in resultado.omitidos] == [(desplazar_fecha(inicio, 7), FERIADO)]
+    assert _fechas(resultado.serie) == [(desplazar_fecha(inicio, d), "11:00") for d in (0, 14, 21)]
+    assert [t["id"] for t in obtener_repositorio().por_serie(resultado.serie)] == resultado.ids
+
+
+def test_serie_con_una_fecha_llena_no_agenda_ninguna(inicio):
+    lleno = desplazar_fecha(inicio, 14)
+    for nombre in ("Berta Gomez", "Carla Diaz"):
+        assert agendar_turno(turno(nombre, fecha=lleno))[1] is None
+
+    resultado = agendar_serie(turno("Ana Perez", fecha=inicio), cada_semanas=1, repeticiones=4)
+
+    assert resultado.serie is None and resultado.ids == []
+    assert [(f, e.codigo) for f, e in resultado.errores] == [(lleno, CAPACIDAD)]
+    assert [t["nombre"] for t in obtener_repositorio().todos()] == ["Berta Gomez", "Carla Diaz"]
+
+
+def test_mover_serie_entera_o_nada(inicio):
+    serie = agendar_serie(turno("Ana Perez", fecha=inicio), cada_semanas=2, repeticiones=3).serie
+    originales = _fechas(serie)
+
+    assert mover_serie(serie, nueva_hora="15:00") == (3, [])
+    assert _fechas(serie) == [(fecha, "15:00") for fecha, _ in originales]
+
+    # Se corre una semana: el primero caería en el feriado y no se mueve ninguno.
+    movidos, errores = mover_serie(serie, dias=7)
+    assert movidos == 0
+    assert [(f, e.codigo) for f, e in errores] == [(desplazar_fecha(inicio, 7), FERIADO)]
+    assert _fechas(serie) == [(fecha, "15:00") for fecha, _ in originales]
+
+
+def test_cancelar_serie(inicio):
+    serie = agendar_serie(turno("Ana Perez", fecha=inicio), cada_semanas=2, repeticiones=3).serie
+    suelto, _ = agendar_turno(turno("Ana Perez", fecha=inicio, hora="16:00"))
+
+    assert cancelar_serie(serie) == f"Serie {serie} cancelada: 3 turno(s)."
+    assert _fechas(serie) == []
+    assert [t["id"] for t in obtener_repositorio().todos()] == [suelto]
+    assert cancelar_serie(serie) == "Serie no encontrada."
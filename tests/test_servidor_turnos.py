@@ -0,0 +1,38 @@
+import csv
+
+import agregar_turno
+from conftest import dia_habil, turno
+from disponibilidad import construir_disponibilidad
+from validaciones import CONFLICTO
+
+
+def test_modo_cliente_no_toca_los_archivos_locales(servidor, directorio):
+    fecha = dia_habil()
+    nuevo_id, error = agregar_turno.agendar_turno(turno("Ana Perez", fecha=fecha))
+    assert error is None
+
+    resultados = agregar_turno.agregar_turnos(
+        [turno("Berta Gomez", fecha=fecha), turno("Carla Diaz", fecha=fecha)], todo_o_nada=True
+    )
+    assert "no agendado" in resultados[0] and "Ya hay 2 turnos" in resultados[1]
+
+    assert [t["id"] for t in agregar_turno.turnos_por_nombre("Ana Perez")] == [nuevo_id]
+    mensaje = agregar_turno.modificar_turno("Ana Perez", fecha, "12:00")
+    assert mensaje == f"Turno de Ana Perez modificado a {fecha} a las 12:00."
+
+    matriz = construir_disponibilidad()
+    assert matriz.libres("Uñas", fecha, "12:00") == 1
+    assert matriz.libres("Uñas", fecha, "11:00") == 2
+
+    assert agregar_turno.exportar_csv("turnos.csv") == "Exportación completada: 1 turno(s) en turnos.csv."
+    with open(directorio / "turnos.csv", encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    assert [(fila["Nombre"], fila["Hora"]) for fila in filas] == [("Ana Perez", "12:00")]
+
+    assert agregar_turno.quitar_turno(nuevo_id, version=1)[1].codigo == CONFLICTO  # Ya se movió: versión 2
+    cancelado, error = agregar_turno.quitar_turno(nuevo_id)
+    assert error is None and cancelado["nombre"] == "Ana Perez"
+    assert agregar_turno.cancelar_turno_por_id(nuevo_id) == "Turno no encontrado."
+
+    assert (servidor / "clientes.json").exists()
+    assert not (directorio / "clientes.json").exists()
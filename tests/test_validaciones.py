@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from validaciones import ANTICIPACION, ETAPAS_CAMBIO, Reloj, validar_serie, validar_turno
+
+
+def _pedido_cercano():
+    ahora = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    while ahora.weekday() == 6:
+        ahora += timedelta(days=1)
+    pedido = {"nombre": "Ana Perez", "categoria": "Uñas", "servicio": "Manicura",
+              "fecha": ahora.date().isoformat(), "hora": "10:00"}
+    return pedido, Reloj(ahora)
+
+
+def test_anticipacion_al_agendar():
+    pedido, reloj = _pedido_cercano()
+    error = validar_turno(pedido, reloj=reloj)
+    assert error.codigo == ANTICIPACION
+    assert error.mensaje == "Los turnos deben solicitarse con al menos 2 horas de anticipación."
+
+
+def test_anticipacion_al_modificar():
+    pedido, reloj = _pedido_cercano()
+    error = validar_turno(pedido, [], excluir=dict(pedido), reloj=reloj, etapas=ETAPAS_CAMBIO)
+    assert error.mensaje == "Los turnos deben modificarse con al menos 2 horas de anticipación."
+
+    errores = validar_serie([pedido], [], reloj=reloj, reemplaza=[dict(pedido)], etapas=ETAPAS_CAMBIO)
+    assert errores[0].mensaje == error.mensaje
@@ -1,95 +1,329 @@
-from datetime import datetime, timedelta
-import re
-
-HORARIOS_VALIDOS = [
-    f"{h:02d}:{m:02d}"
-    for h in range(10, 19)
-    for m in (0, 30)
-    if not (h == 18 and m == 30)
-]
-
-DIAS_VALIDOS = [0, 1, 2, 3, 4, 5]  #No se puede tomar turnos los domingos
-
-
-def validar_nombre_completo(nombre):
-    nombre = nombre.strip()
-    if len(nombre) < 4:
-        return False
-    return bool(re.match(r"^[A-Za-zÁÉÍÓÚÑáéíóúñ ]+$", nombre))
-
-def validar_fecha(fecha_str):
-    """Valida formato YYYY-MM-DD y que no sea una fecha pasada."""
-    try:
-        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-        hoy = datetime.today().date()
-        return fecha >= hoy
-    except ValueError:
-        return False
-
-def validar_hora(hora_str):
-    """
-    Valida que la hora esté en formato HH:MM, 
-    que sea entre 10:00 y 18:00, 
-    y en punto o y media solamente.
-    """
-    if hora_str not in HORARIOS_VALIDOS:
-        return False
-    return True
-
-def validar_no_vacios(campos):
-    """Verifica que todos los campos estén completos (no vacíos)."""
-    return all(campos)
-
-def validar_dia_valido(fecha_str):
-    """
-    Valida que la fecha esté permitida según los días válidos (evita domingos u otros).
-    """
-    try:
-        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-        return fecha.weekday() in DIAS_VALIDOS
-    except ValueError:
-        return False
-
-def turno_duplicado(clientes, nuevo_turno):
-    """Revisa si ya existe un turno con la misma fecha y hora para ese cliente."""
-    for t in clientes:
-        if (
-            t.get("nombre") == nuevo_turno.get("nombre") and
-            t.get("fecha") == nuevo_turno.get("fecha") and
-            t.get("hora") == nuevo_turno.get("hora")
-        ):
-            return True
-    return False
-
-def validar_anticipacion(fecha_str, hora_str, anticipacion_minima_horas=2):
-    """Valida que el turno se solicite con al menos X horas de anticipación."""
-    try:
-        fecha_turno = datetime.strptime(fecha_str, "%Y-%m-%d")
-        hora_turno = datetime.strptime(hora_str, "%H:%M").time()
-        turno_datetime = datetime.combine(fecha_turno, hora_turno)
-        ahora = datetime.now()
-
-        return turno_datetime >= ahora + timedelta(hours=anticipacion_minima_horas)
-    except ValueError:
-        return False
-
-def validar_capacidad_categoria(clientes, categoria, fecha, hora):
-    max_turnos = 2
-    cantidad = sum(
-    1 for t in clientes
-    if t.get("categoria") == categoria and t.get("fecha") == fecha and t.get("hora") == hora
-)
-    if cantidad >= max_turnos:
-        return False, "Ya hay 2 turnos registrados en esta categoría a esa hora."
-    return True, ""
-
-def validar_limite_4_meses(fecha_str):
-    """
-    Valida que la fecha no sea más allá de 4 meses desde hoy.
-    """
-    try:
-        fecha_turno = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-        fecha_limite = (datetime.today() + timedelta(days=120)).date()  # 4 meses aprox
-        return fecha_turno <= fecha_limite
-    except ValueError:
-        return False
\ No newline at end of file
+from collections import Counter, namedtuple
+from datetime import datetime, time, timedelta
+import re
+
+import metricas
+
+HORARIOS_VALIDOS = [
+    f"{h:02d}:{m:02d}"
+    for h in range(10, 19)
+    for m in (0, 30)
+    if not (h == 18 and m == 30)
+]
+
+DIAS_VALIDOS = [0, 1, 2, 3, 4, 5]  #No se puede tomar turnos los domingos
+
+MAX_TURNOS_POR_FRANJA = 2  # Turnos simultáneos por categoría, fecha y hora
+
+
+def validar_nombre_completo(nombre):
+    nombre = nombre.strip()
+    if len(nombre) < 4:
+        return False
+    return bool(re.match(r"^[A-Za-zÁÉÍÓÚÑáéíóúñ ]+$", nombre))
+
+def validar_fecha(fecha_str):
+    """Valida formato YYYY-MM-DD y que no sea una fecha pasada."""
+    try:
+        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+        hoy = datetime.today().date()
+        return fecha >= hoy
+    except ValueError:
+        return False
+
+def validar_formato_fecha(fecha_str):
+    """Valida sólo el formato YYYY-MM-DD (admite fechas pasadas, p. ej. para filtros)."""
+    try:
+        datetime.strptime(fecha_str, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+def validar_hora(hora_str):
+    """
+    Valida que la hora esté en formato HH:MM, 
+    que sea entre 10:00 y 18:00, 
+    y en punto o y media solamente.
+    """
+    if hora_str not in HORARIOS_VALIDOS:
+        return False
+    return True
+
+def validar_no_vacios(campos):
+    """Verifica que todos los campos estén completos (no vacíos)."""
+    return all(campos)
+
+def validar_dia_valido(fecha_str):
+    """
+    Valida que la fecha esté permitida según los días válidos (evita domingos u otros).
+    """
+    try:
+        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+        return fecha.weekday() in DIAS_VALIDOS
+    except ValueError:
+        return False
+
+def _ocupacion(clientes):
+    """Índice de la lista de turnos, o el repositorio si ya responde las consultas."""
+    if hasattr(clientes, "tiene_reserva"):
+        return clientes
+    # Import local: indice_turnos usa HORARIOS_VALIDOS (vía almacen_columnar).
+    from indice_turnos import indice_para
+    return indice_para(clientes)
+
+def turno_duplicado(clientes, nuevo_turno, excluir=None):
+    """Revisa si ya existe un turno con la misma fecha y hora para ese cliente."""
+    return _ocupacion(clientes).tiene_reserva(
+        nuevo_turno.get("nombre"),
+        nuevo_turno.get("fecha"),
+        nuevo_turno.get("hora"),
+        excluir=excluir
+    )
+
+def validar_anticipacion(fecha_str, hora_str, anticipacion_minima_horas=2):
+    """Valida que el turno se solicite con al menos X horas de anticipación."""
+    try:
+        fecha_turno = datetime.strptime(fecha_str, "%Y-%m-%d")
+        hora_turno = datetime.strptime(hora_str, "%H:%M").time()
+        turno_datetime = datetime.combine(fecha_turno, hora_turno)
+        ahora = datetime.now()
+
+        return turno_datetime >= ahora + timedelta(hours=anticipacion_minima_horas)
+    except ValueError:
+        return False
+
+def validar_capacidad_categoria(clientes, categoria, fecha, hora, excluir=None):
+    """Verifica que quede lugar en la categoría para esa fecha y hora (sin contar `excluir`)."""
+    cantidad = _ocupacion(clientes).cantidad(categoria, fecha, hora, excluir=excluir)
+    if cantidad >= MAX_TURNOS_POR_FRANJA:
+        return False, "Ya hay 2 turnos registrados en esta categoría a esa hora."
+    return True, ""
+
+def validar_limite_4_meses(fecha_str):
+    """
+    Valida que la fecha no sea más allá de 4 meses desde hoy.
+    """
+    try:
+        fecha_turno = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+        fecha_limite = (datetime.today() + timedelta(days=120)).date()  # 4 meses aprox
+        return fecha_turno <= fecha_limite
+    except ValueError:
+        return False
+
+
+# --- Validación en un solo paso ---------------------------------------------
+#
+# Un pedido de turno se interpreta una vez (Turno) y se valida contra una sola
+# lectura del reloj (Reloj). Cada regla devuelve un ErrorValidacion con un
+# código estable y el mensaje para el usuario; la GUI, el menú de consola y
+# agregar_turno usan las mismas reglas.
+
+ANTICIPACION_MINIMA_HORAS = 2
+DIAS_LIMITE = 120  # 4 meses aprox
+
+CAMPOS_VACIOS = "campos_vacios"
+NOMBRE_INVALIDO = "nombre_invalido"
+FECHA_INVALIDA = "fecha_invalida"
+FECHA_PASADA = "fecha_pasada"
+DOMINGO = "domingo"
+FERIADO = "feriado"
+FUERA_DE_LIMITE = "fuera_de_limite"
+HORA_INVALIDA = "hora_invalida"
+ANTICIPACION = "anticipacion"
+DUPLICADO = "duplicado"
+CAPACIDAD = "capacidad"
+NO_ENCONTRADO = "no_encontrado"  # Para cambios sobre un turno que ya no existe
+CONFLICTO = "conflicto"  # Otro puesto cambió el turno (o tenía tomado el archivo) al mismo tiempo
+
+ErrorValidacion = namedtuple("ErrorValidacion", "codigo mensaje")
+
+_PATRON_NOMBRE = re.compile(r"^[A-Za-zÁÉÍÓÚÑáéíóúñ ]+$")
+_HORAS = {h: time(int(h[:2]), int(h[3:])) for h in HORARIOS_VALIDOS}
+
+
+class Turno:
+    """Pedido de turno ya interpretado: la fecha y la hora se parsean una sola vez."""
+
+    __slots__ = ("nombre", "categoria", "servicio", "fecha", "hora", "dia", "inicio")
+
+    def __init__(self, nombre, categoria, servicio, fecha, hora):
+        self.nombre = (nombre or "").strip()
+        self.categoria = categoria or ""
+        self.servicio = servicio or ""
+        self.fecha = (fecha or "").strip()
+        self.hora = (hora or "").strip()
+        try:
+            self.dia = datetime.strptime(self.fecha, "%Y-%m-%d").date()
+        except ValueError:
+            self.dia = None
+        hora_turno = _HORAS.get(self.hora)
+        self.inicio = datetime.combine(self.dia, hora_turno) if self.dia and hora_turno else None
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(datos.get("nombre"), datos.get("categoria"), datos.get("servicio"), datos.get("fecha"), datos.get("hora"))
+
+    def a_dict(self):
+        """Diccionario con el formato que se guarda en el almacenamiento."""
+        return {
+            "nombre": self.nombre,
+            "categoria": self.categoria,
+            "servicio": self.servicio,
+            "fecha": self.fecha,
+            "hora": self.hora
+        }
+
+
+class Reloj:
+    """Una única lectura de la hora actual y los límites que dependen de ella."""
+
+    __slots__ = ("ahora", "hoy", "minimo", "limite")
+
+    def __init__(self, ahora=None):
+        self.ahora = ahora or datetime.now()
+        self.hoy = self.ahora.date()
+        self.minimo = self.ahora + timedelta(hours=ANTICIPACION_MINIMA_HORAS)
+        self.limite = self.hoy + timedelta(days=DIAS_LIMITE)
+
+
+def _regla_completo(turno, contexto):
+    if not all((turno.nombre, turno.categoria, turno.servicio, turno.fecha, turno.hora)):
+        return ErrorValidacion(CAMPOS_VACIOS, "Complete todos los campos.")
+
+def _regla_nombre(turno, contexto):
+    if len(turno.nombre) < 4 or not _PATRON_NOMBRE.match(turno.nombre):
+        return ErrorValidacion(NOMBRE_INVALIDO, "El nombre debe tener al menos 4 letras y solo contener letras y espacios.")
+
+def _regla_fecha(turno, contexto):
+    if turno.dia is None:
+        return ErrorValidacion(FECHA_INVALIDA, "Formato de fecha incorrecto. Use YYYY-MM-DD.")
+    if turno.dia < contexto["reloj"].hoy:
+        return ErrorValidacion(FECHA_PASADA, f"No puedes agendar turnos en fechas pasadas ({turno.fecha}).")
+    if not contexto["calendario"].es_reservable(turno.dia):
+        if turno.dia.weekday() not in DIAS_VALIDOS:
+            return ErrorValidacion(DOMINGO, "No se pueden registrar turnos los domingos.")
+        return ErrorValidacion(FERIADO, f"No se pueden agendar turnos en días feriados ({turno.fecha}).")
+    if turno.dia > contexto["reloj"].limite:
+        return ErrorValidacion(FUERA_DE_LIMITE, "No se pueden crear turnos con más de 4 meses de anticipación.")
+
+def _regla_hora(turno, contexto):
+    if turno.hora not in _HORAS:
+        return ErrorValidacion(HORA_INVALIDA, "Hora inválida. Solo se permiten horas entre 10:00 y 18:00, en punto o y media.")
+    if turno.inicio is None or turno.inicio < contexto["reloj"].minimo:
+        verbo = "modificarse" if contexto.get("cambio") else "solicitarse"
+        return ErrorValidacion(ANTICIPACION, f"Los turnos deben {verbo} con al menos 2 horas de anticipación.")
+
+def _error_duplicado(turno):
+    return ErrorValidacion(DUPLICADO, f"{turno.nombre} ya tiene un turno registrado el {turno.fecha} a las {turno.hora}.")
+
+def _error_capacidad():
+    return ErrorValidacion(CAPACIDAD, "Ya hay 2 turnos registrados en esta categoría a esa hora.")
+
+def _regla_reserva(turno, contexto):
+    if contexto["repositorio"] is None:
+        return None
+    ocupacion = _ocupacion(contexto["repositorio"])
+    excluir = contexto["excluir"]
+    if ocupacion.tiene_reserva(turno.nombre, turno.fecha, turno.hora, excluir=excluir):
+        return _error_duplicado(turno)
+    if ocupacion.cantidad(turno.categoria, turno.fecha, turno.hora, excluir=excluir) >= MAX_TURNOS_POR_FRANJA:
+        return _error_capacidad()
+
+# Etapas en el orden en que se validan; el menú de consola las usa por separado
+# para volver a preguntar sólo el dato que está mal.
+ETAPAS = {
+    "datos": (_regla_completo,),
+    "nombre": (_regla_nombre,),
+    "fecha": (_regla_fecha,),
+    "hora": (_regla_hora,),
+    "reserva": (_regla_reserva,),
+}
+TODAS_LAS_ETAPAS = tuple(ETAPAS)
+ETAPAS_CAMBIO = ("fecha", "hora", "reserva")  # Al mover un turno el nombre y la categoría no cambian
+
+
+def _calendario(feriados, reloj):
+    if hasattr(feriados, "es_reservable"):
+        return feriados
+    # Import local: horarios usa las constantes de este módulo. Para una
+    # lista suelta no vale la pena precalcular el horizonte (dias=0).
+    from horarios import Calendario
+    return Calendario(feriados, desde=reloj.hoy, dias=0)
+
+
+def validar_turno(turno, repositorio=None, feriados=(), excluir=None, reloj=None, etapas=TODAS_LAS_ETAPAS):
+    """
+    Valida un pedido de turno (Turno o diccionario) y devuelve el primer ErrorValidacion, o None.
+
+    `feriados` es un horarios.Calendario (lo habitual: obtener_calendario())
+    o una lista de fechas YYYY-MM-DD. Las reglas de reserva (duplicado y
+    capacidad) consultan `repositorio` (el repositorio o una lista de turnos;
+    sin él se omiten) sin contar el turno `excluir`. Con `excluir` se valida
+    un cambio de un turno existente (cambia el texto de algunos mensajes).
+    """
+    with metricas.tramo("validacion"):
+        if not isinstance(turno, Turno):
+            turno = Turno.desde_dict(turno)
+        reloj = reloj or Reloj()
+        contexto = {
+            "reloj": reloj,
+            "calendario": _calendario(feriados, reloj),
+            "repositorio": repositorio,
+            "excluir": excluir,
+            "cambio": excluir is not None,
+        }
+        return _primer_error(turno, contexto, etapas)
+
+def _primer_error(turno, contexto, etapas):
+    for etapa in etapas:
+        for regla in ETAPAS[etapa]:
+            error = regla(turno, contexto)
+            if error:
+                return error
+    return None
+
+def validar_serie(turnos, repositorio, feriados=(), reloj=None, reemplaza=(), etapas=TODAS_LAS_ETAPAS):
+    """
+    Valida todos los turnos de una serie (o de un lote) en una pasada y devuelve un ErrorValidacion (o None) por turno.
+
+    Las reglas son las de validar_turno, pero duplicados y capacidad cuentan
+    también los turnos anteriores válidos de la misma serie (como si ya
+    estuvieran agendados) y descuentan los de `reemplaza`: los turnos
+    actuales de la serie cuando se la mueve entera, que dejan su lugar.
+    """
+    # Import local, como en _ocupacion.
+    from indice_turnos import clave_franja, clave_reserva
+
+    with metricas.tramo("validacion"):
+        reloj = reloj or Reloj()
+        contexto = {
+            "reloj": reloj,
+            "calendario": _calendario(feriados, reloj),
+            "repositorio": None,  # La reserva se revisa abajo, con los turnos de la serie
+            "excluir": None,
+            "cambio": bool(reemplaza),
+        }
+        ocupacion = _ocupacion(repositorio)
+        liberadas = Counter(clave_franja(t) for t in reemplaza)
+        reservas_liberadas = Counter(clave_reserva(t) for t in reemplaza)
+        tomadas = Counter()
+        reservas_tomadas = Counter()
+        errores = []
+        for turno in turnos:
+            pedido = turno if isinstance(turno, Turno) else Turno.desde_dict(turno)
+            error = _primer_error(pedido, contexto, [etapa for etapa in etapas if etapa != "reserva"])
+            if error is None and "reserva" in etapas:
+                datos = pedido.a_dict()
+                franja, reserva = clave_franja(datos), clave_reserva(datos)
+                ocupado = ocupacion.cantidad(*franja) - liberadas[franja] + tomadas[franja]
+                if reservas_tomadas[reserva] or (
+                    ocupacion.tiene_reserva(pedido.nombre, pedido.fecha, pedido.hora) and not reservas_liberadas[reserva]
+                ):
+                    error = _error_duplicado(pedido)
+                elif ocupado >= MAX_TURNOS_POR_FRANJA:
+                    error = _error_capacidad()
+                else:
+                    tomadas[franja] += 1
+                    reservas_tomadas[reserva] += 1
+            errores.append(error)
+        return errores